@@ -246,8 +246,9 @@ class BiscaGameUI:
 
     # Starts a game and enters the program into a loop for each trick
     def startGame(self):
+        # Cards are interned and never mutated, so copying the hand lists is enough
         self.trick_hands = [
-            copy.deepcopy(player.get_hand()) for player in self.game.player_pool.players
+            list(player.get_hand()) for player in self.game.player_pool.players
         ]
 
         # Main game loop
@@ -267,7 +268,7 @@ class BiscaGameUI:
             # Advance to next round and keep track of players hands at the beginning of the round
             self.game.next_round()
             self.trick_hands = [
-                copy.deepcopy(player.get_hand())
+                list(player.get_hand())
                 for player in self.game.player_pool.players
             ]
 
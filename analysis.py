@@ -1,51 +1,30 @@
 #!/usr/bin/env python3
 
+import argparse
 import itertools
 import datetime
 import json
+import os
+import sys
+from statistics import NormalDist
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from prettytable import PrettyTable
-from simulate import run_simulations
+from simulate import simulate_shard, RunOptions
+from utils.stats import StatsRecorder, RunningStat
 
 EXPERIMENT_SIMULATIONS = 100000
+EXPERIMENT_WORKERS = os.cpu_count() or 1
 
-def simulate_combinations(players):
-    # Generate all combinations of agent groups for the specified number of players
-    combinations = list(itertools.combinations(agent_types, players))
+# Games per job, each job being checkpointed to disk once done
+EXPERIMENT_SHARD_SIZE = 10000
+CHECKPOINT_DIRECTORY = "analysis_checkpoints"
 
-    # Initialize a dictionary to store the results
-    results = {}
-
-    # Loop through each combination of agent groups
-    for combination in combinations:
-        update_progress(players, combination)
-        # Run the simulation for the current player group and agent combination
-        stats = run_simulations(EXPERIMENT_SIMULATIONS, 0, combination, False, False, None, display=False)
-
-        # Aggregate the results for each player
-        for player_stats in stats:
-            player_type = player_stats["type"]
-            player_result = results.get(player_type, {})
-            player_result.setdefault("wins", 0)
-            player_result.setdefault("losses", 0)
-            player_result.setdefault("draws", 0)
-            player_result.setdefault("average_points_per_game", 0)
-            player_result.setdefault("highest_game_turnover", 0)
-            player_result.setdefault("average_points_per_trick", 0)
-            player_result.setdefault("highest_trick_turnover", 0)
-
-            player_result["type"] = player_type
-            player_result["wins"] += player_stats["wins"]
-            player_result["losses"] += player_stats["losses"]
-            player_result["draws"] += player_stats["draws"]
-            player_result["average_points_per_game"] =+ player_stats["average_points_per_game"]
-            player_result["highest_game_turnover"] =+ player_stats["highest_game_turnover"]
-            player_result["average_points_per_trick"] =+ player_stats["average_points_per_trick"]
-            player_result["highest_trick_turnover"] =+ player_stats["highest_trick_turnover"]
-
-            results[player_type] = player_result
-    
-    # Results aggregated by player type, for the given amount of players
-    return results
+# Adaptive mode: combinations are played a shard at a time, until their results are precise or significant enough.
+# Results are checked after every shard, so the confidence is kept high to make up for the repeated looks.
+ADAPTIVE_SHARD_SIZE = 1000
+ADAPTIVE_CONFIDENCE = 0.99
+ADAPTIVE_WIN_RATE_PRECISION = 0.01  # Half-width of the win rate intervals
+ADAPTIVE_POINTS_PRECISION = 0.5  # Half-width of the points per game intervals
 
 # Define the agent types
 agent_types = ["RandomAgent", "SimpleGreedyAgent", "MinimizePointLossGreedyAgent",
@@ -54,56 +33,318 @@ agent_types = ["RandomAgent", "SimpleGreedyAgent", "MinimizePointLossGreedyAgent
 # Define the maximum number of players
 max_players = 6
 
-def update_progress(player_num, combination):
-    # Print the current player number and agent combination with \r
-    print(f"Running simulations for groups of {player_num} players. Agent Combination: {combination}")
+def experiment_jobs(iterations, shard_size):
+    """
+    Returns the experiment grid as a list of jobs, one per shard of games of each agent combination, for each group size.
+    Jobs are tuples of (group size, combination, shard, start, iterations), start being the index of the shard's first game.
+    """
+    jobs = []
 
-# Results per group size
-results = {}
+    for group_size in range(2, max_players + 1):
+        for combination in itertools.combinations(agent_types, group_size):
+            for shard, start in enumerate(range(0, iterations, shard_size)):
+                jobs.append((group_size, combination, shard, start, min(shard_size, iterations - start)))
 
-start = datetime.datetime.now()
+    return jobs
 
-# Loop through each player group size
-for group_size in range(2, max_players+1):
-    # Run the simulation for the current player group size
-    results[group_size] = simulate_combinations(group_size)
+def checkpoint_path(directory, group_size, combination, shard):
+    return os.path.join(directory, str(group_size), "-".join(combination), f"shard-{shard:04d}.json")
 
-end = datetime.datetime.now()
+def write_checkpoint(path, snapshot):
+    """
+    Writes a checkpoint atomically, so an interrupted write never leaves a partial checkpoint behind.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = path + ".tmp"
 
-# Printing a table with the results for each player in each group size
+    with open(temporary, "w") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+    os.replace(temporary, path)
 
-# Define the table headers
-headers = ["Player Type", "Wins", "Losses", "Draws", "Average Points Per Game", "Highest Game Turnover", "Average Points Per Trick", "Highest Trick Turnover"]
+def open_checkpoints(directory, config):
+    """
+    Prepares the checkpoint directory, refusing to resume from checkpoints of an experiment with another configuration.
+    """
+    manifest = os.path.join(directory, "manifest.json")
 
-# Loop through each player group size
-for group_size in range(2, max_players+1):
+    if os.path.exists(manifest):
+        with open(manifest) as f:
+            existing = json.load(f)
+        if existing != config:
+            print(f"The checkpoints in {directory} belong to another experiment configuration: {existing}. \nUse another --checkpoints directory, or remove it.")
+            sys.exit(1)
+    else:
+        os.makedirs(directory, exist_ok=True)
+        with open(manifest, "w") as f:
+            json.dump(config, f, indent=4)
 
-    # Create a new table
-    table = PrettyTable()
+def run_jobs(jobs, directory, workers, seed=None):
+    """
+    Runs the jobs without a checkpoint yet, checkpointing each one as soon as it completes.
+    Interrupting the run loses at most the jobs in progress.
+    """
+    pending = [job for job in jobs if not os.path.exists(checkpoint_path(directory, *job[:3]))]
+    print(f"{len(jobs) - len(pending)} of {len(jobs)} jobs already checkpointed, running {len(pending)}")
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(simulate_shard, start, iterations, list(combination), RunOptions(seed=seed)): (group_size, combination, shard)
+                for group_size, combination, shard, start, iterations in pending
+            }
+
+            for completed, future in enumerate(as_completed(futures), 1):
+                group_size, combination, shard = futures[future]
+                write_checkpoint(checkpoint_path(directory, group_size, combination, shard), future.result())
+                update_progress(group_size, combination, completed, len(pending))
+    else:
+        for completed, (group_size, combination, shard, start, iterations) in enumerate(pending, 1):
+            snapshot = simulate_shard(start, iterations, list(combination), RunOptions(seed=seed))
+            write_checkpoint(checkpoint_path(directory, group_size, combination, shard), snapshot)
+            update_progress(group_size, combination, completed, len(pending))
+
+def aggregate_checkpoints(jobs, directory):
+    """
+    Aggregates the checkpointed results of every job, per group size and player type, across all agent combinations.
+    """
+    totals = {}
+
+    for (group_size, combination), shards in itertools.groupby(jobs, key=lambda job: job[:2]):
+        stats = StatsRecorder.merge_all(
+            [StatsRecorder.load_snapshot(checkpoint_path(directory, group_size, combination, shard)) for _, _, shard, _, _ in shards]
+        )
+
+        for player_stats in stats.player_stats.values():
+            player_type = player_stats["type"]
+            total = totals.setdefault(group_size, {}).setdefault(player_type, {
+                "wins": 0, "losses": 0, "draws": 0, "game_points": RunningStat(), "trick_points": RunningStat()
+            })
+
+            total["wins"] += player_stats["wins"]
+            total["losses"] += player_stats["losses"]
+            total["draws"] += player_stats["draws"]
+            total["game_points"].merge(player_stats["game_points"])
+            total["trick_points"].merge(player_stats["trick_points"])
+
+    results = {}
+
+    for group_size, types in totals.items():
+        results[group_size] = {}
+        for player_type, total in types.items():
+            results[group_size][player_type] = {
+                "type": player_type,
+                "wins": total["wins"],
+                "losses": total["losses"],
+                "draws": total["draws"],
+                "average_points_per_game": total["game_points"].mean,
+                "highest_game_turnover": total["game_points"].max or 0,
+                "average_points_per_trick": total["trick_points"].mean,
+                "highest_trick_turnover": total["trick_points"].max or 0,
+                "games": total["game_points"].count,
+            }
+
+    return results
+
+def confidence_intervals(stats, z):
+    """
+    Returns the win rate and points per game of each player, keyed by id, as (estimate, low, high) intervals at z
+    standard errors. Win rates use Wilson score intervals, which hold up near 0 and 1.
+    """
+    intervals = {}
+
+    for player_id, player_stats in stats.player_stats.items():
+        game_points = player_stats["game_points"]
+        games = game_points.count
+
+        win_rate = player_stats["wins"] / games
+        center = (win_rate + z * z / (2 * games)) / (1 + z * z / games)
+        spread = z / (1 + z * z / games) * (win_rate * (1 - win_rate) / games + z * z / (4 * games * games)) ** 0.5
+        points_spread = z * game_points.stdev() / games ** 0.5
+
+        intervals[player_id] = {
+            "win_rate": (win_rate, center - spread, center + spread),
+            "points_per_game": (game_points.mean, game_points.mean - points_spread, game_points.mean + points_spread),
+        }
+
+    return intervals
+
+def stopping_reason(stats, z, win_rate_precision, points_precision):
+    """
+    Returns why a combination's results are conclusive, or None if more games are needed: either every interval is
+    within the target precision, or the leader's win rate interval lies above everyone else's.
+    """
+    intervals = confidence_intervals(stats, z)
+
+    if all(
+        (player["win_rate"][2] - player["win_rate"][1]) / 2 <= win_rate_precision
+        and (player["points_per_game"][2] - player["points_per_game"][1]) / 2 <= points_precision
+        for player in intervals.values()
+    ):
+        return "precision"
+
+    leader = max(intervals, key=lambda player_id: intervals[player_id]["win_rate"][0])
+    if all(intervals[leader]["win_rate"][1] > player["win_rate"][2] for player_id, player in intervals.items() if player_id != leader):
+        return "significance"
+
+    return None
+
+def run_adaptive(jobs, directory, workers, z, win_rate_precision, points_precision, seed=None):
+    """
+    Runs each combination's jobs in order, a shard at a time, until its results are conclusive or its jobs run out.
+    The next shard of every combination still running is played in parallel, and checkpointed like any other job, so an
+    interrupted adaptive analysis resumes from its checkpoints and takes the same stopping decisions.
+    Returns the jobs actually run, and the games spent and stopping reason of each combination.
+    """
+    remaining = {key: list(shards) for key, shards in itertools.groupby(jobs, key=lambda job: job[:2])}
+    merged = {key: StatsRecorder() for key in remaining}
+    completed = []
+    spent = {}
 
-    # Set the table headers
-    table.field_names = headers
+    def record(job, snapshot):
+        key = job[:2]
+        merged[key].merge(StatsRecorder.from_snapshot(snapshot))
+        completed.append(job)
+        remaining[key].pop(0)
 
-    # Sort the result values by wins
-    sorted_results = sorted(results[group_size].values(), key=lambda x: x["wins"], reverse=True)
-    results[group_size] = sorted_results
+        reason = stopping_reason(merged[key], z, win_rate_precision, points_precision)
+        if reason is None and not remaining[key]:
+            reason = "iterations"
+        if reason is not None:
+            spent[key] = (merged[key].get_iterations(), reason)
+            del remaining[key]
 
-    # Loop through each player type and corresponding results
-    for player_results in sorted_results:
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while remaining:
+            wave = [shards[0] for shards in remaining.values()]
 
-        # Add a row to the table with the results
-        table.add_row([player_results["type"], player_results["wins"], player_results["losses"], player_results["draws"], player_results["average_points_per_game"], player_results["highest_game_turnover"], player_results["average_points_per_trick"], player_results["highest_trick_turnover"]])
-        table.align = "l"
+            # Shards checkpointed by a previous run are read back rather than played again
+            futures = {}
+            for job in wave:
+                path = checkpoint_path(directory, *job[:3])
+                if os.path.exists(path):
+                    with open(path) as f:
+                        record(job, json.load(f))
+                else:
+                    group_size, combination, shard, start, iterations = job
+                    futures[executor.submit(simulate_shard, start, iterations, list(combination), RunOptions(seed=seed))] = job
 
-    # Print the table
-    print(f"Results for {group_size} players:")
+            for future in as_completed(futures):
+                job = futures[future]
+                write_checkpoint(checkpoint_path(directory, *job[:3]), future.result())
+                record(job, future.result())
+
+            print(f"{len(spent)} of {len(merged)} combinations concluded, {sum(games for games, _ in spent.values())} games spent on them", end="\r")
+
+    print()
+    return completed, spent
+
+def print_games_spent(spent, iterations):
+    """
+    Prints the games each combination took to reach a conclusion, and the total saved over the full budget.
+    """
+    table = PrettyTable()
+    table.field_names = ["Group Size", "Combination", "Games", "Stopped By"]
+    for (group_size, combination), (games, reason) in sorted(spent.items(), key=lambda item: (item[0][0], item[1][0])):
+        table.add_row([group_size, ", ".join(combination), games, reason])
+    table.align = "l"
+
+    total = sum(games for games, _ in spent.values())
+    budget = len(spent) * iterations
+    print("Games spent per combination:")
     print(table)
+    print(f"Spent {total} games out of a budget of {budget} ({total / budget:.1%}).")
     print()
 
-# Save the results for each groupsize to a file with datetime as name
-filename = f"analysis_results_{datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
+def update_progress(player_num, combination, completed, total):
+    # Print the current player number and agent combination with \r
+    print(f"[{completed}/{total}] Completed simulations for groups of {player_num} players. Agent Combination: {combination}")
+
+def main():
+    parser = argparse.ArgumentParser(description='BASIS analysis of every agent combination, for every group size')
+
+    parser.add_argument('--iterations', type=int, default=EXPERIMENT_SIMULATIONS, help='Number of simulations per agent combination')
+    parser.add_argument('--shard-size', type=int, default=None, help=f'Number of simulations per checkpointed job (default: {EXPERIMENT_SHARD_SIZE}, or {ADAPTIVE_SHARD_SIZE} with --adaptive)')
+    parser.add_argument('--workers', type=int, default=EXPERIMENT_WORKERS, help='Number of worker processes to run jobs on')
+    parser.add_argument('--checkpoints', default=CHECKPOINT_DIRECTORY, help='Directory of the job checkpoints, from which interrupted analyses resume')
+    parser.add_argument('--adaptive', action="store_true", help='Stop each combination once its results are precise or significant enough, --iterations being the most it may take')
+    parser.add_argument('--confidence', type=float, default=ADAPTIVE_CONFIDENCE, help='Confidence level of the intervals checked in adaptive mode')
+    parser.add_argument('--win-rate-precision', type=float, default=ADAPTIVE_WIN_RATE_PRECISION, help='Target half-width of the win rate intervals in adaptive mode')
+    parser.add_argument('--points-precision', type=float, default=ADAPTIVE_POINTS_PRECISION, help='Target half-width of the points per game intervals in adaptive mode')
+    parser.add_argument('--seed', type=int, default=None, help='Base seed, making every job reproducible')
+
+    args = parser.parse_args()
+
+    if args.shard_size is None:
+        args.shard_size = ADAPTIVE_SHARD_SIZE if args.adaptive else EXPERIMENT_SHARD_SIZE
+
+    if not 0 < args.confidence < 1:
+        print('Invalid argument. --confidence must be between 0 and 1.')
+        sys.exit(1)
+
+    if args.iterations < 1 or args.shard_size < 1 or args.workers < 1:
+        print('Invalid argument. --iterations, --shard-size and --workers must be at least 1.')
+        sys.exit(1)
+
+    start = datetime.datetime.now()
+
+    config = {"iterations": args.iterations, "shard_size": args.shard_size, "seed": args.seed, "agent_types": agent_types, "max_players": max_players}
+    if args.adaptive:
+        config["adaptive"] = {"confidence": args.confidence, "win_rate_precision": args.win_rate_precision, "points_precision": args.points_precision}
+    open_checkpoints(args.checkpoints, config)
+
+    jobs = experiment_jobs(args.iterations, args.shard_size)
+    if args.adaptive:
+        z = NormalDist().inv_cdf(1 - (1 - args.confidence) / 2)
+        completed, spent = run_adaptive(jobs, args.checkpoints, args.workers, z, args.win_rate_precision, args.points_precision, seed=args.seed)
+        # Only the jobs run are aggregated, kept in the grid's order
+        completed = set(completed)
+        jobs = [job for job in jobs if job in completed]
+        print_games_spent(spent, args.iterations)
+    else:
+        run_jobs(jobs, args.checkpoints, args.workers, seed=args.seed)
+
+    # Results per group size, read back from the checkpoints
+    results = aggregate_checkpoints(jobs, args.checkpoints)
+
+    end = datetime.datetime.now()
+
+    # Printing a table with the results for each player in each group size
+
+    # Define the table headers
+    headers = ["Player Type", "Wins", "Losses", "Draws", "Average Points Per Game", "Highest Game Turnover", "Average Points Per Trick", "Highest Trick Turnover"]
+
+    # Loop through each player group size
+    for group_size in range(2, max_players+1):
+
+        # Create a new table
+        table = PrettyTable()
+
+        # Set the table headers
+        table.field_names = headers
+
+        # Sort the result values by wins
+        sorted_results = sorted(results[group_size].values(), key=lambda x: x["wins"], reverse=True)
+        results[group_size] = sorted_results
+
+        # Loop through each player type and corresponding results
+        for player_results in sorted_results:
+
+            # Add a row to the table with the results
+            table.add_row([player_results["type"], player_results["wins"], player_results["losses"], player_results["draws"], player_results["average_points_per_game"], player_results["highest_game_turnover"], player_results["average_points_per_trick"], player_results["highest_trick_turnover"]])
+            table.align = "l"
+
+        # Print the table
+        print(f"Results for {group_size} players:")
+        print(table)
+        print()
+
+    # Save the results for each groupsize to a file with datetime as name
+    filename = f"analysis_results_{datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
+
+    with open(filename, "w") as f:
+        json.dump(results, f, indent=4)
 
-with open(filename, "w") as f:
-    json.dump(results, f, indent=4)
+    print(f"Analysis completed in {end-start}. Results saved to {filename}.")
 
-print(f"Analysis completed in {end-start}. Results saved to {filename}.")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import json
+import sys
+from prettytable import PrettyTable
+from benchmarks.suite import run, compare, LATENCY_AGENTS
+
+
+def print_results(results: dict):
+    table = PrettyTable()
+    table.field_names = ["Players", "Games / s", "Tricks / s", "Batch Games / s", "Batch Tricks / s"]
+    for player_count, throughput in results["throughput"].items():
+        batch = results["batch_throughput"][player_count]
+        table.add_row(
+            [
+                player_count,
+                f"{throughput['games_per_second']:.1f}",
+                f"{throughput['tricks_per_second']:.1f}",
+                f"{batch['games_per_second']:.1f}",
+                f"{batch['tricks_per_second']:.1f}",
+            ]
+        )
+    table.align = "l"
+    print("Throughput:")
+    print(table)
+
+    table = PrettyTable()
+    table.field_names = ["Agent", "Decisions", "Mean (us)", "p50 (us)", "p90 (us)", "p99 (us)", "Max (us)"]
+    for player_type, latency in results["latency"].items():
+        table.add_row(
+            [player_type, latency["decisions"]]
+            + [f"{latency[key]:.1f}" for key in ("mean_us", "p50_us", "p90_us", "p99_us", "max_us")]
+        )
+    table.align = "l"
+    print("Decision latency:")
+    print(table)
+
+    table = PrettyTable()
+    table.field_names = ["Operation", "Time (ns)"]
+    for operation, time in results["micro"].items():
+        table.add_row([operation, f"{time:.1f}"])
+    table.align = "l"
+    print("Micro-benchmarks:")
+    print(table)
+
+    if results["peak_rss_kb"] is not None:
+        print(f"Peak RSS: {results['peak_rss_kb']} kB")
+
+
+def print_comparison(rows: list):
+    table = PrettyTable()
+    table.field_names = ["Metric", "Baseline", "Current", "Change", ""]
+    for metric, old, new, change, regressed in rows:
+        table.add_row([metric, f"{old:.1f}", f"{new:.1f}", f"{change:+.1%}", "REGRESSION" if regressed else ""])
+    table.align = "l"
+    print("Comparison with baseline:")
+    print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='BASIS benchmark suite')
+
+    parser.add_argument('--seconds', type=float, default=1.0, help='Time spent on each throughput and latency measurement')
+    parser.add_argument('--players', type=int, nargs='+', default=list(range(2, 7)), help='Player counts to measure throughput for')
+    parser.add_argument('--agents', nargs='+', default=LATENCY_AGENTS, choices=LATENCY_AGENTS, help='Agents to measure decision latency for')
+    parser.add_argument('--output', default=None, help='Save the results to a JSON file, to be used as a baseline')
+    parser.add_argument('--baseline', default=None, help='Compare the results with a baseline JSON file, exiting with status 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='Relative slowdown tolerated before a metric counts as a regression')
+
+    args = parser.parse_args()
+
+    if any(player_count < 2 or player_count > 6 for player_count in args.players):
+        print('Invalid argument. --players takes player counts between 2 and 6.')
+        sys.exit(1)
+
+    results = run(seconds=args.seconds, player_counts=args.players, latency_agents=args.agents)
+    print()
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            rows = compare(json.load(f), results, args.tolerance)
+
+        print_comparison(rows)
+        if any(regressed for *_, regressed in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+import logging
+import platform
+import sys
+import timeit
+from datetime import datetime
+from time import perf_counter, perf_counter_ns
+import numpy as np
+from engine import players as agents
+from engine.batch import BatchGame, BATCH_AGENTS
+from engine.game import Game, Trick
+from engine.structures import Deck, CardSet, CARDS, Suit
+from utils.seeding import game_rng, batch_rng
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Agents seated at the table, in order, when measuring throughput for a given number of players
+THROUGHPUT_AGENTS = [
+    "SimpleGreedyAgent",
+    "MinimizePointLossGreedyAgent",
+    "MPLGreedyTrumpSaveAgent",
+    "MPLGreedyTrumpBasedAgent",
+    "GreedyCountingAgent",
+    "RandomAgent",
+]
+
+# Agents whose decision latency is measured, each playing against a SimpleGreedyAgent
+LATENCY_AGENTS = [
+    "RandomAgent",
+    "SimpleGreedyAgent",
+    "MinimizePointLossGreedyAgent",
+    "MPLGreedyTrumpSaveAgent",
+    "MPLGreedyTrumpBasedAgent",
+    "GreedyCountingAgent",
+    "ISMCTSAgent",
+]
+
+PERCENTILES = (50, 90, 99)
+
+# Games per batch when measuring the batch engine
+BATCH_GAMES = 10000
+
+
+def play(player_types: list, seed, index: int) -> Game:
+    """
+    Plays a seeded headless game between fresh agents of the given types, returning the finished game.
+    """
+    rng = game_rng(seed, index)
+    game = Game(log_level=logging.ERROR, rng=rng, headless=True)
+    for i, player_type in enumerate(player_types):
+        game.add_player(getattr(agents, player_type)(f"Player {i + 1}", rng=rng))
+
+    game.start_match()
+    while not game.is_over():
+        game.next_round()
+
+    return game
+
+
+def measure_throughput(player_count: int, seconds: float, seed=0) -> dict:
+    """
+    Plays games between player_count agents for about the given number of seconds, returning games and tricks per second.
+    """
+    player_types = THROUGHPUT_AGENTS[:player_count]
+    games = tricks = 0
+
+    start = perf_counter()
+    while True:
+        tricks += len(play(player_types, seed, games).tricks)
+        games += 1
+        elapsed = perf_counter() - start
+        if elapsed >= seconds:
+            break
+
+    return {
+        "agents": player_types,
+        "games": games,
+        "games_per_second": games / elapsed,
+        "tricks_per_second": tricks / elapsed,
+    }
+
+
+def measure_batch_throughput(player_count: int, seconds: float, seed=0) -> dict:
+    """
+    Plays batches of games between stateless agents with the batch engine, returning games and tricks per second.
+    """
+    player_types = [BATCH_AGENTS[(1 + i) % len(BATCH_AGENTS)] for i in range(player_count)]
+    games = tricks = 0
+
+    start = perf_counter()
+    while True:
+        batch = BatchGame(player_types, BATCH_GAMES, rng=batch_rng(seed, games)).play()
+        games += BATCH_GAMES
+        tricks += batch.trick_winners.size
+        elapsed = perf_counter() - start
+        if elapsed >= seconds:
+            break
+
+    return {
+        "agents": player_types,
+        "games": games,
+        "games_per_second": games / elapsed,
+        "tricks_per_second": tricks / elapsed,
+    }
+
+
+def measure_latency(player_type: str, seconds: float, seed=0) -> dict:
+    """
+    Times every decision of an agent playing against a SimpleGreedyAgent for about the given number of seconds,
+    returning latency percentiles in microseconds.
+    """
+    latencies = []
+
+    def timed(action):
+        def wrapper(world):
+            start = perf_counter_ns()
+            card = action(world)
+            latencies.append(perf_counter_ns() - start)
+            return card
+
+        return wrapper
+
+    games = 0
+    start = perf_counter()
+    while True:
+        rng = game_rng(seed, games)
+        game = Game(log_level=logging.ERROR, rng=rng, headless=True)
+        player = getattr(agents, player_type)("Player 1", rng=rng)
+        player.action = timed(player.action)
+        game.add_player(player)
+        game.add_player(agents.SimpleGreedyAgent("Player 2", rng=rng))
+
+        game.start_match()
+        while not game.is_over():
+            game.next_round()
+
+        games += 1
+        if perf_counter() - start >= seconds:
+            break
+
+    latencies = np.array(latencies) / 1000
+    result = {"decisions": len(latencies), "mean_us": float(latencies.mean())}
+    for percentile in PERCENTILES:
+        result[f"p{percentile}_us"] = float(np.percentile(latencies, percentile))
+    result["max_us"] = float(latencies.max())
+
+    return result
+
+
+def _per_call_ns(statement, setup=None) -> float:
+    """
+    Returns the best time of a callable, in nanoseconds per call, over a few timing runs.
+    """
+    timer = timeit.Timer(statement, setup=setup or "pass")
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e9
+
+
+def measure_micro() -> dict:
+    """
+    Times the engine's hottest operations, in nanoseconds per call.
+    """
+    deck = Deck()
+
+    def draw_deck():
+        deck.reset()
+        while deck.draw_card():
+            pass
+
+    tricks = {}
+    for player_count in (2, 4):
+        trick = Trick()
+        for i in range(player_count):
+            trick.add_play(None, CARDS[(i * 13) % len(CARDS)])
+        trick.set_starting_suit(trick.cards[0].suit)
+        tricks[player_count] = trick
+
+    hand = CardSet(CARDS[:3])
+    other = CardSet(CARDS[10:20])
+
+    return {
+        "deck_reset_ns": _per_call_ns(deck.reset),
+        "deck_draw_all_ns": _per_call_ns(draw_deck),
+        "trick_calc_winner_2p_ns": _per_call_ns(lambda: tricks[2].calc_winner(Suit.HEARTS)),
+        "trick_calc_winner_4p_ns": _per_call_ns(lambda: tricks[4].calc_winner(Suit.HEARTS)),
+        "cardset_points_ns": _per_call_ns(other.points),
+        "cardset_union_ns": _per_call_ns(lambda: hand | other),
+    }
+
+
+def peak_rss_kb():
+    """
+    Returns the peak resident set size of the process, in kilobytes, or None where it can't be measured.
+    """
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS, in kilobytes elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run(seconds: float = 1.0, player_counts=range(2, 7), latency_agents=LATENCY_AGENTS, display=True) -> dict:
+    """
+    Runs the whole suite, returning its results as a JSON-serializable dictionary.
+    """
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seconds": seconds,
+        },
+        "throughput": {},
+        "batch_throughput": {},
+        "latency": {},
+    }
+
+    for player_count in player_counts:
+        if display:
+            print(f"Throughput with {player_count} players...".ljust(60), end="\r")
+        results["throughput"][str(player_count)] = measure_throughput(player_count, seconds)
+        results["batch_throughput"][str(player_count)] = measure_batch_throughput(player_count, seconds)
+
+    for player_type in latency_agents:
+        if display:
+            print(f"Decision latency of {player_type}...".ljust(60), end="\r")
+        results["latency"][player_type] = measure_latency(player_type, seconds)
+
+    if display:
+        print("Micro-benchmarks...".ljust(60), end="\r")
+    results["micro"] = measure_micro()
+    results["peak_rss_kb"] = peak_rss_kb()
+
+    return results
+
+
+def flatten(results: dict) -> dict:
+    """
+    Flattens the numeric metrics of a results dictionary into dotted names, leaving out metadata and counts.
+    """
+    metrics = {}
+
+    def visit(prefix, value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                visit(f"{prefix}.{key}" if prefix else key, item)
+        elif isinstance(value, float) or prefix == "peak_rss_kb" and value is not None:
+            metrics[prefix] = value
+
+    for key, value in results.items():
+        if key != "meta":
+            visit(key, value)
+
+    return metrics
+
+
+def compare(baseline: dict, results: dict, tolerance: float) -> list:
+    """
+    Compares results with a baseline, returning (metric, baseline, current, change, regressed) rows.
+    Rates are better higher and every other metric better lower; a metric regressed if it got worse by more than the
+    tolerance, as a fraction of its baseline. Maximum latencies are single outliers, so they are reported but never
+    count as regressions.
+    """
+    before, after = flatten(baseline), flatten(results)
+    rows = []
+
+    for metric, old in before.items():
+        new = after.get(metric)
+        if new is None or not old:
+            continue
+
+        change = (new - old) / old
+        worse = -change if metric.endswith("_per_second") else change
+        rows.append((metric, old, new, change, worse > tolerance and not metric.endswith("max_us")))
+
+    return rows
@@ -0,0 +1,288 @@
+import logging
+import numpy as np
+from engine import players as agents
+from engine.game import Game, MIN_PLAYERS, CARDS_PER_PLAYER
+from engine.structures import (
+    BEATS,
+    COMPARE,
+    CARD_RANK,
+    CARD_SUIT,
+    CARD_POINTS,
+    CARD_COUNT,
+    CARDS,
+    Rank,
+)
+from utils.results import OUTCOME_WIN, OUTCOME_DRAW, OUTCOME_LOSS
+
+MAX_PLAYERS = 6
+
+# Agents whose decisions only depend on their hand and the table, which the batch engine can play
+BATCH_AGENTS = (
+    "RandomAgent",
+    "SimpleGreedyAgent",
+    "MinimizePointLossGreedyAgent",
+    "MPLGreedyTrumpSaveAgent",
+    "MPLGreedyTrumpBasedAgent",
+)
+RANDOM, SIMPLE_GREEDY, MINIMIZE_POINT_LOSS, MPL_TRUMP_SAVE, MPL_TRUMP_BASED = range(len(BATCH_AGENTS))
+
+# Card lookup tables as arrays, indexed by card id
+_RANK = np.array(CARD_RANK, dtype=np.int16)
+_SUIT = np.array(CARD_SUIT, dtype=np.intp)
+_POINTS = np.array(CARD_POINTS, dtype=np.int16)
+_IS_TWO = _RANK == Rank.TWO
+_BEATS = np.array(BEATS, dtype=bool)
+_COMPARE = np.array(COMPARE, dtype=np.int8)
+
+
+class BatchGame:
+    """
+    Plays a batch of games in lockstep, holding every game's state in NumPy arrays and resolving deals, plays and trick
+    winners as vectorized operations across the whole batch.
+    Only stateless agents (see BATCH_AGENTS) can take part, as their decisions are reimplemented as array operations.
+
+    All games of a batch share the same agent types, but each has its own deck order and seating:
+    seating[game, seat] is the index, in player_types, of the player sitting at that seat.
+    """
+
+    def __init__(self, player_types: list, games: int, rng: np.random.Generator = None, seating=None, decks=None):
+        for player_type in player_types:
+            if player_type not in BATCH_AGENTS:
+                raise ValueError(
+                    f"{player_type} can't be played by the batch engine. Available agents are: {', '.join(BATCH_AGENTS)}."
+                )
+
+        if not MIN_PLAYERS <= len(player_types) <= MAX_PLAYERS:
+            raise ValueError(f"Batch games take between {MIN_PLAYERS} and {MAX_PLAYERS} players.")
+
+        self.player_types = list(player_types)
+        self.games = games
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        player_count = len(player_types)
+        self.seating = (
+            np.asarray(seating)
+            if seating is not None
+            else np.argsort(self.rng.random((games, player_count)), axis=1)
+        )
+        # Deck order of each game, cards being drawn from the end as in Deck.draw_card
+        self.decks = (
+            np.asarray(decks)
+            if decks is not None
+            else np.argsort(self.rng.random((games, CARD_COUNT)), axis=1)
+        )
+
+        # Results, filled in by play()
+        self.points = None  # Points per seat, (games, players)
+        self.tricks = None  # Tricks won per seat, (games, players)
+        self.outcomes = None  # Outcome code per seat, (games, players)
+        self.plays = None  # Cards in play order, (games, tricks, players)
+        self.leaders = None  # Seat playing first in each trick, (games, tricks)
+        self.trick_points = None  # (games, tricks)
+        self.trick_winners = None  # Seat winning each trick, (games, tricks)
+
+    def play(self):
+        """
+        Plays every game of the batch to the end.
+        """
+        game_count, player_count = self.games, len(self.player_types)
+        games = np.arange(game_count)
+        agent_codes = np.array([BATCH_AGENTS.index(player_type) for player_type in self.player_types])
+        seat_agents = agent_codes[self.seating]
+
+        decks = self.decks
+        # According to Bisca rules, the 2s are removed from the deck in 3-player and 6-player games
+        if player_count in (3, 6):
+            decks = decks[~_IS_TWO[decks]].reshape(game_count, -1)
+
+        # The first card drawn is the trump card, which is dealt last
+        stream = decks[:, ::-1]
+        trump = _SUIT[stream[:, 0]]
+        draws = np.concatenate([stream[:, 1:], stream[:, :1]], axis=1)
+        deck_size = draws.shape[1]
+        trick_count = deck_size // player_count
+
+        # Hands keep cards in the order they were dealt, as agents break ties by hand order
+        hands = np.full((game_count, player_count, CARDS_PER_PLAYER), -1, dtype=np.intp)
+        points = np.zeros((game_count, player_count), dtype=np.int16)
+        tricks = np.zeros((game_count, player_count), dtype=np.int16)
+        self.plays = np.empty((game_count, trick_count, player_count), dtype=np.int8)
+        self.leaders = np.empty((game_count, trick_count), dtype=np.int8)
+        self.trick_points = np.empty((game_count, trick_count), dtype=np.int16)
+        self.trick_winners = np.empty((game_count, trick_count), dtype=np.int8)
+
+        # Every game deals, plays and tops up hands at the same time, so hand sizes are shared by the whole batch
+        drawn = 0
+        for slot in range(CARDS_PER_PLAYER):
+            hands[:, :, slot] = draws[:, drawn:drawn + player_count]
+            drawn += player_count
+        hand_size = CARDS_PER_PLAYER
+        leader = np.zeros(game_count, dtype=np.intp)
+
+        for trick in range(trick_count):
+            self.leaders[:, trick] = leader
+            trick_points = np.zeros(game_count, dtype=np.int16)
+
+            for turn in range(player_count):
+                seat = (leader + turn) % player_count
+                hand = hands[games, seat, :hand_size]
+
+                if turn == 0:
+                    slot = self._decide(seat_agents[games, seat], hand, trump)
+                else:
+                    slot = self._decide(seat_agents[games, seat], hand, trump, lead_suit, lead_card)
+                card = hand[games, slot]
+
+                # Consuming the card, shifting the following ones to keep the hand's order
+                remaining = np.arange(hand_size - 1)
+                kept = remaining[None, :] + (remaining[None, :] >= slot[:, None])
+                hands[games, seat, : hand_size - 1] = np.take_along_axis(hand, kept, axis=1)
+                hands[games, seat, hand_size - 1] = -1
+
+                if turn == 0:
+                    lead_suit = _SUIT[card]
+                    lead_card = card  # The leading card, as seen by agents through Player.leading_card
+                    winning_card = card
+                    winner = seat
+                else:
+                    lead_card = np.where(_COMPARE[lead_suit, trump, lead_card, card] == -1, card, lead_card)
+                    beats = _BEATS[lead_suit, trump, card, winning_card]
+                    winning_card = np.where(beats, card, winning_card)
+                    winner = np.where(beats, seat, winner)
+
+                trick_points += _POINTS[card]
+                self.plays[:, trick, turn] = card
+
+            points[games, winner] += trick_points
+            tricks[games, winner] += 1
+            self.trick_points[:, trick] = trick_points
+            self.trick_winners[:, trick] = winner
+            leader = winner
+
+            # Topping up hands, starting with the winner
+            if drawn < deck_size:
+                for i in range(player_count):
+                    hands[games, (leader + i) % player_count, hand_size - 1] = draws[:, drawn]
+                    drawn += 1
+            else:
+                hand_size -= 1
+
+        best = points.max(axis=1, keepdims=True)
+        is_best = points == best
+        is_draw = is_best.sum(axis=1, keepdims=True) > 1
+
+        self.points = points
+        self.tricks = tricks
+        self.outcomes = np.where(is_best, np.where(is_draw, OUTCOME_DRAW, OUTCOME_WIN), OUTCOME_LOSS).astype(np.int8)
+
+        return self
+
+    def _pick(self, mask: np.ndarray) -> np.ndarray:
+        """
+        Picks a slot uniformly at random among the allowed ones of each game.
+        """
+        draws = np.where(mask, self.rng.random(mask.shape), -1.0)
+        return draws.argmax(axis=1)
+
+    def _decide(self, codes, hand, trump, lead_suit=None, lead_card=None) -> np.ndarray:
+        """
+        Returns the slot of the card each game's current player picks, evaluating every agent's policy across the batch.
+        Mirrors the action methods in engine/players.py, including their tie-breaking.
+        """
+        rank = _RANK[hand]
+        is_trump = _SUIT[hand] == trump[:, None]
+        highest = rank == rank.max(axis=1, keepdims=True)
+        anything = np.ones_like(highest)
+
+        # Playing first, all greedy agents play one of their highest cards, the trump-based one preferring trumps
+        if lead_suit is None:
+            trump_rank = np.where(is_trump, rank, -1)
+            highest_trump = is_trump & (trump_rank == trump_rank.max(axis=1, keepdims=True))
+            trump_based = np.where(is_trump.any(axis=1, keepdims=True), highest_trump, highest)
+
+            masks = np.stack([anything, highest, highest, highest, trump_based])
+            return self._pick(masks[codes, np.arange(len(codes))])
+
+        # Otherwise, the greedy agents value each card on whether it beats the leading card, the first best card being played
+        points = _POINTS[hand]
+        beat = _COMPARE[lead_suit[:, None], trump[:, None], hand, lead_card[:, None]] == 1
+        loss = -10 - 2 * points
+
+        minimize_point_loss = np.where(beat, 10 + 2 * points + 5 * is_trump, loss - 5 * is_trump).argmax(axis=1)
+        trump_save = np.where(beat, 15 + points - 15 * is_trump, loss - 5 * is_trump).argmax(axis=1)
+        trump_based = np.where(beat, 15 + points + 100 * is_trump, loss - 100 * is_trump).argmax(axis=1)
+
+        return np.choose(
+            codes,
+            [
+                self._pick(anything),
+                self._pick(highest),
+                minimize_point_loss,
+                trump_save,
+                trump_based,
+            ],
+        )
+
+    def record(self, stats, players: list):
+        """
+        Records the results of every game in a stats recorder, players being given in the same order as player_types.
+        """
+        stats.add_batch_results(
+            players, self.seating, self.points, self.outcomes, self.tricks, self.trick_points, self.trick_winners
+        )
+
+
+class _ScriptedChoice:
+    """
+    Stands in for an agent's random number generator, answering each choice with the card the batch engine played.
+    """
+
+    def __init__(self, cards: list):
+        self.cards = iter(cards)
+
+    def choice(self, options):
+        card = next(self.cards)
+        assert card in options, f"The batch engine played {card}, the scalar agent would pick one of {options}"
+        return card
+
+
+def validate(player_types: list, games: int, seed=None) -> int:
+    """
+    Validates the batch engine against the scalar one: every game of a seeded batch is replayed on Game, with the same
+    deck and seating, each scalar agent being asked to confirm the batch engine's decision is one it could have made.
+    Both engines must then agree on every trick's winner and on each player's points.
+    Returns the number of games checked, raising an AssertionError on the first mismatch.
+    """
+    batch = BatchGame(player_types, games, rng=np.random.default_rng(seed)).play()
+    player_count = len(player_types)
+
+    for game_index in range(games):
+        plays = batch.plays[game_index]
+        leaders = batch.leaders[game_index]
+
+        # Cards played by each seat, in order
+        seat_cards = [[] for _ in range(player_count)]
+        for trick, leader in enumerate(leaders):
+            for turn in range(player_count):
+                seat_cards[(leader + turn) % player_count].append(CARDS[plays[trick, turn]])
+
+        game = Game(log_level=logging.ERROR, headless=True)
+        game.deck.cards = [CARDS[card_id] for card_id in batch.decks[game_index]]
+
+        for seat in range(player_count):
+            player_type = player_types[batch.seating[game_index, seat]]
+            player = getattr(agents, player_type)(f"Seat {seat}", rng=_ScriptedChoice(seat_cards[seat]))
+            game.add_player(player)
+
+        game.start_match()
+        while not game.is_over():
+            game.next_round()
+
+        players = game.player_pool.players
+        winners = [players.index(trick.get_winner()) for trick in game.tricks]
+        assert winners == batch.trick_winners[game_index].tolist(), f"Trick winners differ in game {game_index}"
+        assert [player.get_points() for player in players] == batch.points[game_index].tolist(), (
+            f"Points differ in game {game_index}"
+        )
+
+    return games
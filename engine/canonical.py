@@ -0,0 +1,148 @@
+from itertools import permutations, product
+from typing import NamedTuple
+from engine.structures import CARDS, CARD_COUNT, CARD_SUIT, RANKS_PER_SUIT, Suit
+
+SUITS = tuple(Suit)
+SUIT_COUNT = len(SUITS)
+SUIT_MASK = (1 << RANKS_PER_SUIT) - 1  # Mask of the cards of the first suit, the others being shifted by a suit each
+
+# Every permutation of the suits, with the card each card is mapped to, and the index of its inverse
+PERMUTATIONS = tuple(permutations(range(SUIT_COUNT)))
+PERMUTATION_INDEX = {permutation: index for index, permutation in enumerate(PERMUTATIONS)}
+CARD_MAPS = tuple(
+    tuple(CARDS[permutation[CARD_SUIT[card]] * RANKS_PER_SUIT + card % RANKS_PER_SUIT] for card in range(CARD_COUNT))
+    for permutation in PERMUTATIONS
+)
+INVERSES = tuple(
+    PERMUTATION_INDEX[tuple(permutation.index(suit) for suit in range(SUIT_COUNT))] for permutation in PERMUTATIONS
+)
+
+# The index of each permutation, by the original suit it maps to each canonical suit in turn
+ORDER_INDEX = {tuple(permutation.index(suit) for suit in range(SUIT_COUNT)): index for index, permutation in enumerate(PERMUTATIONS)}
+
+
+class Canonical(NamedTuple):
+    """
+    The canonical form of a position, along with the index of the suit permutation mapping the original cards to it.
+    Suits play the same role in canonical forms of equivalent positions, the trump suit, if any, becoming the first,
+    and the lead suit the next.
+    """
+
+    hand: list
+    table: list
+    lead_suit: Suit
+    trump_suit: Suit
+    unseen: int  # Mask of the cards not seen yet
+    permutation: int
+
+    def to_canonical(self, cards) -> list:
+        """
+        Maps cards of the original position to the canonical one.
+        """
+        mapping = CARD_MAPS[self.permutation]
+        return [mapping[card.id] for card in cards]
+
+    def to_original(self, cards) -> list:
+        """
+        Maps cards of the canonical position, e.g. a decision, back to the original one.
+        """
+        mapping = CARD_MAPS[INVERSES[self.permutation]]
+        return [mapping[card.id] for card in cards]
+
+
+def permute_mask(mask: int, permutation: tuple) -> int:
+    """
+    Maps a mask of cards through a permutation of the suits, moving each suit's block of bits.
+    """
+    permuted = 0
+    for suit, target in enumerate(permutation):
+        permuted |= (mask >> suit * RANKS_PER_SUIT & SUIT_MASK) << target * RANKS_PER_SUIT
+    return permuted
+
+
+def _order_index(trump: int, lead: int, suits, unseen: int = 0) -> int:
+    """
+    Returns the index of the canonical permutation, given the indices of the trump and lead suits (None if there are
+    none), the suits of the cards of the hand and the table, in order, and the unseen cards.
+    """
+    order = []
+    if trump is not None:
+        order.append(trump)
+    if lead is not None and lead not in order:
+        order.append(lead)
+    for suit in suits:
+        if suit not in order:
+            order.append(suit)
+
+    if len(order) < SUIT_COUNT:
+        left = [suit for suit in range(SUIT_COUNT) if suit not in order]
+        if unseen:
+            left.sort(key=lambda suit: unseen >> suit * RANKS_PER_SUIT & SUIT_MASK, reverse=True)
+        order += left
+
+    return ORDER_INDEX[tuple(order)]
+
+
+# Positions with no unseen cards and up to FAST_CARDS cards in hand and on the table, like the positions the decision
+# cache keys, have their permutation looked up in ORDER_TABLE. It is indexed by a base-5 number made of the trump
+# suit, the lead suit and the suit of each card, NO_SUIT standing for none.
+FAST_CARDS = 4
+NO_SUIT = SUIT_COUNT
+ORDER_TABLE = tuple(
+    _order_index(
+        None if trump == NO_SUIT else trump,
+        None if lead == NO_SUIT else lead,
+        [suit for suit in suits if suit != NO_SUIT],
+    )
+    for trump, lead, *suits in product(range(SUIT_COUNT + 1), repeat=2 + FAST_CARDS)
+)
+PADDING = tuple(((SUIT_COUNT + 1) ** count, (SUIT_COUNT + 1) ** count - 1) for count in range(FAST_CARDS + 1))
+
+
+def canonical_permutation(hand: list, table: list = (), lead_suit: Suit = None, trump_suit: Suit = None, unseen: int = 0) -> int:
+    """
+    Returns the index of the permutation of the suits mapping a position to its canonical form (see canonicalize).
+
+    Suits are ordered by their role: the trump suit first, if any, then the lead suit, if any, then the other suits
+    in the order they first appear in the hand and the table, and the suits left by their unseen cards. Only suits
+    which don't appear anywhere and have the same unseen cards tie, and those are interchangeable.
+    """
+    count = len(hand) + len(table)
+    if unseen or count > FAST_CARDS:
+        suits = [CARD_SUIT[card.id] for card in hand] + [CARD_SUIT[card.id] for card in table]
+        return _order_index(
+            trump_suit.index if trump_suit is not None else None,
+            lead_suit.index if lead_suit is not None else None,
+            suits,
+            unseen,
+        )
+
+    code = (trump_suit.index if trump_suit is not None else NO_SUIT) * (SUIT_COUNT + 1) + (
+        lead_suit.index if lead_suit is not None else NO_SUIT
+    )
+    for card in hand:
+        code = code * (SUIT_COUNT + 1) + CARD_SUIT[card.id]
+    for card in table:
+        code = code * (SUIT_COUNT + 1) + CARD_SUIT[card.id]
+    scale, offset = PADDING[FAST_CARDS - count]
+    return ORDER_TABLE[code * scale + offset]
+
+
+def canonicalize(hand: list, table: list = (), lead_suit: Suit = None, trump_suit: Suit = None, unseen: int = 0) -> Canonical:
+    """
+    Maps a position to its canonical form, equal for every position which is the same up to a permutation of the
+    suits, so agents treating suits alike decide the same. Hand and table order is kept, as agents break ties by
+    position.
+    """
+    index = canonical_permutation(hand, table, lead_suit, trump_suit, unseen)
+    mapping = CARD_MAPS[index]
+    permutation = PERMUTATIONS[index]
+
+    return Canonical(
+        [mapping[card.id] for card in hand],
+        [mapping[card.id] for card in table],
+        SUITS[permutation[lead_suit.index]] if lead_suit is not None else None,
+        SUITS[0] if trump_suit is not None else None,
+        permute_mask(unseen, permutation) if unseen else 0,
+        index,
+    )
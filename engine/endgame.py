@@ -0,0 +1,116 @@
+from engine.structures import BEATS, CARDS, CARD_POINTS, CARD_SUIT, Card, CardSet, Suit
+
+# Bounds stored in the transposition table, as searches cut short by alpha-beta only bound a position's value
+EXACT, LOWER, UPPER = range(3)
+
+# Number of positions kept in the transposition table before it is cleared, about 144 bytes each. Endgames start from
+# hands of 3 cards, and all of a game's endgame searches take at most about 60 entries, so this only bounds larger searches
+MAX_TABLE_ENTRIES = 1 << 12
+
+
+def _points(mask: int) -> int:
+    """
+    Returns the points of the cards in a mask.
+    """
+    points = 0
+    while mask:
+        low = mask & -mask
+        points += CARD_POINTS[low.bit_length() - 1]
+        mask ^= low
+    return points
+
+
+class EndgameSolver:
+    """
+    Exact solver of two-player endgames, once the deck and the trump card are gone, where both hands are known.
+    Runs an alpha-beta search over the points the player to move can still win, memoizing positions in a transposition
+    table keyed by both hands, the card led in the trick in progress, if any, and the trump suit.
+    The table is kept until cleared, e.g. between games. Positions recurring across games are the last few cards, which
+    are cheaper to search again than to look up in a table holding every game's positions.
+    """
+
+    def __init__(self, max_entries: int = MAX_TABLE_ENTRIES):
+        self.table = {}
+        self.max_entries = max_entries
+
+    def clear(self):
+        self.table.clear()
+
+    def best_card(self, hand: CardSet, opponent: CardSet, trump: Suit, lead: Card = None):
+        """
+        Returns the card to play from hand, and the points it secures from here on, including the current trick's.
+        The lead is the card the opponent led in the current trick, if any.
+        """
+        trump_index = trump.index
+        lead_id = lead.id if lead is not None else -1
+        mover, other = hand.mask, opponent.mask
+
+        best, best_card = -1, None
+        m = mover
+        while m:
+            low = m & -m
+            m ^= low
+            value = self._play(mover, other, lead_id, trump_index, low, best, 1 << 10)
+            if value > best:
+                best, best_card = value, CARDS[low.bit_length() - 1]
+
+        return best_card, best
+
+    def solve(self, hand: CardSet, opponent: CardSet, trump: Suit, lead: Card = None) -> int:
+        """
+        Returns the points the player to move wins from here on with perfect play from both sides.
+        """
+        lead_id = lead.id if lead is not None else -1
+        return self._search(hand.mask, opponent.mask, lead_id, trump.index, -1, 1 << 10)
+
+    def _play(self, mover: int, other: int, lead: int, trump: int, low: int, alpha: int, beta: int) -> int:
+        """
+        Returns the points the player to move wins by playing the card of the given bit, searching within (alpha, beta).
+        """
+        card = low.bit_length() - 1
+        mover ^= low
+
+        # Leading the trick, the opponent is to move, and wins whatever the player to move doesn't
+        if lead < 0:
+            remaining = _points(mover | other) + CARD_POINTS[card]
+            return remaining - self._search(other, mover, card, trump, remaining - beta, remaining - alpha)
+
+        trick = CARD_POINTS[lead] + CARD_POINTS[card]
+
+        # Taking the trick, the player to move leads the next one
+        if BEATS[CARD_SUIT[lead]][trump][card][lead]:
+            return trick + self._search(mover, other, -1, trump, alpha - trick, beta - trick)
+
+        remaining = _points(mover | other)
+        return remaining - self._search(other, mover, -1, trump, remaining - beta, remaining - alpha)
+
+    def _search(self, mover: int, other: int, lead: int, trump: int, alpha: int, beta: int) -> int:
+        if not mover:
+            return 0
+
+        key = mover | other << 40 | (lead + 1) << 80 | trump << 86
+        entry = self.table.get(key)
+        if entry is not None:
+            value, bound = entry
+            if bound == EXACT or (bound == LOWER and value >= beta) or (bound == UPPER and value <= alpha):
+                return value
+
+        best = -1
+        floor = alpha
+        m = mover
+        while m:
+            low = m & -m
+            m ^= low
+            value = self._play(mover, other, lead, trump, low, floor, beta)
+            if value > best:
+                best = value
+                if best > floor:
+                    floor = best
+                    if floor >= beta:
+                        break
+
+        if len(self.table) >= self.max_entries:
+            self.table.clear()
+        self.table[key] = (best, UPPER if best <= alpha else LOWER if best >= beta else EXACT)
+
+        return best
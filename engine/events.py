@@ -0,0 +1,57 @@
+from typing import NamedTuple
+from engine.structures import Card, State
+
+
+class DealEvent(NamedTuple):
+    """
+    A card was dealt to a player. Only the receiving player should look at the card, unless it is the face-up trump card.
+    """
+
+    player: object
+    card: Card
+    is_trump_card: bool
+
+
+class PlayEvent(NamedTuple):
+    """
+    A player played a card into the current trick.
+    """
+
+    player: object
+    card: Card
+    trick: object
+
+
+class TrickEndEvent(NamedTuple):
+    """
+    A trick was won, and its cards added to the winner's pile.
+    """
+
+    trick: object
+    winner: object
+    winning_card: Card
+    points: int
+
+
+class GameEndEvent(NamedTuple):
+    """
+    The game is over. The winner is a tuple of players in case of a draw.
+    """
+
+    state: State
+    winner: object
+    points: dict  # Points per player
+
+
+class EventBus:
+    """
+    Holds the subscribers of each type of game event.
+    Subscriber lists are plain attributes, so the game can skip building events nobody listens to with a single check,
+    and otherwise calls each subscriber in a plain loop.
+    """
+
+    def __init__(self):
+        self.deal = []
+        self.play = []
+        self.trick_end = []
+        self.game_end = []
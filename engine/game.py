@@ -1,8 +1,12 @@
 from engine.players import Player
-from engine.structures import Pool, Deck, Suit, Card, State
+from engine.structures import Pool, Deck, Suit, Card, CardSet, State, BEATS, CARDS, RANK_MASKS, Rank
+from engine.state import GameState
+from engine.zobrist import STOCK, STOCK_HASH, DEAL_KEYS, PLAY_KEYS, WIN_KEYS, TO_MOVE_KEYS, TRUMP_KEYS, card_hash
+from engine.events import EventBus, DealEvent, PlayEvent, TrickEndEvent, GameEndEvent
 from utils.stats import StatsRecorder
+from utils.results import OUTCOME_WIN, OUTCOME_DRAW, OUTCOME_LOSS
 from utils.log import log
-from time import sleep
+from time import sleep, perf_counter_ns
 import logging
 
 # Constants
@@ -17,17 +21,21 @@ class Trick:
     """
     def __init__(self):
         self.plays = []  # List of tuples (player, card)
+        self.cards = []  # The cards of each play, kept alongside so they aren't rebuilt on every lookup
+        self.points = 0
         self.starting_suit = None
         self.winning_play = None
 
     def get_cards(self) -> list:
-        return [card for _, card in self.plays]
+        return self.cards
 
     def get_starting_suit(self) -> Suit:
         return self.starting_suit
 
     def add_play(self, player: Player, card: Card):
         self.plays.append((player, card))
+        self.cards.append(card)
+        self.points += card.points
 
     def get_winner(self) -> Player:
         return self.winning_play[0]
@@ -45,17 +53,12 @@ class Trick:
         This method must only be called when all players have played a card.
         """
         winner, winning_card = self.plays[0]
+        beats = BEATS[self.starting_suit.index][trump_suit.index]
 
         for player, card in self.plays:
-            # In case of a same-suit play, the highest rank wins
-            if card.suit == self.starting_suit and card.rank > winning_card.rank:
+            # A card of the starting suit of higher rank wins, as does a trump over any other suit or a lower trump
+            if beats[card.id][winning_card.id]:
                 winner, winning_card = player, card
-            # In case of a trump play
-            elif card.suit == trump_suit:
-                # If the winning play is not a trump play the trump card wins, regardless of rank.
-                # if the winning play is a trump play, the highest rank wins.
-                if winning_card.suit != trump_suit or card.rank > winning_card.rank:
-                    winner, winning_card = player, card
 
         self.set_winning_play((winner, winning_card))
 
@@ -65,6 +68,7 @@ class Trick:
 class Game:
     """
     Houses main game logic, including tricks and winning logic.
+    A headless game never sleeps nor logs, which is meant for simulations, and otherwise plays exactly the same.
     """
 
     def __init__(
@@ -72,49 +76,91 @@ class Game:
         stats_recorder: StatsRecorder = None,
         delay: int = ROUND_DELAY_SECONDS,
         log_level: int = logging.DEBUG,
+        rng=None,
+        headless: bool = False,
     ):
         global log
         self.state = State.INIT
         self.tricks = []
         self.current_trick = None
-        self.deck = Deck()  # The deck is shuffled at instantiation
+        self.rng = rng  # Shared with the deck, which falls back to an unseeded generator if None
+        self.deck = Deck(rng)  # The deck is shuffled at instantiation
         self.player_pool = Pool()
         self.next_player: Player
         self.trump_suit: Suit
         self.trump_card: Card
         self.stats_recorder = stats_recorder  # To be incremented mid-game
+        self.events = EventBus()  # Subscribers to cards dealt and played, tricks won and the game's end
         self.winner = None
         self.delay = delay
+        self.headless = headless
+        self.zobrist = STOCK_HASH ^ TO_MOVE_KEYS[0]  # Hash of the position, updated on every deal and play (see engine.zobrist)
         log.set_level(log_level)
 
-        log.info("New game instantiated")
+        # Decisions are only timed if the stats recorder asks for it, swapping in a timed turn so untimed games pay nothing
+        if stats_recorder is not None and stats_recorder.record_latency:
+            self.turn = self._timed_turn
+
+        if not headless:
+            log.info("New game instantiated")
 
     def add_player(self, player: Player):
-        # Reset player's hand and pile
-        player.hand = []
-        player.pile = []
+        # Reset player's hand, pile and any per-game state
+        player.reset()
         self.player_pool.add_player(player)
+        player.join(self)
+
+    def on_deal(self, callback):
+        """
+        Subscribes a callback to every card dealt, called with a DealEvent.
+        """
+        self.events.deal.append(callback)
+
+    def on_play(self, callback):
+        """
+        Subscribes a callback to every card played, called with a PlayEvent.
+        """
+        self.events.play.append(callback)
+
+    def on_trick_end(self, callback):
+        """
+        Subscribes a callback to the end of every trick, called with a TrickEndEvent.
+        """
+        self.events.trick_end.append(callback)
+
+    def on_game_end(self, callback):
+        """
+        Subscribes a callback to the end of the game, called with a GameEndEvent.
+        """
+        self.events.game_end.append(callback)
 
     def start_match(self):
         if len(self.player_pool) < MIN_PLAYERS:
             log.error("Not enough players to start a match")
             raise Exception("Not enough players to start a match")
 
+        headless = self.headless
+
         if len(self.player_pool) == 3 or len(self.player_pool) == 6:
             self.deck.rectify()
-            log.debug(
-                f"Rectifying deck as a {len(self.player_pool)}-player situation has been encountered."
-            )
+            self.zobrist ^= card_hash(STOCK, RANK_MASKS[Rank.TWO])
+            if not headless:
+                log.debug(
+                    f"Rectifying deck as a {len(self.player_pool)}-player situation has been encountered."
+                )
 
-        log.info("Starting match")
+        if not headless:
+            log.info("Starting match")
 
         # Drawing trump card
         self.trump_card = self.deck.draw_card()
         self.trump_suit = self.trump_card.suit
-        log.info(f"Trump card is {self.trump_card}")
+        self.zobrist ^= TRUMP_KEYS[self.trump_suit.index]
 
         # Deal cards to players
-        log.info("Dealing cards to players")
+        if not headless:
+            log.info(f"Trump card is {self.trump_card}")
+            log.info("Dealing cards to players")
         self.deal_cards(CARDS_PER_PLAYER)
 
         # Set state to RUNNING
@@ -124,31 +170,103 @@ class Game:
         """
         Deals num_cards to each player in the player pool.
         """
+        players = self.player_pool.players
+        player_count = len(players)
+        first = self.player_pool.current_player_index
+        deck = self.deck
+        headless = self.headless
+        subscribers = self.events.deal
 
         # Dealing cards to players in a round-robin fashion, starting with the current player which is the winner of the previous round
-        player_order = [
-            (self.player_pool.current_player_index + i) % len(self.player_pool)
-            for i in range(len(self.player_pool))
-        ]
-
         for _ in range(num_cards):
-            for player_idx in player_order:
-                card = self.deck.draw_card()
-                player = self.player_pool.players[player_idx]
+            for i in range(player_count):
+                seat = (first + i) % player_count
+                player = players[seat]
+                card = deck.draw_card()
 
                 if card:
                     player.add_to_hand(card)
-                    log.debug(f"Dealt {card} to {player.name}")
+                    self.zobrist ^= DEAL_KEYS[seat][card.id]
+                    if not headless:
+                        log.debug(f"Dealt {card} to {player.name}")
+                    if subscribers:
+                        event = DealEvent(player, card, False)
+                        for callback in subscribers:
+                            callback(event)
                 elif self.trump_card:
-                    player.add_to_hand(self.trump_card)
-                    log.debug(f"Dealt trump card {self.trump_card} to {player.name}")
+                    card = self.trump_card
+                    player.add_to_hand(card)
+                    self.zobrist ^= DEAL_KEYS[seat][card.id]
+                    if not headless:
+                        log.debug(f"Dealt trump card {card} to {player.name}")
                     self.trump_card = None
+                    if subscribers:
+                        event = DealEvent(player, card, True)
+                        for callback in subscribers:
+                            callback(event)
+
+    def export_state(self) -> GameState:
+        """
+        Returns a snapshot of the game as it stands, which can be played out cheaply, e.g. by search agents.
+        Seats follow the order in which players joined, and a trick in progress (while a player is deciding) is
+        included in the snapshot.
+        """
+        players = self.player_pool.players
+        trick = self.current_trick
+        in_progress = trick is not None and not (self.tricks and self.tricks[-1] is trick)
+
+        # The deck is drawn from its end, and the face-up trump card is dealt last
+        stock = tuple(card.id for card in reversed(self.deck.cards))
+        if self.trump_card is not None:
+            stock += (self.trump_card.id,)
+
+        return GameState(
+            len(players),
+            self.trump_suit.index,
+            stock,
+            0,
+            tuple(player.hand_set.mask for player in players),
+            tuple(player.pile.mask for player in players),
+            tuple(player.get_points() for player in players),
+            self.player_pool.current_player_index,
+            tuple(card.id for card in trick.cards) if in_progress else (),
+            self.zobrist,
+        )
+
+    def import_state(self, state: GameState):
+        """
+        Sets the game up from a snapshot taken between two tricks, for the players already seated, who keep any other
+        state of theirs. Hands are rebuilt in card id order, and the tricks played before the snapshot are not.
+        """
+        players = self.player_pool.players
+        if state.players != len(players):
+            raise ValueError(f"The state is for {state.players} players, but {len(players)} are seated")
+        if state.trick:
+            raise ValueError("Only states between two tricks can be imported")
+
+        remaining = state.stock[state.drawn :]
+        self.trump_suit = list(Suit)[state.trump]
+        self.trump_card = CARDS[remaining[-1]] if remaining else None
+        self.deck.cards = [CARDS[card] for card in reversed(remaining[:-1])]
+        self.deck.card_set = CardSet(self.deck.cards)
+
+        for player, hand, pile in zip(players, state.hands, state.piles):
+            player.hand = [card for card in CARDS if hand >> card.id & 1]
+            player.hand_set = CardSet(mask=hand)
+            player.pile = CardSet(mask=pile)
+
+        self.tricks = []
+        self.current_trick = None
+        self.player_pool.current_player_index = state.to_move
+        self.zobrist = state.zobrist
+        self.state = State.RUNNING
+        self.check_game_end()
 
     def turn(self) -> Card:
         """
         Executes a turn, returning the player and card played.
         """
-        player = self.player_pool.get_current_player()
+        player = self.player_pool.players[self.player_pool.current_player_index]
         card_played = player.action(self)
 
         # Consuming card from player's hand
@@ -156,40 +274,80 @@ class Game:
 
         return player, card_played
 
+    def _timed_turn(self) -> Card:
+        """
+        Executes a turn like turn, recording how long the player took to decide in the stats recorder.
+        """
+        players = self.player_pool.players
+        player = players[self.player_pool.current_player_index]
+
+        played = len(self.current_trick.cards)
+        phase = "first" if played == 0 else "last" if played == len(players) - 1 else "mid"
+
+        start = perf_counter_ns()
+        card_played = player.action(self)
+        self.stats_recorder.add_decision_latency(player, phase, perf_counter_ns() - start)
+
+        player.play(card_played)
+
+        return player, card_played
+
     def next_round(self):
         """
         Executes a round, which is a sequence of turns.
         """
         if self.state == State.RUNNING:
-            log.info(f"Starting trick number {len(self.tricks) + 1}")
+            headless = self.headless
 
-            for player in self.player_pool.get_players():
-                log.debug(f"{player.get_name()}'s hand: {player.get_hand()}")
+            if not headless:
+                log.info(f"Starting trick number {len(self.tricks) + 1}")
+
+                for player in self.player_pool.get_players():
+                    log.debug(f"{player.get_name()}'s hand: {player.get_hand()}")
 
             # Setup new round
             self.current_trick = Trick()
 
             # Draw first card, and setting its suit as the round's suit
             # Delay for readability
-            sleep(self.delay)
+            if not headless:
+                sleep(self.delay)
+
+            pool = self.player_pool
+            player_count = len(pool)
+            leader = pool.current_player_index
 
-            _, first_card = self.turn()
+            player, first_card = self.turn()
             self.current_trick.set_starting_suit(first_card.suit)
-            self.current_trick.add_play(self.player_pool.get_current_player(), first_card)
-            log.info(f"{self.player_pool.get_current_player()} played {first_card}")
+            self.current_trick.add_play(player, first_card)
+            self.zobrist ^= PLAY_KEYS[leader][0][first_card.id] ^ TO_MOVE_KEYS[leader] ^ TO_MOVE_KEYS[(leader + 1) % player_count]
+            if self.events.play:
+                event = PlayEvent(player, first_card, self.current_trick)
+                for callback in self.events.play:
+                    callback(event)
+            if not headless:
+                log.info(f"{player} played {first_card}")
 
             # Advance to next player
             self.player_pool.advance_player()
 
             # Execute turns for all other players
-            for _ in range(len(self.player_pool) - 1):
+            for position in range(1, player_count):
                 # Delay for readability
-                sleep(self.delay)
+                if not headless:
+                    sleep(self.delay)
 
                 # Adding current play to trick
                 player, card_played = self.turn()
                 self.current_trick.add_play(player, card_played)
-                log.info(f"{player.name} played {card_played}")
+                seat = pool.current_player_index
+                self.zobrist ^= PLAY_KEYS[seat][position][card_played.id] ^ TO_MOVE_KEYS[seat] ^ TO_MOVE_KEYS[(seat + 1) % player_count]
+                if self.events.play:
+                    event = PlayEvent(player, card_played, self.current_trick)
+                    for callback in self.events.play:
+                        callback(event)
+                if not headless:
+                    log.info(f"{player.name} played {card_played}")
 
                 self.player_pool.advance_player()
 
@@ -197,21 +355,32 @@ class Game:
 
             # Calculating winner, saving trick and setting next-round first player
             winner, winning_card = self.current_trick.calc_winner(self.trump_suit)
-            log.info(f"Round winner is {winner.name} with {winning_card}")
+            if not headless:
+                log.info(f"Round winner is {winner.name} with {winning_card}")
 
             self.player_pool.set_current_player(winner)
             winner.add_to_pile(self.current_trick.get_cards())
-            log.debug(f"{winner.name}'s pile: {winner.get_pile()}")
+
+            # Every player has played, so the turn goes back from the leader to the winner
+            winner_seat = pool.current_player_index
+            self.zobrist ^= TO_MOVE_KEYS[leader] ^ TO_MOVE_KEYS[winner_seat]
+            for position, card in enumerate(self.current_trick.cards):
+                self.zobrist ^= WIN_KEYS[winner_seat][position][card.id]
+            if not headless:
+                log.debug(f"{winner.name}'s pile: {winner.get_pile()}")
 
             # Record trick turnover for winner
             if self.stats_recorder:
-                self.stats_recorder.add_trick_points(
-                    winner,
-                    sum([card.points for card in self.current_trick.get_cards()]),
-                )
+                self.stats_recorder.add_trick_points(winner, self.current_trick.points)
+
+            if self.events.trick_end:
+                event = TrickEndEvent(self.current_trick, winner, winning_card, self.current_trick.points)
+                for callback in self.events.trick_end:
+                    callback(event)
 
             # Delay for readability
-            sleep(self.delay)
+            if not headless:
+                sleep(self.delay)
 
             # Topping up player hands
             self.deal_cards(1)
@@ -223,14 +392,12 @@ class Game:
         Checks if the game has ended, and if so, sets the game's state to OVER/DRAW and sets the winner(s).
         """
         # If the deck is empty and players have no more cards
-        if len(self.deck) == 0 and all(
-            [len(player.hand) == 0 for player in self.player_pool.players]
-        ):
+        if len(self.deck) == 0 and not any(player.hand for player in self.player_pool.players):
             # Asserting game winner
             points_per_player = {}
 
             for player in self.player_pool.players:
-                points_per_player[player] = sum([card.points for card in player.pile])
+                points_per_player[player] = player.get_points()
 
             # Checking the max score
             max_score = max(points_per_player.values())
@@ -248,42 +415,46 @@ class Game:
                     ]
                 )
 
-                log.info(f"Game ended in a draw between {self.winner}")
+                if not self.headless:
+                    log.info(f"Game ended in a draw between {self.winner}")
 
             else:
                 self.state = State.OVER
                 self.winner = max(points_per_player, key=points_per_player.get)
-                log.info(
-                    f"Game ended. Winner is {self.winner} with {points_per_player[self.winner]} points"
-                )
+                if not self.headless:
+                    log.info(
+                        f"Game ended. Winner is {self.winner} with {points_per_player[self.winner]} points"
+                    )
 
-            # Record stats, incrementing wins, losses and draws
+            # Record stats for all players at once: points, tricks won and whether each won, drew or lost
             if self.stats_recorder:
-                for player in self.player_pool.players:
-                    # Record points for this game
-                    self.stats_recorder.add_game_points(player, points_per_player[player])
-
-                    # In case it was a draw
-                    if self.state == State.DRAW:
-                        # Increment draw for each winner, as self.winner is a tuple
-                        if player in self.winner:
-                            self.stats_recorder.increment_draws(player)
-                        # Increment losses for each player that is not a winner
-                        else:
-                            self.stats_recorder.increment_losses(player)
-                    # In case it was not a draw
-                    if self.state == State.OVER:
-                        # Increment wins for the winner
-                        if player == self.winner:
-                            self.stats_recorder.increment_wins(player)
-                        # Increment losses for each player that is not the winner
-                        else:
-                            self.stats_recorder.increment_losses(player)
+                players = self.player_pool.players
+                tricks_won = [0] * len(players)
+                for trick in self.tricks:
+                    tricks_won[players.index(trick.get_winner())] += 1
+
+                if self.state == State.DRAW:
+                    outcomes = [OUTCOME_DRAW if player in self.winner else OUTCOME_LOSS for player in players]
+                else:
+                    outcomes = [OUTCOME_WIN if player == self.winner else OUTCOME_LOSS for player in players]
+
+                self.stats_recorder.add_game_result(
+                    players,
+                    [points_per_player[player] for player in players],
+                    outcomes,
+                    tricks_won,
+                )
+
+            if self.events.game_end:
+                event = GameEndEvent(self.state, self.winner, points_per_player)
+                for callback in self.events.game_end:
+                    callback(event)
 
             # Log a table of points per player
-            log.debug("Points per player:")
-            for player, points in points_per_player.items():
-                log.debug(f"{player.name}: {points}")
+            if not self.headless:
+                log.debug("Points per player:")
+                for player, points in points_per_player.items():
+                    log.debug(f"{player.name}: {points}")
 
     def is_over(self):
         """
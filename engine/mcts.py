@@ -0,0 +1,338 @@
+import math
+from time import perf_counter
+from engine.structures import BEATS, CARD_COUNT, CARD_POINTS, CARD_SUIT, FULL_MASK, RANK_MASKS, Rank
+
+# Exploration constant of UCB1, rewards lying between 0 and 1
+EXPLORATION = 0.7
+
+# Points in a whole deck, the 2s being worth none, used to scale rewards
+TOTAL_POINTS = sum(CARD_POINTS)
+
+# How many iterations are run between checks of the time budget
+TIME_CHECK_INTERVAL = 16
+
+
+def random_card(mask: int, rng) -> int:
+    """
+    Returns the id of a card picked uniformly at random from a non-empty mask.
+    """
+    # Scaling a float is much cheaper than randrange, and unbiased enough for a handful of cards
+    for _ in range(int(rng.random() * mask.bit_count())):
+        mask &= mask - 1
+    return (mask & -mask).bit_length() - 1
+
+
+class SearchState:
+    """
+    A compact game state for search, holding only small ints and preallocated lists, so it is cloned in place with
+    copy_from and played out without allocating.
+    Hands are card masks per seat, and the stock holds the ids of the cards left to draw, in order, the trump card last.
+    The ids of the cards the searching player can't see are kept in unseen, which determinizations shuffle in place.
+    """
+
+    __slots__ = (
+        "players",
+        "trump",
+        "hands",
+        "points",
+        "stock",
+        "stock_size",
+        "drawn",
+        "to_move",
+        "played",
+        "lead_suit",
+        "winning_card",
+        "winner",
+        "trick_points",
+        "unseen",
+    )
+
+    def __init__(self, players: int, trump: int):
+        self.players = players
+        self.trump = trump
+        self.hands = [0] * players
+        self.points = [0] * players
+        self.stock = [0] * CARD_COUNT
+        self.stock_size = 0
+        self.drawn = 0
+        self.to_move = 0
+        self.played = 0  # Cards played in the trick in progress
+        self.lead_suit = 0
+        self.winning_card = 0
+        self.winner = 0
+        self.trick_points = 0
+        self.unseen = []
+
+    def copy_from(self, other: "SearchState"):
+        self.hands[:] = other.hands
+        self.points[:] = other.points
+        self.stock[:] = other.stock
+        self.stock_size = other.stock_size
+        self.drawn = other.drawn
+        self.to_move = other.to_move
+        self.played = other.played
+        self.lead_suit = other.lead_suit
+        self.winning_card = other.winning_card
+        self.winner = other.winner
+        self.trick_points = other.trick_points
+
+    def is_over(self) -> bool:
+        # Hands are topped up together, so the game is over once the player to move has no cards left
+        return not self.hands[self.to_move]
+
+    def play(self, card: int):
+        """
+        Plays a card from the hand of the player to move, ending the trick and topping up hands after the last play.
+        """
+        seat = self.to_move
+        self.hands[seat] ^= 1 << card
+        self.trick_points += CARD_POINTS[card]
+
+        if self.played == 0:
+            self.lead_suit = CARD_SUIT[card]
+            self.winning_card = card
+            self.winner = seat
+        elif BEATS[self.lead_suit][self.trump][card][self.winning_card]:
+            self.winning_card = card
+            self.winner = seat
+
+        self.played += 1
+        if self.played < self.players:
+            self.to_move = (seat + 1) % self.players
+            return
+
+        winner = self.winner
+        self.points[winner] += self.trick_points
+        self.trick_points = 0
+        self.played = 0
+        self.to_move = winner
+
+        if self.drawn < self.stock_size:
+            for i in range(self.players):
+                self.hands[(winner + i) % self.players] |= 1 << self.stock[self.drawn]
+                self.drawn += 1
+
+
+class Node:
+    """
+    A node of an information-set search tree, reached by playing a card. Statistics are from the point of view of the
+    seat which played it, and availability counts how often the card could be played when its parent was visited.
+    """
+
+    __slots__ = ("card", "seat", "parent", "children", "expanded", "visits", "reward", "available")
+
+    def __init__(self, card: int = -1, seat: int = -1, parent: "Node" = None):
+        self.card = card
+        self.seat = seat
+        self.parent = parent
+        self.children = {}
+        self.expanded = 0  # Mask of the cards with a child
+        self.visits = 0
+        self.reward = 0.0
+        self.available = 1
+
+
+class InformationSetSearch:
+    """
+    Single-observer Information-Set Monte Carlo Tree Search.
+    Each iteration samples a determinization of the cards the searching player can't see, consistent with what is
+    public, and descends a single tree shared by every determinization, only considering the cards playable in it.
+    Games are then played out at random, and rewarded by the share of points each seat won.
+
+    Searches are bounded by a number of iterations, a time budget in seconds, or both, whichever runs out first. The
+    tree is reused from one decision to the next, following the cards played in between.
+    """
+
+    def __init__(self, iterations: int = None, time_budget: float = None):
+        if iterations is None and time_budget is None:
+            raise ValueError("A search needs a number of iterations, a time budget, or both.")
+
+        self.iterations = iterations
+        self.time_budget = time_budget
+        self.reset()
+
+    def reset(self):
+        self.root = None
+        self.history = []  # Cards played since the root's position
+        self.trump_deal = None  # The DealEvent of the face-up trump card, once dealt
+
+    def observe_deal(self, event):
+        if event.is_trump_card:
+            self.trump_deal = event
+
+    def observe_play(self, event):
+        if self.root is not None:
+            self.history.append(event.card.id)
+
+    def decide(self, world, player, rng):
+        """
+        Returns the card the player should play in the current position.
+        """
+        base, unseen, opponents = self._base_state(world, player)
+        seat = base.to_move
+        root = self._reuse_root()
+
+        state = SearchState(base.players, base.trump)
+        state.unseen = [card for card in range(CARD_COUNT) if unseen >> card & 1]
+        deadline = perf_counter() + self.time_budget if self.time_budget is not None else None
+        iterations = self.iterations
+
+        # Without a number of iterations, the search runs until the deadline
+        iteration = 0
+        while iterations is None or iteration < iterations:
+            if deadline is not None and iteration % TIME_CHECK_INTERVAL == 0 and perf_counter() > deadline:
+                break
+
+            state.copy_from(base)
+            self._determinize(state, opponents, rng)
+            self._iterate(root, state, rng)
+            iteration += 1
+
+        # Playing the most visited card, the first one in hand order on ties
+        hand = base.hands[seat]
+        best = max(
+            (child for child in root.children.values() if hand >> child.card & 1),
+            key=lambda child: child.visits,
+            default=None,
+        )
+        card = player.hand[0] if best is None else next(card for card in player.hand if card.id == best.card)
+
+        self.root = root
+        self.history = []
+        return card
+
+    def _reuse_root(self) -> Node:
+        """
+        Returns the node of the current position in the previous tree, or a fresh root if it isn't there.
+        """
+        node = self.root
+        for card in self.history:
+            if node is None:
+                break
+            node = node.children.get(card)
+
+        if node is None:
+            return Node()
+
+        node.parent = None
+        return node
+
+    def _base_state(self, world, player):
+        """
+        Builds the searching player's view of the game: the state with its own hand, the current trick and the points
+        won so far, the mask of cards it can't see, and for every other player its seat, the number of cards it holds
+        which can't be seen, and the mask of those which are known.
+        """
+        players = world.player_pool.players
+        player_count = len(players)
+        trick = world.current_trick
+
+        state = SearchState(player_count, world.trump_suit.index)
+        seen = 0
+        for seat, other in enumerate(players):
+            state.points[seat] = other.get_points()
+            seen |= other.pile.mask
+
+        # Replaying the trick in progress
+        first_seat = players.index(trick.plays[0][0]) if trick.plays else players.index(player)
+        state.to_move = first_seat
+        for other, card in trick.plays:
+            state.hands[state.to_move] |= 1 << card.id
+            seen |= 1 << card.id
+            state.play(card.id)
+
+        seat = players.index(player)
+        state.hands[seat] = player.hand_set.mask
+        seen |= player.hand_set.mask
+
+        # The face-up trump card is dealt last, in sight of everyone, so it stays in its receiver's hand until played
+        if world.trump_card is not None:
+            seen |= 1 << world.trump_card.id
+        known = {}
+        deal = self.trump_deal
+        if deal is not None and not seen >> deal.card.id & 1:
+            seen |= 1 << deal.card.id
+            known[players.index(deal.player)] = 1 << deal.card.id
+
+        in_play = FULL_MASK
+        if player_count in (3, 6):
+            in_play &= ~RANK_MASKS[Rank.TWO]
+        unseen = in_play & ~seen
+
+        state.stock_size = len(world.deck) + (world.trump_card is not None)
+        if world.trump_card is not None:
+            state.stock[state.stock_size - 1] = world.trump_card.id
+
+        opponents = []
+        for other_seat, other in enumerate(players):
+            if other is not player:
+                hand = known.get(other_seat, 0)
+                opponents.append((other_seat, len(other.hand) - hand.bit_count(), hand))
+        return state, unseen, opponents
+
+    @staticmethod
+    def _determinize(state: SearchState, opponents: list, rng):
+        """
+        Deals the unseen cards at random to the other players' hands, on top of the cards known to be there, and to the
+        stock, ahead of the trump card, shuffling them in place rather than building any list.
+        """
+        unseen = state.unseen
+        rng.shuffle(unseen)
+
+        hands = state.hands
+        index = 0
+        for seat, size, hand in opponents:
+            for position in range(index, index + size):
+                hand |= 1 << unseen[position]
+            hands[seat] = hand
+            index += size
+
+        stock = state.stock
+        for position in range(index, len(unseen)):
+            stock[position - index] = unseen[position]
+
+    @staticmethod
+    def _iterate(root: Node, state: SearchState, rng):
+        node = root
+
+        # Selection, descending through the cards playable in this determinization, until one hasn't been tried
+        while not state.is_over():
+            legal = state.hands[state.to_move]
+            untried = legal & ~node.expanded
+
+            for child in node.children.values():
+                if legal >> child.card & 1:
+                    child.available += 1
+
+            if untried:
+                card = random_card(untried, rng)
+                child = Node(card, state.to_move, node)
+                node.children[card] = child
+                node.expanded |= 1 << card
+                state.play(card)
+                node = child
+                break
+
+            best_score = -1.0
+            for child in node.children.values():
+                if legal >> child.card & 1:
+                    score = child.reward / child.visits + EXPLORATION * math.sqrt(
+                        math.log(child.available) / child.visits
+                    )
+                    if score > best_score:
+                        best_score, node = score, child
+
+            state.play(node.card)
+
+        # Playout
+        hands = state.hands
+        while hands[state.to_move]:
+            state.play(random_card(hands[state.to_move], rng))
+
+        # Backpropagation
+        points = state.points
+        while node is not None:
+            node.visits += 1
+            if node.seat >= 0:
+                node.reward += points[node.seat] / TOTAL_POINTS
+            node = node.parent
@@ -0,0 +1,184 @@
+from engine.structures import COMPARE
+from engine.canonical import CARD_MAPS, INVERSES, PERMUTATIONS, SUITS, canonical_permutation
+
+# Default number of decisions kept by a decision cache
+DECISION_CACHE_ENTRIES = 1 << 18
+
+# Bits of a decision_key, agent types being told apart by the bits above
+DECISION_KEY_BITS = 30
+
+
+def leading_card(table: list, lead_suit, trump_suit):
+    """
+    Returns the card leading the trick so far, as the agents see it through Player.leading_card.
+    """
+    compare = COMPARE[lead_suit.index][trump_suit.index]
+    leading = table[0]
+    for card in table:
+        if compare[leading.id][card.id] == -1:
+            leading = card
+    return leading
+
+
+def decision_key(hand: list, table: list = (), lead_suit=None, trump_suit=None) -> int:
+    """
+    Encodes the inputs of a deterministic agent's decision as a single int: the hand in order (ties are broken by
+    position in hand), the cards on the table, the lead suit and the trump suit, the latter being needed for the table.
+    The table is reduced to the card leading the trick, which is all the agents look at, so every table with the same
+    leading card shares the same key. Inputs an agent doesn't depend on may be left out.
+    """
+    if trump_suit is None:
+        key = 0
+    else:
+        trump = trump_suit.index
+        key = trump + 1
+        if table:
+            # Inlining leading_card, as keys are built on every decision
+            lead = lead_suit.index
+            compare = COMPARE[lead][trump]
+            leading = table[0].id
+            for card in table:
+                if compare[leading][card.id] == -1:
+                    leading = card.id
+            key |= (lead + 1) << 3 | (leading + 1) << 6
+
+    # Hands hold up to 3 cards, each encoded on 6 bits as its id plus one, leaving 0 for no card
+    size = len(hand)
+    if size == 3:
+        first, second, third = hand
+        return key << 18 | (first.id + 1) << 12 | (second.id + 1) << 6 | third.id + 1
+    for card in hand:
+        key = key << 6 | card.id + 1
+    return key << 6 * (3 - size)
+
+
+class _Entries:
+    """
+    Bounded decisions in two generations, approximating least-recently-used eviction without any bookkeeping on hits.
+    Decisions are added to the recent generation, which becomes the older one once full, the older one being dropped.
+    Decisions found in the older generation are moved back to the recent one.
+    """
+
+    __slots__ = ("recent", "older", "capacity")
+
+    def __init__(self, max_entries: int):
+        self.recent = {}
+        self.older = {}
+        self.capacity = max(1, max_entries // 2)
+
+    def __len__(self):
+        return len(self.recent) + len(self.older)
+
+    def get_older(self, key):
+        """
+        Returns the decision of a key missing from the recent generation, or None.
+        """
+        cards = self.older.pop(key, None)
+        if cards is not None:
+            self.add(key, cards)
+        return cards
+
+    def add(self, key, cards):
+        recent = self.recent
+        if len(recent) >= self.capacity:
+            self.older = recent
+            self.recent = recent = {}
+        recent[key] = cards
+
+
+class _Agent:
+    """
+    The key prefix and the hits and misses of an agent type.
+    """
+
+    __slots__ = ("prefix", "hits", "misses")
+
+    def __init__(self, prefix: int):
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+
+class DecisionCache:
+    """
+    A bounded cache of the decisions of deterministic agents, shared by every game in a process, evicting roughly the
+    least recently used decisions first.
+    Entries are keyed by agent type and the decision_key of the agent's decision_inputs, and hold the cards the agent
+    would pick from at random, so agents still draw from their random number generator exactly as they would without
+    a cache. Hits and misses are counted per agent type, to tell which agents benefit.
+
+    If canonical is set, positions missing from the cache are looked up again by their canonical form (see
+    engine.canonical), so positions equal up to a permutation of the suits share their decisions, which are mapped back
+    to the cards of each position and cached as such. Only positions met for the first time are canonicalized.
+    """
+
+    def __init__(self, max_entries: int = DECISION_CACHE_ENTRIES, canonical: bool = False):
+        self.max_entries = max_entries
+        self.canonical = canonical
+        self.entries = _Entries(max_entries)
+        self.canonical_entries = _Entries(max_entries) if canonical else None
+        self.agents = {}
+
+    @property
+    def counts(self) -> dict:
+        """
+        Hits and misses per agent type.
+        """
+        return {player_type: [agent.hits, agent.misses] for player_type, agent in self.agents.items()}
+
+    def lookup(self, player, world, choices) -> list:
+        """
+        Returns the player's choices in the current position, calling choices(world) to compute them on a miss.
+        """
+        agent = self.agents.get(player.type)
+        if agent is None:
+            agent = self.agents[player.type] = _Agent(len(self.agents) << DECISION_KEY_BITS)
+
+        hand, table, lead_suit, trump_suit = player.decision_inputs(world)
+        key = agent.prefix | decision_key(hand, table, lead_suit, trump_suit)
+
+        cards = self.entries.recent.get(key)
+        if cards is None:
+            cards = self.entries.get_older(key)
+        if cards is not None:
+            agent.hits += 1
+            return cards
+
+        if self.canonical:
+            cards = self._lookup_canonical(agent, hand, table, lead_suit, trump_suit, world, choices)
+        else:
+            agent.misses += 1
+            cards = choices(world)
+
+        self.entries.add(key, cards)
+        return cards
+
+    def _lookup_canonical(self, agent, hand, table, lead_suit, trump_suit, world, choices) -> list:
+        # Only the leading card is keyed, so tables are reduced to it before picking the canonical suit order
+        table = (leading_card(table, lead_suit, trump_suit),) if table else ()
+        index = canonical_permutation(hand, table, lead_suit, trump_suit)
+        mapping = CARD_MAPS[index]
+        key = agent.prefix | decision_key(
+            [mapping[card.id] for card in hand],
+            [mapping[card.id] for card in table],
+            SUITS[PERMUTATIONS[index][lead_suit.index]] if lead_suit is not None else None,
+            SUITS[0] if trump_suit is not None else None,
+        )
+
+        entries = self.canonical_entries
+        cards = entries.recent.get(key)
+        if cards is None:
+            cards = entries.get_older(key)
+        if cards is not None:
+            agent.hits += 1
+            original = CARD_MAPS[INVERSES[index]]
+            return [original[card.id] for card in cards]
+
+        agent.misses += 1
+        cards = choices(world)
+        entries.add(key, [mapping[card.id] for card in cards])
+        return cards
+
+    def reset_counts(self):
+        for agent in self.agents.values():
+            agent.hits = agent.misses = 0
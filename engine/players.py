@@ -1,19 +1,52 @@
+import random
 from abc import abstractmethod
-from random import choice
-from engine.structures import Card, Suit, Deck
+from engine.endgame import EndgameSolver
+from engine.mcts import InformationSetSearch
+from engine.structures import Card, Suit, CardSet, COMPARE, FULL_MASK, SUIT_MASKS, BEATING_MASKS
 from utils.log import log
 
+# Default search budget of the ISMCTSAgent, per move
+ISMCTS_ITERATIONS = 200
+
 
 class Player:
     """
     Represents a player, either human or agent. Base class for all players.
     """
 
-    def __init__(self, name, player_type):
+    # Opt-in cache of the decisions of deterministic agents, shared by every game in the process (see engine.memo)
+    decision_cache = None
+
+    # Opt-in precompiled decision tables of the rule-based agents, taking precedence over the cache (see engine.tables)
+    decision_tables = None
+
+    def __init__(self, name, player_type, rng=None):
         self.name = name
-        self.hand = []
-        self.pile = []
+        self.hand = []  # Kept in the order cards were dealt, as human players pick cards by position
+        self.hand_set = CardSet()  # The same cards as the hand, for constant-time lookups
+        self.pile = CardSet()
         self.type = player_type
+        self.rng = rng if rng is not None else random.Random()
+
+    def reset(self):
+        """
+        Clears the player's hand and pile, along with any per-game state, before joining a new game
+        """
+        self.hand = []
+        self.hand_set = CardSet()
+        self.pile = CardSet()
+
+    def join(self, world):
+        """
+        Called once the player has been added to a game, e.g. to subscribe to its events
+        """
+
+    def set_rng(self, rng):
+        """
+        Sets the random number generator (a random.Random instance) used for the player's decisions.
+        If None, an unseeded generator is used.
+        """
+        self.rng = rng if rng is not None else random.Random()
 
     def get_hand(self):
         """
@@ -38,12 +71,49 @@ class Player:
         Adds a card to the player's hand
         """
         self.hand.append(card)
+        self.hand_set.mask |= 1 << card.id
 
     def add_to_pile(self, cards):
         """
         Adds a list of cards to the player's pile
         """
-        self.pile.extend(cards)
+        self.pile.update(cards)
+
+    @staticmethod
+    def set_decision_cache(cache):
+        """
+        Sets the engine.memo.DecisionCache shared by every deterministic agent, or disables caching if None.
+        """
+        Player.decision_cache = cache
+
+    @staticmethod
+    def set_decision_tables(tables):
+        """
+        Sets the engine.tables.DecisionTables the rule-based agents decide from, or disables them if None.
+        """
+        Player.decision_tables = tables
+
+    def decision_inputs(self, world) -> tuple:
+        """
+        Returns what a deterministic agent's decisions depend on: its hand, the cards on the table, the lead suit and
+        the trump suit, as keyed by the decision cache (see engine.memo).
+        """
+        trick = world.current_trick
+        return self.hand, trick.cards, trick.starting_suit, world.trump_suit
+
+    def choose(self, world, choices) -> Card:
+        """
+        Plays one of the cards a deterministic agent finds best, as computed by choices(world), picked at random.
+        The choices are looked up in the decision tables or the decision cache instead, if enabled.
+        """
+        tables = Player.decision_tables
+        if tables is not None:
+            cards = tables.lookup(self, world)
+            if cards is not None:
+                return self.rng.choice(cards)
+
+        cache = Player.decision_cache
+        return self.rng.choice(choices(world) if cache is None else cache.lookup(self, world, choices))
 
     @abstractmethod
     def action(self, world) -> Card:
@@ -55,11 +125,13 @@ class Player:
         """
         Removes a card from the player's hand and returns it.
         """
-        for card in self.hand:
-            if card.rank == played_card.rank and card.suit == played_card.suit:
-                self.hand.remove(card)
-                return card
-        return False
+        bit = 1 << played_card.id
+        if not self.hand_set.mask & bit:
+            return False
+
+        self.hand_set.mask ^= bit
+        self.hand.remove(played_card)
+        return played_card
 
     def leading_card(self, hand: Card, suit: Suit, trump: Suit) -> Card:
         """
@@ -79,20 +151,7 @@ class Player:
         """
         Compares two cards and returns 1 if the first card wins, -1 if the second card wins, and 0 if they are equal.
         """
-        # In case these are same-suit cards, compare the rank
-        if c1.suit == c2.suit:
-            return 1 if c1.rank > c2.rank else -1
-
-        # If one of the cards is a trump, it wins
-        if c1.suit == trump or c2.suit == trump:
-            return 1 if c1.suit == trump else -1
-
-        # If one of the cards is of the current suit, it wins
-        if c1.suit == current_suit or c2.suit == current_suit:
-            return 1 if c1.suit == current_suit else -1
-
-        # If none of the cards is of the current suit, compare the rank
-        return 1 if c1.rank > c2.rank else -1 if c1.rank < c2.rank else 0
+        return COMPARE[current_suit.index][trump.index][c1.id][c2.id]
 
     ## returns all cards from highest rank
     def highest_rank_card(self, hand: Card) -> Card:
@@ -115,24 +174,23 @@ class Player:
         """
         current_suit = world.current_trick.get_starting_suit()
 
-        valid_hand = []
+        # The first player can play any card
+        if current_suit is None:
+            return self.hand
 
         # If the user has a card of the current suit, he must play it
-        for card in self.hand:
-            if card.suit == current_suit:
-                valid_hand.append(card)
+        suit_mask = self.hand_set.mask & SUIT_MASKS[current_suit.index]
+        if suit_mask:
+            return [card for card in self.hand if suit_mask >> card.id & 1]
 
         # If the user has no cards of the current suit, he can play any card
-        if len(valid_hand) == 0:
-            valid_hand = self.hand
-
-        return valid_hand
+        return self.hand
 
     def get_points(self):
         """
         Returns the total number of points in the player's pile
         """
-        return sum([card.points for card in self.pile])
+        return self.pile.points()
 
     def __str__(self):
         return self.name
@@ -173,11 +231,11 @@ class RandomAgent(Player):
     An agent which randomly picks a card from its deck at any given play
     """
 
-    def __init__(self, name):
-        super().__init__(name, "RandomAgent")
+    def __init__(self, name, rng=None):
+        super().__init__(name, "RandomAgent", rng)
 
     def action(self, world) -> Card:
-        return choice(self.hand)
+        return self.rng.choice(self.hand)
 
 
 class SimpleGreedyAgent(Player):
@@ -186,11 +244,18 @@ class SimpleGreedyAgent(Player):
     Ties are broken at random.
     """
 
-    def __init__(self, name):
-        super().__init__(name, "SimpleGreedyAgent")
+    def __init__(self, name, rng=None):
+        super().__init__(name, "SimpleGreedyAgent", rng)
 
     def action(self, world) -> Card:
-        return choice(self.highest_rank_card(self.hand))
+        return self.choose(world, self.choices)
+
+    def choices(self, world) -> list:
+        return self.highest_rank_card(self.hand)
+
+    def decision_inputs(self, world) -> tuple:
+        # Only the hand matters
+        return self.hand, (), None, None
 
 
 class MinimizePointLossGreedyAgent(Player):
@@ -200,10 +265,13 @@ class MinimizePointLossGreedyAgent(Player):
     When in first place to play, it will play the highest card.
     """
 
-    def __init__(self, name):
-        super().__init__(name, "MinimizePointLossGreedyAgent")
+    def __init__(self, name, rng=None):
+        super().__init__(name, "MinimizePointLossGreedyAgent", rng)
 
     def action(self, world) -> Card:
+        return self.choose(world, self.choices)
+
+    def choices(self, world) -> list:
         table = world.current_trick.get_cards()
         suit = world.current_trick.get_starting_suit()
 
@@ -221,7 +289,7 @@ class MinimizePointLossGreedyAgent(Player):
             # Decide which card to play
             play_cards = [self.decide(world, lead_card)]
 
-        return choice(play_cards)
+        return play_cards
 
     def decide(self, world, lead_card: Card) -> Card:
         """
@@ -259,9 +327,10 @@ class MinimizePointLossGreedyAgent(Player):
                 high_card = card
             value_cards.append([card, value])
 
-        log.debug(
-            f"{self} current hand evaluation {value_cards}, trying to beat {lead_card}"
-        )
+        if not world.headless:
+            log.debug(
+                f"{self} current hand evaluation {value_cards}, trying to beat {lead_card}"
+            )
 
         return high_card
 
@@ -273,10 +342,13 @@ class MPLGreedyTrumpSaveAgent(Player):
     When in first place to play, it will play the highest card.
     """
 
-    def __init__(self, name):
-        super().__init__(name, "MPLGreedyTrumpSaveAgent")
+    def __init__(self, name, rng=None):
+        super().__init__(name, "MPLGreedyTrumpSaveAgent", rng)
 
     def action(self, world) -> Card:
+        return self.choose(world, self.choices)
+
+    def choices(self, world) -> list:
         # Getting the current suit and trump suit
         table = world.current_trick.get_cards()
         suit = world.current_trick.get_starting_suit()
@@ -292,7 +364,7 @@ class MPLGreedyTrumpSaveAgent(Player):
             lead_card = self.leading_card(table, suit, world.trump_suit)
             play_cards = [self.decide(world, lead_card)]
 
-        return choice(play_cards)
+        return play_cards
 
     def decide(self, world, lead_card: Card) -> Card:
         """
@@ -326,9 +398,10 @@ class MPLGreedyTrumpSaveAgent(Player):
                 high_card = card
             value_cards.append([card, value])
 
-        log.debug(
-            f"{self} current hand evaluation {value_cards}, trying to beat {lead_card}"
-        )
+        if not world.headless:
+            log.debug(
+                f"{self} current hand evaluation {value_cards}, trying to beat {lead_card}"
+            )
 
         return high_card
 
@@ -339,10 +412,13 @@ class MPLGreedyTrumpBasedAgent(Player):
     When in first place to play, it will play the highest card.
     """
 
-    def __init__(self, name):
-        super().__init__(name, "MPLGreedyTrumpBasedAgent")
+    def __init__(self, name, rng=None):
+        super().__init__(name, "MPLGreedyTrumpBasedAgent", rng)
 
     def action(self, world) -> Card:
+        return self.choose(world, self.choices)
+
+    def choices(self, world) -> list:
         table = world.current_trick.get_cards()
         suit = world.current_trick.get_starting_suit()
 
@@ -357,7 +433,7 @@ class MPLGreedyTrumpBasedAgent(Player):
             lead_card = self.leading_card(table, suit, world.trump_suit)
             play_cards = [self.decide(world, lead_card)]
 
-        return choice(play_cards)
+        return play_cards
 
     def first_play(self, world) -> Card:
         """
@@ -404,9 +480,10 @@ class MPLGreedyTrumpBasedAgent(Player):
 
             value_cards.append([card, value])
 
-        log.debug(
-            f"{self} current hand evaluation {value_cards}, trying to beat {lead_card}"
-        )
+        if not world.headless:
+            log.debug(
+                f"{self} current hand evaluation {value_cards}, trying to beat {lead_card}"
+            )
 
         return high_card
 
@@ -416,29 +493,47 @@ class GreedyCountingAgent(Player):
     An agent which will always play the card that won't him points.
     This agent will force trump battles.
     When in first place to play, it will play the highest card.
+    It counts cards by observing the game: its counting deck holds the cards it hasn't seen yet, neither dealt to it nor played by anyone.
+    In two-player games, once the deck and the trump card are gone, its counting deck is exactly the opponent's hand,
+    and it plays the last tricks perfectly with an endgame solver.
     """
 
-    def __init__(self, name):
-        super().__init__(name, "GreedyCountingAgent")
-        self.counting_deck = Deck()
-        self.cards_removed = []
+    def __init__(self, name, rng=None):
+        super().__init__(name, "GreedyCountingAgent", rng)
+        self.counting_deck = CardSet.full()  # Cards not yet seen by the agent
+        self.solver = EndgameSolver()
+
+    def reset(self):
+        super().reset()
+        # Every card is unseen at the start of a game, and endgames are solved afresh
+        self.counting_deck.mask = FULL_MASK
+        self.solver.clear()
+
+    def join(self, world):
+        world.on_deal(self.observe_deal)
+        world.on_play(self.observe_play)
+
+    def observe_deal(self, event):
+        # Only the cards dealt to the agent itself are seen
+        if event.player is self:
+            self.counting_deck.mask &= ~(1 << event.card.id)
+
+    def observe_play(self, event):
+        self.counting_deck.mask &= ~(1 << event.card.id)
 
     def action(self, world) -> Card:
+        """
+        Solves two-player endgames exactly, and otherwise picks the card valued highest for the agent's place in the
+        trick: first, in the middle, or last.
+        """
         table = world.current_trick.get_cards()
         suit = world.current_trick.get_starting_suit()
 
         lead_card = None
 
-        cards_to_remove = []
-        cards_to_remove += table
-        cards_to_remove += self.hand
-
-        for player in world.player_pool.get_players():
-            cards_to_remove += player.pile
-
-        for card in cards_to_remove:
-            if card in self.counting_deck.cards:
-                self.counting_deck.cards.remove(card)
+        if len(world.player_pool) == 2 and len(world.deck) == 0 and world.trump_card is None:
+            lead_card = table[0] if table else None
+            return self.solver.best_card(self.hand_set, self.counting_deck, world.trump_suit, lead_card)[0]
 
         # if first player
         if len(table) == 0:
@@ -457,7 +552,8 @@ class GreedyCountingAgent(Player):
 
     def decide_first_play(self, world) -> Card:
         """
-        TODO: Explain this function
+        Leads with the card of highest expected points: its points, weighted by the probability that none of the
+        unseen cards able to beat it is in the other players' hands.
         """
         high_value = -1000
         high_card = None
@@ -481,13 +577,16 @@ class GreedyCountingAgent(Player):
                 high_card = card
             value_cards.append([card, value])
 
-        log.debug(f"{self} current hand Evaluation {value_cards}")
+        if not world.headless:
+            log.debug(f"{self} current hand Evaluation {value_cards}")
 
         return high_card
 
     def decide_mid_play(self, world, lead_card: Card) -> Card:
         """
-        TODO: Explain this function
+        Plays in the middle of a trick. Cards beating the leading card are valued by their points, weighted by the
+        probability that no player left to play holds an unseen card beating them. Otherwise the card losing the
+        fewest points is played, trumps being worth saving.
         """
         trump_weight = 5
 
@@ -531,15 +630,17 @@ class GreedyCountingAgent(Player):
                 high_card = card
             value_cards.append([card, value])
 
-        log.debug(
-            f"{self} current hand evaluation {value_cards}, trying to beat {lead_card}"
-        )
+        if not world.headless:
+            log.debug(
+                f"{self} current hand evaluation {value_cards}, trying to beat {lead_card}"
+            )
 
         return high_card
 
     def decide_last_play(self, world, lead_card: Card) -> Card:
         """
-        TODO: Explain this function
+        Plays last in a trick, when winning it is certain: takes it with the card worth the most points, trumps
+        counting extra, or otherwise throws away the card losing the fewest points, trumps being worth saving.
         """
         trump_weight = 5
 
@@ -565,30 +666,26 @@ class GreedyCountingAgent(Player):
                 high_card = card
             value_cards.append([card, value])
 
-        log.debug(
-            f"{self} current hand evaluation {value_cards}, trying to beat {lead_card}"
-        )
+        if not world.headless:
+            log.debug(
+                f"{self} current hand evaluation {value_cards}, trying to beat {lead_card}"
+            )
 
         return high_card
 
-    def count_beating_cards(self, card: Card, deck: Deck, trump: Suit, suit=None):
+    def count_beating_cards(self, card: Card, deck: CardSet, trump: Suit, suit=None):
         """
         Returns the number of cards in the deck that beat the given card.
         """
-        counter = 0
-
         if suit is None:
             suit = card.suit
 
-        for deck_card in deck.cards:
-            if self.compare_cards(deck_card, card, suit, trump) == 1:
-                counter += 1
-
-        return counter
+        return (deck.mask & BEATING_MASKS[suit.index][trump.index][card.id]).bit_count()
 
     def calculate_probability(self, cards_in_hand, deck_size, cards_that_beat):
         """
-        Calculates the probability of a card not being beaten by a card in the deck.
+        Calculates the probability of a card not being beaten: that none of the cards_that_beat unseen cards is among
+        the cards_in_hand the other players hold, out of the deck_size unseen cards.
         """
         probability = 1.0
 
@@ -596,3 +693,29 @@ class GreedyCountingAgent(Player):
             probability *= (deck_size - cards_in_hand - i) / (deck_size - i)
 
         return probability
+
+
+class ISMCTSAgent(Player):
+    """
+    An agent which searches with Information-Set Monte Carlo Tree Search: each iteration deals the cards it can't see
+    at random, consistently with what it has seen, and plays the game out through a tree shared by every deal.
+    Its search is bounded per move by a number of iterations, a time budget in seconds, or both: with iterations=None,
+    it searches for the whole time budget.
+    """
+
+    def __init__(self, name, rng=None, iterations=ISMCTS_ITERATIONS, time_budget=None):
+        super().__init__(name, "ISMCTSAgent", rng)
+        self.search = InformationSetSearch(iterations, time_budget)
+
+    def reset(self):
+        super().reset()
+        self.search.reset()
+
+    def join(self, world):
+        # The tree is kept from one move to the next, following the cards played in between, and whoever is dealt the
+        # face-up trump card is known to hold it
+        world.on_deal(self.search.observe_deal)
+        world.on_play(self.search.observe_play)
+
+    def action(self, world) -> Card:
+        return self.search.decide(world, self, self.rng)
@@ -0,0 +1,214 @@
+from typing import NamedTuple
+from engine.structures import BEATS, CARD_POINTS, CARD_SUIT, RANK_MASKS, Rank
+from engine.zobrist import DEAL_KEYS, PLAY_KEYS, WIN_KEYS, TO_MOVE_KEYS, state_hash
+
+# Cards dealt to each player at the start of a game, as in engine.game, which imports this module
+CARDS_PER_PLAYER = 3
+
+
+class GameState(NamedTuple):
+    """
+    An immutable snapshot of a game, made of small ints and tuples, so it is cloned by reference and shared freely.
+    Cards are ids and sets of cards are masks, bit i standing for the card with id i. Moves are card ids: any card in
+    the hand of the player to move may be played.
+
+    apply returns the state after a move and undo the state before it, both in constant time. Undoing a move that
+    ended a trick relies on the tricks completed since the state was exported, which are kept for that purpose.
+    Both update the state's Zobrist hash (see engine.zobrist) incrementally, so positions can key caches and tables.
+    """
+
+    players: int
+    trump: int  # Index of the trump suit
+    stock: tuple  # Ids of the cards drawn from the deck, in order, the face-up trump card last
+    drawn: int  # Number of cards of the stock drawn so far
+    hands: tuple  # Mask of each seat's hand
+    piles: tuple  # Mask of the cards each seat won
+    points: tuple  # Points each seat won
+    to_move: int  # Seat of the player to move
+    trick: tuple  # Ids of the cards played in the trick in progress, in order
+    zobrist: int  # Hash of the position
+    completed: tuple = ()  # (leader, cards, drawn before topping up hands) of each trick completed since exported
+
+    @classmethod
+    def deal(cls, cards: list, players: int) -> "GameState":
+        """
+        Returns the state at the start of a game between the given number of players, dealt from a deck of card ids
+        in Deck.cards order: the last card is turned face up as trump, and cards are then drawn from the end.
+        As Game does, the 2s are left out of the deck with 3 or 6 players.
+        """
+        if players in (3, 6):
+            cards = [card for card in cards if not RANK_MASKS[Rank.TWO] >> card & 1]
+
+        stock = tuple(reversed(cards[:-1])) + (cards[-1],)
+        hands = [0] * players
+        for position in range(CARDS_PER_PLAYER * players):
+            hands[position % players] |= 1 << stock[position]
+
+        state = cls(
+            players,
+            CARD_SUIT[cards[-1]],
+            stock,
+            CARDS_PER_PLAYER * players,
+            tuple(hands),
+            (0,) * players,
+            (0,) * players,
+            0,
+            (),
+            0,
+        )
+        return state._replace(zobrist=state_hash(state))
+
+    @property
+    def leader(self) -> int:
+        """
+        Seat of the player who led the trick in progress, or who is about to.
+        """
+        return (self.to_move - len(self.trick)) % self.players
+
+    def legal_moves(self) -> tuple:
+        """
+        Returns the ids of the cards the player to move may play, in ascending order.
+        """
+        hand = self.hands[self.to_move]
+        moves = []
+        while hand:
+            bit = hand & -hand
+            moves.append(bit.bit_length() - 1)
+            hand ^= bit
+        return tuple(moves)
+
+    def is_over(self) -> bool:
+        # Hands are topped up together, so the game is over once the player to move has no cards left
+        return not self.hands[self.to_move]
+
+    def apply(self, card: int) -> "GameState":
+        """
+        Returns the state after the player to move plays a card. Playing the last card of a trick hands its cards to
+        the winner, who leads the next one once every hand is topped up from the stock.
+        """
+        seat = self.to_move
+        bit = 1 << card
+        if not self.hands[seat] & bit:
+            raise ValueError(f"Card {card} is not in the hand of seat {seat}")
+
+        players = self.players
+        hands = list(self.hands)
+        hands[seat] ^= bit
+        zobrist = self.zobrist ^ PLAY_KEYS[seat][len(self.trick)][card] ^ TO_MOVE_KEYS[seat]
+        trick = self.trick + (card,)
+
+        if len(trick) < players:
+            return GameState(
+                players,
+                self.trump,
+                self.stock,
+                self.drawn,
+                tuple(hands),
+                self.piles,
+                self.points,
+                (seat + 1) % players,
+                trick,
+                zobrist ^ TO_MOVE_KEYS[(seat + 1) % players],
+                self.completed,
+            )
+
+        leader = (seat + 1) % players
+        beats = BEATS[CARD_SUIT[trick[0]]][self.trump]
+        winning, position = trick[0], 0
+        for index, other in enumerate(trick):
+            if beats[other][winning]:
+                winning, position = other, index
+        winner = (leader + position) % players
+
+        piles = list(self.piles)
+        points = list(self.points)
+        for position, other in enumerate(trick):
+            piles[winner] |= 1 << other
+            points[winner] += CARD_POINTS[other]
+            zobrist ^= WIN_KEYS[winner][position][other]
+
+        drawn = self.drawn
+        if drawn < len(self.stock):
+            for i in range(players):
+                other = self.stock[drawn + i]
+                hands[(winner + i) % players] |= 1 << other
+                zobrist ^= DEAL_KEYS[(winner + i) % players][other]
+            drawn += players
+
+        return GameState(
+            players,
+            self.trump,
+            self.stock,
+            drawn,
+            tuple(hands),
+            tuple(piles),
+            tuple(points),
+            winner,
+            (),
+            zobrist ^ TO_MOVE_KEYS[winner],
+            self.completed + ((leader, trick, self.drawn),),
+        )
+
+    def undo(self, card: int) -> "GameState":
+        """
+        Returns the state before the given card, the last one played, was played.
+        Only moves applied since the state was exported or dealt can be undone.
+        """
+        players = self.players
+        hands = list(self.hands)
+
+        if self.trick:
+            if self.trick[-1] != card:
+                raise ValueError(f"Card {card} is not the last card played")
+
+            seat = (self.to_move - 1) % players
+            hands[seat] |= 1 << card
+            return GameState(
+                players,
+                self.trump,
+                self.stock,
+                self.drawn,
+                tuple(hands),
+                self.piles,
+                self.points,
+                seat,
+                self.trick[:-1],
+                self.zobrist ^ PLAY_KEYS[seat][len(self.trick) - 1][card] ^ TO_MOVE_KEYS[self.to_move] ^ TO_MOVE_KEYS[seat],
+                self.completed,
+            )
+
+        if not self.completed or self.completed[-1][1][-1] != card:
+            raise ValueError(f"Card {card} is not the last card played since the state was exported")
+
+        leader, trick, drawn = self.completed[-1]
+        winner = self.to_move
+        seat = (leader + players - 1) % players
+        zobrist = self.zobrist ^ PLAY_KEYS[seat][players - 1][card] ^ TO_MOVE_KEYS[winner] ^ TO_MOVE_KEYS[seat]
+
+        for position in range(drawn, self.drawn):
+            other = self.stock[position]
+            hands[(winner + position - drawn) % players] ^= 1 << other
+            zobrist ^= DEAL_KEYS[(winner + position - drawn) % players][other]
+
+        hands[seat] |= 1 << card
+
+        piles = list(self.piles)
+        points = list(self.points)
+        for position, other in enumerate(trick):
+            piles[winner] ^= 1 << other
+            points[winner] -= CARD_POINTS[other]
+            zobrist ^= WIN_KEYS[winner][position][other]
+
+        return GameState(
+            players,
+            self.trump,
+            self.stock,
+            drawn,
+            tuple(hands),
+            tuple(piles),
+            tuple(points),
+            seat,
+            trick[:-1],
+            zobrist,
+            self.completed[:-1],
+        )
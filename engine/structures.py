@@ -29,9 +29,8 @@ class Pool:
         self._notify_observers()
 
     def advance_player(self):
-        self.set_current_player(
-            self.players[(self.current_player_index + 1) % len(self.players)]
-        )
+        self.current_player_index = (self.current_player_index + 1) % len(self.players)
+        self._notify_observers()
 
     def _notify_observers(self):
         for callback in self.callbacks:
@@ -75,29 +74,65 @@ class Rank(IntEnum):
 class Suit(Enum):
     """
     A helper enum for card suits
+    Structure: (name, index)
+    The index is used to address the card lookup tables (e.g. Suit.HEARTS.index -> 1)
     """
 
-    SPADES = "Spades"
-    HEARTS = "Hearts"
-    DIAMONDS = "Diamonds"
-    CLUBS = "Clubs"
+    SPADES = ("Spades", 0)
+    HEARTS = ("Hearts", 1)
+    DIAMONDS = ("Diamonds", 2)
+    CLUBS = ("Clubs", 3)
+
+    def __new__(cls, value, index):
+        obj = object.__new__(cls)
+        obj._value_ = value
+        obj.index = index
+        return obj
+
+
+RANKS_PER_SUIT = len(Rank)
+CARD_COUNT = len(Suit) * RANKS_PER_SUIT
 
 
 class Card:
     """
-    A representation of a card
+    A representation of a card.
+    Cards are interned: there is a single instance per (rank, suit), identified by an integer id in 0..39.
+    The id indexes the lookup tables below, which the engine and agents use instead of comparing enum members.
     """
 
-    def __init__(self, rank: Rank, suit: Suit):
-        self.rank = rank
-        self.suit = suit
-        self.points = rank.points
+    __slots__ = ("id", "rank", "suit", "points")
+
+    def __new__(cls, rank: Rank, suit: Suit):
+        return CARDS[suit.index * RANKS_PER_SUIT + rank - 1]
+
+    @classmethod
+    def _intern(cls, rank: Rank, suit: Suit):
+        card = object.__new__(cls)
+        card.id = suit.index * RANKS_PER_SUIT + rank - 1
+        card.rank = rank
+        card.suit = suit
+        card.points = rank.points
+        return card
+
+    @classmethod
+    def from_id(cls, card_id: int):
+        return CARDS[card_id]
 
     def __hash__(self) -> int:
-        return hash((self.rank, self.suit))
+        return self.id
 
     def __eq__(self, other):
-        return self.rank == other.rank and self.suit == other.suit
+        return self is other
+
+    def __reduce__(self):
+        return (Card.from_id, (self.id,))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     def __repr__(self):
         return f"{self.rank.name} ({self.suit.value})"
@@ -127,37 +162,226 @@ class Card:
         return filename
 
 
+# Card lookup tables, indexed by card id
+CARDS = tuple(
+    sorted(
+        (Card._intern(rank, suit) for suit in Suit for rank in Rank),
+        key=lambda card: card.id,
+    )
+)
+DECK_ORDER = tuple(Card(rank, suit) for suit in Suit for rank in Rank)  # A fresh deck, before shuffling
+CARD_RANK = tuple(int(card.rank) for card in CARDS)
+CARD_SUIT = tuple(card.suit.index for card in CARDS)
+CARD_POINTS = tuple(card.points for card in CARDS)
+
+
+def _beats(a: int, b: int, lead: int, trump: int) -> bool:
+    """
+    Whether card a, played after card b, takes the trick from it.
+    """
+    suit_a, suit_b = CARD_SUIT[a], CARD_SUIT[b]
+
+    # A card of the starting suit wins over a card of lower rank
+    if suit_a == lead and CARD_RANK[a] > CARD_RANK[b]:
+        return True
+
+    # A trump wins over any other suit, regardless of rank, and over a lower trump
+    if suit_a == trump:
+        return suit_b != trump or CARD_RANK[a] > CARD_RANK[b]
+
+    return False
+
+
+def _compare(a: int, b: int, lead: int, trump: int) -> int:
+    """
+    Compares two cards, returning 1 if the first card wins, -1 if the second card wins, and 0 if they are equal.
+    """
+    suit_a, suit_b = CARD_SUIT[a], CARD_SUIT[b]
+    rank_a, rank_b = CARD_RANK[a], CARD_RANK[b]
+
+    # In case these are same-suit cards, compare the rank
+    if suit_a == suit_b:
+        return 1 if rank_a > rank_b else -1
+
+    # If one of the cards is a trump, it wins
+    if suit_a == trump or suit_b == trump:
+        return 1 if suit_a == trump else -1
+
+    # If one of the cards is of the current suit, it wins
+    if suit_a == lead or suit_b == lead:
+        return 1 if suit_a == lead else -1
+
+    # If none of the cards is of the current suit, compare the rank
+    return 1 if rank_a > rank_b else -1 if rank_a < rank_b else 0
+
+
+# BEATS[lead][trump][a][b]: whether card a takes the trick from card b, which was played before it
+BEATS = tuple(
+    tuple(
+        tuple(
+            tuple(_beats(a, b, lead, trump) for b in range(CARD_COUNT))
+            for a in range(CARD_COUNT)
+        )
+        for trump in range(len(Suit))
+    )
+    for lead in range(len(Suit))
+)
+
+# COMPARE[lead][trump][a][b]: the outcome of Player.compare_cards(a, b), regardless of play order
+COMPARE = tuple(
+    tuple(
+        tuple(
+            tuple(_compare(a, b, lead, trump) for b in range(CARD_COUNT))
+            for a in range(CARD_COUNT)
+        )
+        for trump in range(len(Suit))
+    )
+    for lead in range(len(Suit))
+)
+
+
+# Card masks, bit i of a mask standing for the card with id i
+FULL_MASK = (1 << CARD_COUNT) - 1
+SUIT_MASKS = tuple(
+    sum(1 << card.id for card in CARDS if card.suit is suit) for suit in Suit
+)
+RANK_MASKS = {rank: sum(1 << card.id for card in CARDS if card.rank is rank) for rank in Rank}
+
+# BEATING_MASKS[lead][trump][b]: the cards a for which COMPARE[lead][trump][a][b] == 1
+BEATING_MASKS = tuple(
+    tuple(
+        tuple(
+            sum(1 << a for a in range(CARD_COUNT) if COMPARE[lead][trump][a][b] == 1)
+            for b in range(CARD_COUNT)
+        )
+        for trump in range(len(Suit))
+    )
+    for lead in range(len(Suit))
+)
+
+
+class CardSet:
+    """
+    A set of cards, stored as a 40-bit mask where bit i stands for the card with id i.
+    Membership, insertion and removal are single bitwise operations, and the size is a popcount.
+    Iteration yields cards in id order.
+    """
+
+    __slots__ = ("mask",)
+
+    def __init__(self, cards=(), mask: int = 0):
+        for card in cards:
+            mask |= 1 << card.id
+        self.mask = mask
+
+    @classmethod
+    def full(cls):
+        return cls(mask=FULL_MASK)
+
+    def add(self, card: Card):
+        self.mask |= 1 << card.id
+
+    def update(self, cards):
+        for card in cards:
+            self.mask |= 1 << card.id
+
+    def remove(self, card: Card):
+        bit = 1 << card.id
+        if not self.mask & bit:
+            raise KeyError(card)
+        self.mask ^= bit
+
+    def discard(self, card: Card):
+        self.mask &= ~(1 << card.id)
+
+    def difference_update(self, other: "CardSet"):
+        self.mask &= ~other.mask
+
+    def of_suit(self, suit: Suit) -> "CardSet":
+        """
+        Returns the cards of the given suit
+        """
+        return CardSet(mask=self.mask & SUIT_MASKS[suit.index])
+
+    def points(self) -> int:
+        """
+        Returns the sum of the points of all cards in the set
+        """
+        mask = self.mask
+        return sum(
+            rank.points * (mask & rank_mask).bit_count()
+            for rank, rank_mask in RANK_MASKS.items()
+            if rank.points
+        )
+
+    def __contains__(self, card: Card) -> bool:
+        return self.mask >> card.id & 1 == 1
+
+    def __len__(self) -> int:
+        return self.mask.bit_count()
+
+    def __bool__(self) -> bool:
+        return self.mask != 0
+
+    def __iter__(self):
+        mask = self.mask
+        while mask:
+            low_bit = mask & -mask
+            yield CARDS[low_bit.bit_length() - 1]
+            mask ^= low_bit
+
+    def __and__(self, other: "CardSet") -> "CardSet":
+        return CardSet(mask=self.mask & other.mask)
+
+    def __or__(self, other: "CardSet") -> "CardSet":
+        return CardSet(mask=self.mask | other.mask)
+
+    def __sub__(self, other: "CardSet") -> "CardSet":
+        return CardSet(mask=self.mask & ~other.mask)
+
+    def __eq__(self, other):
+        return isinstance(other, CardSet) and self.mask == other.mask
+
+    def __hash__(self) -> int:
+        return hash(self.mask)
+
+    def __repr__(self):
+        return f"CardSet({list(self)})"
+
+
 class Deck:
     """
-    A representation of a deck
+    A representation of a deck.
+    Shuffling draws from the given random number generator (a random.Random instance), or from an unseeded one if none is given.
     """
 
-    def __init__(self):
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else random.Random()
         self.reset()
 
     def reset(self):
-        self.cards = []
-
-        for suit in Suit:
-            for rank in Rank:
-                card = Card(rank, suit)
-                self.cards.append(card)
-
+        self.cards = list(DECK_ORDER)
+        self.card_set = CardSet.full()
         self.shuffle()
 
     def shuffle(self):
-        random.shuffle(self.cards)
+        self.rng.shuffle(self.cards)
 
     def remove_card(self, rank, suit) -> bool:
-        for card in self.cards:
-            if card.rank == rank and card.suit == suit:
-                self.cards.remove(card)
-                return True
-        return False
+        card = Card(rank, suit)
+
+        if card not in self.card_set:
+            return False
+
+        self.card_set.remove(card)
+        self.cards.remove(card)
+        return True
 
     def draw_card(self) -> Card:
-        if len(self.cards) > 0:
-            return self.cards.pop()
+        if self.cards:
+            card = self.cards.pop()
+            self.card_set.mask ^= 1 << card.id
+            return card
         return None
 
     def print_deck(self):
@@ -171,6 +395,7 @@ class Deck:
         According to Bisca rules, in a 3-player game, the 2s are removed from the deck.
         """
         self.cards = [card for card in self.cards if card.rank != Rank.TWO]
+        self.card_set.mask &= ~RANK_MASKS[Rank.TWO]
 
     def __len__(self):
         return len(self.cards)
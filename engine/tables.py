@@ -0,0 +1,290 @@
+import argparse
+import hashlib
+import inspect
+import json
+import mmap
+import time
+from engine import players as agents
+from engine.game import Trick
+from engine.memo import leading_card
+from engine.structures import CARDS, CARD_COUNT, CARD_SUIT, RANKS_PER_SUIT, Suit
+
+# Rule-based agents whose decisions only depend on their hand, the card leading the trick, the lead suit and trump
+TABLE_AGENTS = ("SimpleGreedyAgent", "MinimizePointLossGreedyAgent", "MPLGreedyTrumpSaveAgent", "MPLGreedyTrumpBasedAgent")
+
+DECISION_TABLES_FILE = "decision_tables.bin"
+
+# Files start with a fixed-size header: magic, format version and the JSON description of the tables, padded with
+# spaces, followed by one table per agent
+TABLES_MAGIC = b"BASISDTB"
+TABLES_VERSION = 1
+HEADER_SIZE = 1024
+
+# The agents only tell suits apart by whether they are trump, the lead suit or neither, so a card is encoded by its
+# class and rank: 0-9 for trump, 10-19 for the lead suit and 20-29 for any other suit, NO_CARD_CODE padding hands of
+# fewer than HAND_SIZE cards
+TRUMP_CLASS, LEAD_CLASS, OTHER_CLASS = 0, 1, 2
+NO_CARD_CODE = 3 * RANKS_PER_SUIT
+CARD_CODES = NO_CARD_CODE + 1
+HAND_SIZE = 3
+
+# Situations are: leading the trick (0), following a leading card of trump or the lead suit when the lead suit isn't
+# trump (1-20), or following a leading trump when the lead suit is trump (21-30). Only the leading card of the table
+# matters, whatever the number of cards played before it.
+SITUATIONS = 1 + 3 * RANKS_PER_SUIT
+TABLE_SIZE = SITUATIONS * CARD_CODES**HAND_SIZE
+
+# CODES[lead + 1][trump][card]: the code of a card, given the index of the lead suit (-1 when leading) and of trump
+CODES = tuple(
+    tuple(
+        tuple(
+            (TRUMP_CLASS if CARD_SUIT[card] == trump else LEAD_CLASS if CARD_SUIT[card] == lead else OTHER_CLASS)
+            * RANKS_PER_SUIT
+            + card % RANKS_PER_SUIT
+            for card in range(CARD_COUNT)
+        )
+        for trump in range(len(Suit))
+    )
+    for lead in range(-1, len(Suit))
+)
+
+# FOLLOWING[lead][trump][card]: the situation of following a trick led by a card, given the lead suit and trump
+FOLLOWING = tuple(
+    tuple(
+        tuple(
+            1 + 2 * RANKS_PER_SUIT + card % RANKS_PER_SUIT if lead == trump else 1 + CODES[lead + 1][trump][card]
+            for card in range(CARD_COUNT)
+        )
+        for trump in range(len(Suit))
+    )
+    for lead in range(len(Suit))
+)
+
+# Padding of a hand of each size to HAND_SIZE codes, as the (scale, offset) applied to its index
+PADDING = tuple(
+    (CARD_CODES ** (HAND_SIZE - size), sum(NO_CARD_CODE * CARD_CODES**i for i in range(HAND_SIZE - size)))
+    for size in range(HAND_SIZE + 1)
+)
+
+# Entries are masks of the positions in hand of the cards the agent picks from at random, 0 marking impossible inputs
+POSITIONS = tuple(tuple(position for position in range(HAND_SIZE) if mask >> position & 1) for mask in range(1 << HAND_SIZE))
+
+
+def table_index(hand: list, table: list, lead_suit: Suit, trump_suit: Suit) -> int:
+    """
+    Returns the index of a decision in an agent's table, or None if the hand holds more than HAND_SIZE cards.
+    """
+    if len(hand) > HAND_SIZE:
+        return None
+
+    trump = trump_suit.index
+    if table:
+        lead = lead_suit.index
+        index = FOLLOWING[lead][trump][leading_card(table, lead_suit, trump_suit).id]
+        codes = CODES[lead + 1][trump]
+    else:
+        index = 0
+        codes = CODES[0][trump]
+
+    for card in hand:
+        index = index * CARD_CODES + codes[card.id]
+    scale, offset = PADDING[len(hand)]
+    return index * scale + offset
+
+
+def agent_fingerprint(player_type: str) -> str:
+    """
+    Returns a hash of the source code an agent's decisions come from, to tell tables built from older agents.
+    """
+    player = agents.Player
+    source = "".join(
+        inspect.getsource(method)
+        for method in (player.leading_card, player.compare_cards, player.highest_rank_card, getattr(agents, player_type))
+    )
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+class _Position:
+    """
+    The part of a game the rule-based agents look at when deciding.
+    """
+
+    def __init__(self, trump_suit: Suit):
+        self.current_trick = Trick()
+        self.trump_suit = trump_suit
+        self.headless = True
+
+
+def _position(index: int):
+    """
+    Decodes a table index into a representative hand and position, with spades as trump, hearts as the lead suit when
+    it isn't trump, and the remaining suits standing for the other suits. Returns None for impossible inputs.
+    """
+    codes = []
+    for _ in range(HAND_SIZE):
+        index, code = divmod(index, CARD_CODES)
+        codes.append(code)
+    codes.reverse()
+
+    trump = Suit.SPADES
+    if index == 0:
+        lead, leading = None, None
+    elif index <= 2 * RANKS_PER_SUIT:
+        lead = Suit.HEARTS
+        leading_class, rank = divmod(index - 1, RANKS_PER_SUIT)
+        leading = CARDS[(trump if leading_class == TRUMP_CLASS else lead).index * RANKS_PER_SUIT + rank]
+    else:
+        lead = trump
+        leading = CARDS[trump.index * RANKS_PER_SUIT + index - 1 - 2 * RANKS_PER_SUIT]
+
+    # Cards of other suits sharing a rank are spread over the suits left
+    others = [suit for suit in Suit if suit is not trump and suit is not lead]
+    hand = []
+    for position, code in enumerate(codes):
+        if code == NO_CARD_CODE:
+            if any(other != NO_CARD_CODE for other in codes[position:]):
+                return None
+            break
+
+        card_class, rank = divmod(code, RANKS_PER_SUIT)
+        if card_class == OTHER_CLASS:
+            spread = sum(1 for card in hand if card.suit in others and card.id % RANKS_PER_SUIT == rank)
+            if spread == len(others):
+                return None
+            suit = others[spread]
+        elif card_class == LEAD_CLASS:
+            if lead is None or lead is trump:
+                return None
+            suit = lead
+        else:
+            suit = trump
+
+        card = CARDS[suit.index * RANKS_PER_SUIT + rank]
+        if card in hand or card is leading:
+            return None
+        hand.append(card)
+
+    if not hand:
+        return None
+
+    world = _Position(trump)
+    if leading is not None:
+        world.current_trick.add_play(None, leading)
+        world.current_trick.set_starting_suit(lead)
+    return hand, world
+
+
+def build_table(player_type: str) -> bytearray:
+    """
+    Evaluates an agent on every possible input, returning its table.
+    """
+    player = getattr(agents, player_type)("Table builder")
+    table = bytearray(TABLE_SIZE)
+
+    for index in range(TABLE_SIZE):
+        position = _position(index)
+        if position is None:
+            continue
+
+        hand, world = position
+        player.reset()
+        for card in hand:
+            player.add_to_hand(card)
+
+        positions = tuple(hand.index(card) for card in player.choices(world))
+        mask = sum(1 << position for position in positions)
+        if POSITIONS[mask] != positions:
+            raise ValueError(f"{player_type} picks from cards out of hand order, which a table can't encode.")
+        table[index] = mask
+
+    return table
+
+
+def build_tables(filename: str = DECISION_TABLES_FILE, player_types=TABLE_AGENTS, display: bool = True):
+    """
+    Builds the tables of the given agents into a file, to be loaded with DecisionTables.
+    """
+    tables = {}
+    for offset, player_type in enumerate(player_types):
+        tables[player_type] = {"offset": HEADER_SIZE + offset * TABLE_SIZE, "fingerprint": agent_fingerprint(player_type)}
+
+    header = TABLES_MAGIC + TABLES_VERSION.to_bytes(4, "little") + json.dumps({"size": TABLE_SIZE, "tables": tables}).encode()
+    if len(header) > HEADER_SIZE:
+        raise ValueError("Too many agents to fit in a decision tables header.")
+
+    with open(filename, "wb") as f:
+        f.write(header.ljust(HEADER_SIZE, b" "))
+        for player_type in player_types:
+            start = time.perf_counter()
+            f.write(build_table(player_type))
+            if display:
+                print(f"Built the table of {player_type} in {time.perf_counter() - start:.1f}s")
+
+
+class DecisionTables:
+    """
+    Precompiled decision tables of the rule-based agents, memory-mapped from a file built with build_tables, so a
+    decision is a single indexed lookup and every process shares the same pages.
+    Each table holds, for every hand of up to HAND_SIZE cards and every situation, the positions in hand of the cards
+    the agent picks from at random, so agents still draw from their random number generator exactly as they would
+    otherwise, and play the same cards.
+    """
+
+    def __init__(self, filename: str = DECISION_TABLES_FILE):
+        with open(filename, "rb") as f:
+            header = f.read(HEADER_SIZE)
+            if len(header) != HEADER_SIZE or not header.startswith(TABLES_MAGIC):
+                raise ValueError(f"{filename} is not a decision tables file.")
+
+            version = int.from_bytes(header[len(TABLES_MAGIC) : len(TABLES_MAGIC) + 4], "little")
+            if version != TABLES_VERSION:
+                raise ValueError(f"Unsupported decision tables version {version}.")
+
+            description = json.loads(header[len(TABLES_MAGIC) + 4 :].decode())
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if description["size"] != TABLE_SIZE or len(self.data) != HEADER_SIZE + len(description["tables"]) * TABLE_SIZE:
+            raise ValueError(f"{filename} does not match the decision tables layout, rebuild it with python -m engine.tables.")
+
+        self.filename = filename
+        self.offsets = {}
+        for player_type, table in description["tables"].items():
+            if table["fingerprint"] != agent_fingerprint(player_type):
+                raise ValueError(f"The table of {player_type} in {filename} is out of date, rebuild it with python -m engine.tables.")
+            self.offsets[player_type] = table["offset"]
+
+    def lookup(self, player, world) -> list:
+        """
+        Returns the cards the player picks from in the current position, or None if its table doesn't cover it.
+        """
+        offset = self.offsets.get(player.type)
+        if offset is None:
+            return None
+
+        trick = world.current_trick
+        hand = player.hand
+        index = table_index(hand, trick.cards, trick.starting_suit, world.trump_suit)
+        if index is None:
+            return None
+
+        mask = self.data[offset + index]
+        if not mask:
+            return None
+        return [hand[position] for position in POSITIONS[mask]]
+
+    def close(self):
+        self.data.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Builds the decision tables of the rule-based agents')
+
+    parser.add_argument('--output', default=DECISION_TABLES_FILE, help=f'File to build the tables into (default: {DECISION_TABLES_FILE})')
+    parser.add_argument('--agents', nargs='+', default=list(TABLE_AGENTS), choices=TABLE_AGENTS, help='Agents to build tables of')
+
+    args = parser.parse_args()
+    build_tables(args.output, list(dict.fromkeys(args.agents)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+import numpy as np
+from engine import players as agents
+from engine.game import Game
+from engine.structures import CARDS, CARD_COUNT
+
+MAX_PLAYERS = 6
+
+# Files start with a fixed-size header: magic, format version and the JSON list of players, padded with spaces
+TRACE_MAGIC = b"BASISTRC"
+TRACE_VERSION = 1
+HEADER_SIZE = 1024
+
+# Marks unused seats and plays
+NO_CARD = 0xFF
+
+FLAG_SEEDED = 1
+
+# One fixed-width record per game
+TRACE_DTYPE = np.dtype(
+    [
+        ("seed", "<i8"),  # Base seed of the run, if FLAG_SEEDED is set
+        ("game", "<i8"),  # Index of the game in its run
+        ("players", "u1"),  # Number of players
+        ("flags", "u1"),
+        ("seating", "u1", MAX_PLAYERS),  # Index in the header's players of the player at each seat
+        ("deck", "u1", CARD_COUNT),  # Card ids in deck order, before any card is drawn
+        ("plays", "u1", CARD_COUNT),  # Card ids in play order
+    ]
+)
+
+
+def _header(players: list) -> bytes:
+    """
+    Returns the header of a trace file recording games between the given players.
+    """
+    description = json.dumps([{"name": player.name, "type": player.type} for player in players]).encode()
+    header = TRACE_MAGIC + TRACE_VERSION.to_bytes(4, "little") + description
+
+    if len(header) > HEADER_SIZE:
+        raise ValueError("Too many players, or names too long, to fit in a trace header.")
+
+    return header.ljust(HEADER_SIZE, b" ")
+
+
+def _read_header(f) -> list:
+    """
+    Reads the header of a trace file, returning its list of players as dictionaries with a name and a type.
+    """
+    header = f.read(HEADER_SIZE)
+    if len(header) != HEADER_SIZE or not header.startswith(TRACE_MAGIC):
+        raise ValueError("Not a trace file.")
+
+    version = int.from_bytes(header[len(TRACE_MAGIC) : len(TRACE_MAGIC) + 4], "little")
+    if version != TRACE_VERSION:
+        raise ValueError(f"Unsupported trace version {version}.")
+
+    return json.loads(header[len(TRACE_MAGIC) + 4 :].decode())
+
+
+class TraceRecorder:
+    """
+    Records games to an append-only binary trace file, one fixed-width record per game, holding what is needed to
+    replay it: the seed, the seating, the deck order and every card played.
+    The file can be appended to across runs between the same players, and read back with TraceReader.
+    """
+
+    def __init__(self, filename: str, players: list):
+        self.players = list(players)
+        self.indices = {player.name: index for index, player in enumerate(players)}
+        header = _header(players)
+
+        if os.path.exists(filename) and os.path.getsize(filename) > 0:
+            with open(filename, "rb") as f:
+                existing = _read_header(f)
+            if existing != json.loads(header[len(TRACE_MAGIC) + 4 :].decode()):
+                raise ValueError(f"{filename} records games between other players.")
+            self.file = open(filename, "ab")
+        else:
+            self.file = open(filename, "wb")
+            self.file.write(header)
+
+    def attach(self, game: Game, seed=None, game_index: int = 0):
+        """
+        Starts recording a game, which must be attached after its players joined and before its match starts.
+        The record is written once the game ends.
+        """
+        record = np.zeros((), dtype=TRACE_DTYPE)
+        record["seed"] = seed if seed is not None else 0
+        record["game"] = game_index
+        record["flags"] = FLAG_SEEDED if seed is not None else 0
+        record["seating"] = NO_CARD
+        record["deck"] = [card.id for card in game.deck.cards]
+        record["plays"] = NO_CARD
+
+        plays = []
+        game.on_play(lambda event: plays.append(event.card.id))
+        game.on_game_end(lambda event: self._write(game, record, plays))
+
+    def _write(self, game: Game, record, plays: list):
+        players = game.player_pool.players
+        record["players"] = len(players)
+        record["seating"][: len(players)] = [self.indices[player.name] for player in players]
+        record["plays"][: len(plays)] = plays
+        self.file.write(record.tobytes())
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TraceReader:
+    """
+    Reads a trace file through a memory map, so any game can be looked up by index without reading the whole file.
+    """
+
+    def __init__(self, filename: str):
+        with open(filename, "rb") as f:
+            self.players = _read_header(f)
+
+        size = os.path.getsize(filename) - HEADER_SIZE
+        count = size // TRACE_DTYPE.itemsize
+        self.records = (
+            np.memmap(filename, dtype=TRACE_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+            if count
+            else np.zeros(0, dtype=TRACE_DTYPE)
+        )
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index: int):
+        return self.records[index]
+
+    def replay(self, index: int, tricks: int = None) -> Game:
+        """
+        Rebuilds a recorded game, played up to the given number of tricks (or to its end), by replaying its deck and
+        forcing every recorded play. Agents observe the replayed game as usual, so their state is rebuilt as well,
+        and the returned game can be played on from there.
+        """
+        record = self.records[index]
+        player_count = int(record["players"])
+        seating = record["seating"][:player_count]
+        plays = [CARDS[card_id] for card_id in record["plays"] if card_id != NO_CARD]
+
+        game = Game(log_level=logging.ERROR, headless=True)
+        game.deck.cards = [CARDS[card_id] for card_id in record["deck"]]
+
+        seated = []
+        for player_index in seating:
+            description = self.players[player_index]
+            player = getattr(agents, description["type"])(description["name"])
+            game.add_player(player)
+            seated.append(player)
+
+        # Forcing the recorded plays in place of the agents' decisions
+        replayed = iter(plays)
+        for player in seated:
+            player.action = lambda world: next(replayed)
+
+        game.start_match()
+        tricks = len(plays) // player_count if tricks is None else tricks
+        while len(game.tricks) < tricks and not game.is_over():
+            game.next_round()
+
+        for player in seated:
+            del player.action
+
+        return game
@@ -0,0 +1,75 @@
+import random
+from engine.structures import CARD_COUNT, Suit
+
+MAX_SEATS = 6
+
+# Locations a card can be in: the stock (including the face-up trump card), a seat's hand or pile, or a position in
+# the trick in progress. Cards left out of the deck, like the 2s with 3 or 6 players, are in none.
+STOCK = 0
+HAND = 1
+PILE = HAND + MAX_SEATS
+TRICK = PILE + MAX_SEATS
+LOCATIONS = TRICK + MAX_SEATS
+
+# Keys are drawn from a fixed seed, so hashes are the same in every process and can be stored
+_rng = random.Random("basis-zobrist")
+
+CARD_KEYS = tuple(tuple(_rng.getrandbits(64) for _ in range(CARD_COUNT)) for _ in range(LOCATIONS))
+TO_MOVE_KEYS = tuple(_rng.getrandbits(64) for _ in range(MAX_SEATS))
+TRUMP_KEYS = tuple(_rng.getrandbits(64) for _ in Suit)
+
+# Keys of the usual moves of a card, so each one is a single XOR: dealt from the stock to a seat's hand, played from
+# a seat's hand to a position in the trick, and won from a position in the trick into a seat's pile
+DEAL_KEYS = tuple(
+    tuple(CARD_KEYS[STOCK][card] ^ CARD_KEYS[HAND + seat][card] for card in range(CARD_COUNT))
+    for seat in range(MAX_SEATS)
+)
+PLAY_KEYS = tuple(
+    tuple(
+        tuple(CARD_KEYS[HAND + seat][card] ^ CARD_KEYS[TRICK + position][card] for card in range(CARD_COUNT))
+        for position in range(MAX_SEATS)
+    )
+    for seat in range(MAX_SEATS)
+)
+WIN_KEYS = tuple(
+    tuple(
+        tuple(CARD_KEYS[TRICK + position][card] ^ CARD_KEYS[PILE + seat][card] for card in range(CARD_COUNT))
+        for position in range(MAX_SEATS)
+    )
+    for seat in range(MAX_SEATS)
+)
+
+# Hash of a full deck in the stock, before anything is dealt
+STOCK_HASH = 0
+for _key in CARD_KEYS[STOCK]:
+    STOCK_HASH ^= _key
+
+
+def card_hash(location: int, mask: int) -> int:
+    """
+    Returns the hash of the cards of a mask being in a location.
+    """
+    keys = CARD_KEYS[location]
+    value = 0
+    while mask:
+        bit = mask & -mask
+        value ^= keys[bit.bit_length() - 1]
+        mask ^= bit
+    return value
+
+
+def state_hash(state) -> int:
+    """
+    Computes the hash of an engine.state.GameState from scratch: where every card is, the trick's contents, the seat
+    to move and the trump suit. The order of the cards left to draw is not part of it.
+    """
+    value = TO_MOVE_KEYS[state.to_move] ^ TRUMP_KEYS[state.trump]
+
+    for card in state.stock[state.drawn :]:
+        value ^= CARD_KEYS[STOCK][card]
+    for seat in range(state.players):
+        value ^= card_hash(HAND + seat, state.hands[seat]) ^ card_hash(PILE + seat, state.piles[seat])
+    for position, card in enumerate(state.trick):
+        value ^= CARD_KEYS[TRICK + position][card]
+
+    return value
@@ -8,6 +8,10 @@ from engine.players import Human, RandomAgent, SimpleGreedyAgent
 def player_change_callback(new_player):
     print("Callback called, new player: ", new_player)
 
+# Trick-end event hook
+def trick_end_callback(event):
+    print(f"{event.winner} takes the trick with {event.winning_card}, worth {event.points} points")
+
 # User input retrieval handler
 def human_input_handler():
     i = input("Pick a card (1-3): ")
@@ -30,6 +34,9 @@ game.add_player(player3)
 # Example of registering a callback hook (optional)
 game.player_pool.register_callback(player_change_callback)
 
+# Example of subscribing to game events (optional), see engine/events.py for all event types
+game.on_trick_end(trick_end_callback)
+
 # Starting match
 game.start_match()
 
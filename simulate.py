@@ -5,41 +5,149 @@ import sys
 import logging
 import matplotlib
 import numpy as np
-from random import shuffle
+from concurrent.futures import ProcessPoolExecutor
+from itertools import permutations, repeat
+import random
+from typing import NamedTuple
 from matplotlib import pyplot as plt
 from scipy.interpolate import make_interp_spline # For interpolation
-from engine.players import Player
+from engine.players import Player, ISMCTSAgent, ISMCTS_ITERATIONS
 from engine.game import Game
+from engine.structures import DECK_ORDER
+from engine.batch import BatchGame, BATCH_AGENTS
+from engine.trace import TraceRecorder
+from engine.memo import DecisionCache, DECISION_CACHE_ENTRIES
+from engine.tables import DecisionTables, DECISION_TABLES_FILE
 from utils.stats import StatsRecorder
+from utils.seeding import game_rng, batch_rng
 
 # Loading the available player types (excluding Human)
 PLAYER_TYPES = {clazz.__name__: clazz for clazz in Player.__subclasses__() if clazz.__name__ != 'Human'}
 
-def run_simulations(iterations, delay, player_types, graph, interpolate, output, display=True):
+# Number of shards handed to each worker process when running in parallel
+SHARDS_PER_WORKER = 4
+
+# Number of games the batch engine plays in lockstep at once
+BATCH_SIZE = 10000
+
+# Seat arrangements each deal is replayed with in duplicate mode
+DUPLICATE_MODES = ("rotations", "permutations")
+
+class RunOptions(NamedTuple):
+    """
+    How the games of a run are played and recorded, shared by every shard of it, so shards play exactly the games a
+    serial run would. Passed around as a whole, so no option can be mixed up with another.
+    """
+    delay: float = 0
+    seed: int = None  # Base seed, making every game reproducible from the seed and its index
+    keep_series: bool = False  # Whether the raw per-game results are kept
+    batch: bool = False  # Whether games are played with the batch engine
+    record_latency: bool = False
+    duplicate: str = None  # Seat arrangements of duplicate deals, if any (see DUPLICATE_MODES)
+    decision_cache: int = None  # Entries of the decision cache, if enabled
+    canonical: bool = False  # Whether the decision cache is keyed by suit-canonical positions
+    decision_tables: str = None  # File of the decision tables, if enabled
+    search_iterations: int = ISMCTS_ITERATIONS  # Iterations of ISMCTSAgent's search per move, None for no limit
+    search_time: float = None  # Time budget of ISMCTSAgent's search per move in seconds, if any
+
+def create_players(player_types, options=RunOptions()):
     player_instances = []
 
     # Create player instances based on the specified player types
     for i in range(len(player_types)):
         player_class = PLAYER_TYPES[player_types[i]]
         if player_class:
-            player_instance = player_class(f"Player {i + 1}")
+            # Search agents take the run's search budget
+            if player_class is ISMCTSAgent:
+                player_instance = player_class(f"Player {i + 1}", iterations=options.search_iterations, time_budget=options.search_time)
+            else:
+                player_instance = player_class(f"Player {i + 1}")
             player_instances.append(player_instance)
 
-    # Validate the number of players
-    if len(player_instances) < 2 or len(player_instances) > 6:
-        print('Invalid number of players. \nWhen using --player, specify between 2 and 6 players.')
-        sys.exit(1)
+    return player_instances
+
+def use_decision_cache(entries, canonical=False):
+    """
+    Enables the decision cache of deterministic agents in this process, with its hit counts reset. A cache of the same
+    size and kind already enabled is kept, so it is shared by every shard a worker process plays.
+    """
+    cache = Player.decision_cache
+    if cache is None or cache.max_entries != entries or cache.canonical != canonical:
+        cache = DecisionCache(entries, canonical)
+        Player.set_decision_cache(cache)
+    cache.reset_counts()
+    return cache
+
+def use_decision_tables(filename):
+    """
+    Makes the rule-based agents of this process decide from the decision tables in a file, memory-mapped once per
+    process, so they are shared by every shard a worker process plays.
+    """
+    tables = Player.decision_tables
+    if tables is None or tables.filename != filename:
+        tables = DecisionTables(filename)
+        Player.set_decision_tables(tables)
+    return tables
+
+def play_game(stats, player_instances, delay, rng=None, trace=None, seed=None, index=0):
+    """
+    Plays a single game. Given a seeded random number generator, the seating, the deck and every agent's decisions are reproducible.
+    If a trace recorder is given, the game is recorded to it along with its seed and index.
+    """
+    # Without a delay there is nothing to watch, so the game runs headless
+    game = Game(stats_recorder=stats, delay=delay, log_level=logging.ERROR, rng=rng, headless=not delay)
+
+    # Shuffle the player starting positions
+    seating = list(player_instances)
+    (rng or random).shuffle(seating)
+    
+    # Add player instances to the game
+    for player in seating:
+        if rng is not None:
+            player.set_rng(rng)
+        game.add_player(player)
 
-    stats = StatsRecorder()
+    if trace is not None:
+        trace.attach(game, seed=seed, game_index=index)
 
-    for i in range(iterations):
-        game = Game(stats_recorder=stats, delay=delay, log_level=logging.ERROR)
+    game.start_match()
+
+    while not game.is_over():
+        game.next_round()
+
+    return game
+
+def play_games(stats, player_instances, iterations, delay, display=False, seed=None, start=0, trace=None):
+    for i in range(start, start + iterations):
+        play_game(stats, player_instances, delay, rng=game_rng(seed, i), trace=trace, seed=seed, index=i)
+
+        if display:
+            print(f"Simulated game {i + 1}/{iterations}", end="\r")
 
-        # Shuffle the player starting positions
-        shuffle(player_instances)
-        
-        # Add player instances to the game
-        for player in player_instances:
+def seat_arrangements(player_instances, duplicate="rotations"):
+    """
+    Returns the seatings a duplicate deal is replayed with: every rotation of the players, so each of them plays from
+    every seat, or every permutation, so each of them also sits after every other.
+    """
+    if duplicate == "permutations":
+        return [list(seating) for seating in permutations(player_instances)]
+    return [player_instances[i:] + player_instances[:i] for i in range(len(player_instances))]
+
+def play_duplicate_deal(stats, player_instances, delay, rng=None, duplicate="rotations"):
+    """
+    Plays a single deal once per seat arrangement, every game dealing the same shuffled deck.
+    Given a seeded random number generator, the deal and every agent's decisions are reproducible.
+    """
+    rng = rng or random.Random()
+    deal = list(DECK_ORDER)
+    rng.shuffle(deal)
+
+    for seating in seat_arrangements(list(player_instances), duplicate):
+        game = Game(stats_recorder=stats, delay=delay, log_level=logging.ERROR, rng=rng, headless=not delay)
+        game.deck.cards = list(deal)
+
+        for player in seating:
+            player.set_rng(rng)
             game.add_player(player)
 
         game.start_match()
@@ -47,9 +155,132 @@ def run_simulations(iterations, delay, player_types, graph, interpolate, output,
         while not game.is_over():
             game.next_round()
 
+def play_duplicates(stats, player_instances, deals, delay, display=False, seed=None, start=0, duplicate="rotations"):
+    for i in range(start, start + deals):
+        play_duplicate_deal(stats, player_instances, delay, rng=game_rng(seed, i), duplicate=duplicate)
 
         if display:
-            print(f"Simulated game {i + 1}/{iterations}", end="\r")
+            print(f"Simulated deal {i + 1}/{deals}", end="\r")
+
+def play_batches(stats, player_instances, iterations, display=False, seed=None, start=0):
+    """
+    Plays games with the lockstep batch engine, BATCH_SIZE games at a time.
+    Each batch is seeded from the base seed and the index of its first game, so runs starting on batch boundaries are reproducible.
+    """
+    player_types = [player.type for player in player_instances]
+
+    for offset in range(0, iterations, BATCH_SIZE):
+        games = min(BATCH_SIZE, iterations - offset)
+        batch = BatchGame(player_types, games, rng=batch_rng(seed, start + offset))
+        batch.play().record(stats, player_instances)
+
+        if display:
+            print(f"Simulated game {offset + games}/{iterations}", end="\r")
+
+def simulate_shard(start, iterations, player_types, options=RunOptions()):
+    """
+    Plays a shard of the simulation inside a worker process, with its own players and stats recorder, returning a snapshot of the latter.
+    Games are numbered from start, so a seeded shard plays exactly the same games as a serial run would.
+    In duplicate mode, iterations and start count deals rather than games.
+    """
+    player_instances = create_players(player_types, options)
+    deal_size = len(seat_arrangements(player_instances, options.duplicate)) if options.duplicate else None
+    stats = StatsRecorder(keep_series=options.keep_series, record_latency=options.record_latency, deal_size=deal_size)
+    cache = use_decision_cache(options.decision_cache, options.canonical) if options.decision_cache else None
+    if options.decision_tables:
+        use_decision_tables(options.decision_tables)
+    if options.duplicate:
+        play_duplicates(stats, player_instances, iterations, options.delay, seed=options.seed, start=start, duplicate=options.duplicate)
+    elif options.batch:
+        play_batches(stats, player_instances, iterations, seed=options.seed, start=start)
+    else:
+        play_games(stats, player_instances, iterations, options.delay, seed=options.seed, start=start)
+    if cache is not None:
+        stats.add_decision_cache_counts(cache.counts)
+    return stats.snapshot()
+
+def run_parallel(iterations, player_types, workers, options=RunOptions(), display=True):
+    """
+    Shards the iterations across a pool of worker processes, merging every shard into a single stats recorder.
+    In duplicate mode, iterations are deals, and shards are cut on deal boundaries.
+    """
+    # Splitting in a few more shards than workers keeps the progress counter moving and the pool balanced
+    shard_count = min(iterations, workers * SHARDS_PER_WORKER)
+    shards = [iterations // shard_count + (i < iterations % shard_count) for i in range(shard_count)]
+    starts = [sum(shards[:i]) for i in range(shard_count)]
+
+    if options.batch:
+        # Batches are seeded from the index of their first game, so shards are cut on batch boundaries
+        starts = sorted({start - start % BATCH_SIZE for start in starts})
+        shards = [end - start for start, end in zip(starts, starts[1:] + [iterations])]
+
+    deal_size = len(seat_arrangements(player_types, options.duplicate)) if options.duplicate else None
+    stats = StatsRecorder(keep_series=options.keep_series, record_latency=options.record_latency, deal_size=deal_size)
+    completed = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for snapshot in executor.map(simulate_shard, starts, shards, repeat(player_types), repeat(options)):
+            shard_stats = StatsRecorder.from_snapshot(snapshot)
+            stats.merge(shard_stats)
+            completed += shard_stats.get_iterations() // (deal_size or 1)
+
+            if display:
+                print(f"Simulated {'deal' if options.duplicate else 'game'} {completed}/{iterations}", end="\r")
+
+    return stats
+
+def run_simulations(iterations, delay, player_types, graph, interpolate, output, display=True, workers=1, seed=None, batch=False, trace=None, latency=False, duplicate=None, decision_cache=None, canonical=False, decision_tables=None, search_iterations=ISMCTS_ITERATIONS, search_time=None):
+    options = RunOptions(
+        delay=delay,
+        seed=seed,
+        keep_series=graph,
+        batch=batch,
+        record_latency=latency,
+        duplicate=duplicate,
+        decision_cache=decision_cache,
+        canonical=canonical,
+        decision_tables=decision_tables,
+        search_iterations=search_iterations,
+        search_time=search_time,
+    )
+    player_instances = create_players(player_types, options)
+
+    # Validate the number of players
+    if len(player_instances) < 2 or len(player_instances) > 6:
+        print('Invalid number of players. \nWhen using --player, specify between 2 and 6 players.')
+        sys.exit(1)
+
+    # The batch engine only plays stateless agents, in lockstep, so there is no delay to watch either
+    if batch and any(player_type not in BATCH_AGENTS for player_type in player_types):
+        print(f'Invalid player types. \nWhen using --batch, only the following agents are available: {", ".join(BATCH_AGENTS)}.')
+        sys.exit(1)
+
+    # Worker processes each enable their own decision cache and map their own decision tables
+    parallel = workers > 1 and iterations > 1
+    cache = use_decision_cache(decision_cache, canonical) if decision_cache and not parallel else None
+    if decision_tables and not parallel:
+        use_decision_tables(decision_tables)
+
+    # The per-game series are only needed for plotting, otherwise stats take constant memory
+    if parallel:
+        stats = run_parallel(iterations, player_types, workers, options, display=display)
+    elif duplicate:
+        # Paired differences are computed over the raw results, which the recorder then keeps
+        stats = StatsRecorder(keep_series=graph, record_latency=latency, deal_size=len(seat_arrangements(player_instances, duplicate)))
+        play_duplicates(stats, player_instances, iterations, delay, display=display, seed=seed, duplicate=duplicate)
+    elif batch:
+        stats = StatsRecorder(keep_series=graph, record_latency=latency)
+        play_batches(stats, player_instances, iterations, display=display, seed=seed)
+    elif trace:
+        stats = StatsRecorder(keep_series=graph, record_latency=latency)
+        with TraceRecorder(trace, player_instances) as recorder:
+            play_games(stats, player_instances, iterations, delay, display=display, seed=seed, trace=recorder)
+    else:
+        stats = StatsRecorder(keep_series=graph, record_latency=latency)
+        play_games(stats, player_instances, iterations, delay, display=display, seed=seed)
+
+    if cache is not None:
+        stats.add_decision_cache_counts(cache.counts)
 
     if display:
         # Display stats table
@@ -64,51 +295,53 @@ def run_simulations(iterations, delay, player_types, graph, interpolate, output,
         # Save the data to file
         stats.save(output)
 
-    return [stats.get_player_stats(player) for player in stats.rank_players("wins")]
+    return [stats.get_player_stats(player_id) for player_id in stats.rank_players("wins")]
 
     
 
 def display_graph(stats, interpolate=False):
     bar_criteria = ['wins', 'draws', 'average_points_per_game', 'highest_game_turnover', 'average_points_per_trick', 'highest_trick_turnover']
-    line_criteria = ['game_turnovers']
 
-    generations = range(1, len(list(stats.player_stats.values())[0]['game_turnovers']) + 1)
     num_players = len(stats.player_stats)
     ranked_players = stats.rank_players()
 
+    # Per-game figures are aggregated from the columns of raw results, per-trick ones from the running stats
+    summary = stats.results.summary()
+    overall = {player_id: {**stats.get_player_stats(player_id), **summary[player_id]} for player_id in ranked_players}
+    generations = np.arange(1, summary[ranked_players[0]]['games'] + 1)
+
     # Bar chart for bar_criteria
     plt.figure("Overall Player Statistics")
     width = 0.2
     x = np.arange(num_players)
 
     for i, criterion in enumerate(bar_criteria):
-        y = [stats.get_player_stats(player)[criterion] for player in ranked_players]
+        y = [overall[player_id][criterion] for player_id in ranked_players]
         plt.bar(x + (i * width), y, width=width, label=criterion)
 
     plt.xlabel('Players')
     plt.ylabel('Value')
     plt.title('Overall Player Statistics')
-    plt.xticks(x + width * (len(bar_criteria) - 1) / 2, [f"{player.name} ({player.type})" for player in ranked_players])
+    plt.xticks(x + width * (len(bar_criteria) - 1) / 2, [f"{player_id} ({stats.player_stats[player_id]['type']})" for player_id in ranked_players])
     plt.grid(True)
     plt.legend()
 
-    # Line graph with smoothing for line_criteria
+    # Line graph with smoothing of the points per game
     plt.figure("Per-iteration Player Statistics")
-    for player in ranked_players:
-        for criterion in line_criteria:
-            y = stats.player_stats[player][criterion]
-
-            if interpolate:
-                # Perform spline interpolation for smoothing
-                # Choose number of points to interpolate based on the number of iterations
-                points = 100 if len(generations) < 100 else 1000 if len(generations) < 1000 else 10000
-                x = np.linspace(min(generations), max(generations), points)  # Increase the number of points for smoother curve
-                spl = make_interp_spline(generations, y, k=3)  # Cubic spline interpolation
-                y = spl(x)
-            else:
-                x = generations
+    for player_id in ranked_players:
+        y = stats.results.game_points(player_id)
 
-            plt.plot(x, y, label=f"{player.name} ({criterion})")
+        if interpolate:
+            # Perform spline interpolation for smoothing
+            # Choose number of points to interpolate based on the number of iterations
+            points = 100 if len(generations) < 100 else 1000 if len(generations) < 1000 else 10000
+            x = np.linspace(generations.min(), generations.max(), points)  # Increase the number of points for smoother curve
+            spl = make_interp_spline(generations, y, k=3)  # Cubic spline interpolation
+            y = spl(x)
+        else:
+            x = generations
+
+        plt.plot(x, y, label=f"{player_id} (game_turnovers)")
 
     plt.xlabel('Iterations')
     plt.ylabel('Values per player')
@@ -132,6 +365,17 @@ def main():
     parser.add_argument('--graph', action="store_true", help='Display graph')
     parser.add_argument('--interpolate', action="store_true", help='Interpolate graph, useful for large number of iterations')
     parser.add_argument('--output', default=None, action="store", help='Save data to file')
+    parser.add_argument('--seed', type=int, default=None, help='Base seed, making every game reproducible from the seed and its index')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes to shard the simulations across')
+    parser.add_argument('--trace', default=None, help='Record every game to a binary trace file, to be replayed with engine.trace.TraceReader')
+    parser.add_argument('--latency', action="store_true", help='Time every decision, reporting latency percentiles per agent and decision phase')
+    parser.add_argument('--batch', action="store_true", help='Play games in lockstep batches with the NumPy batch engine, for stateless agents only')
+    parser.add_argument('--decision-cache', nargs='?', type=int, const=DECISION_CACHE_ENTRIES, default=None, help=f'Cache the decisions of deterministic agents across games, keeping the given number of most recently used entries (default: {DECISION_CACHE_ENTRIES}), to report how often they repeat. Few decisions repeat, so runs are slower rather than faster')
+    parser.add_argument('--canonical', action='store_true', help='Also key the decision cache by suit-canonical positions, sharing decisions between positions equal up to a permutation of the suits')
+    parser.add_argument('--decision-tables', nargs='?', const=DECISION_TABLES_FILE, default=None, help=f'Play the rule-based agents from their precompiled decision tables, built with python -m engine.tables (default: {DECISION_TABLES_FILE})')
+    parser.add_argument('--duplicate', nargs='?', const="rotations", default=None, choices=DUPLICATE_MODES, help='Replay every deal with every seat rotation (or permutation) of the players, reporting paired differences; --iterations then counts deals')
+    parser.add_argument('--search-iterations', type=int, default=None, help=f'Iterations per decision of ISMCTSAgent (default: {ISMCTS_ITERATIONS}, or unbounded when only --search-time is given)')
+    parser.add_argument('--search-time', type=float, default=None, help='Time budget in seconds per decision of ISMCTSAgent, stopping at whichever of the two budgets runs out first')
     
 
     # Parse the arguments
@@ -142,6 +386,54 @@ def main():
         print('Invalid argument. --interpolate is only valid if --graph is specified.')
         sys.exit(1)
 
+    if args.batch and args.delay:
+        print('Invalid argument. --delay is not supported with --batch.')
+        sys.exit(1)
+
+    if args.latency and args.batch:
+        print('Invalid argument. --latency is not supported with --batch, which plays no individual decisions.')
+        sys.exit(1)
+
+    if args.decision_cache is not None and (args.batch or args.decision_cache < 1):
+        print('Invalid argument. --decision-cache takes a positive number of entries, and is not supported with --batch, which plays no individual decisions.')
+        sys.exit(1)
+
+    if args.canonical and args.decision_cache is None:
+        print('Invalid argument. --canonical is only supported with --decision-cache.')
+        sys.exit(1)
+
+    if args.decision_tables is not None:
+        if args.batch or args.decision_cache is not None:
+            print('Invalid argument. --decision-tables is not supported with --batch nor --decision-cache.')
+            sys.exit(1)
+
+        try:
+            DecisionTables(args.decision_tables).close()
+        except (OSError, ValueError) as e:
+            print(f'Invalid argument. --decision-tables could not be loaded: {e}')
+            sys.exit(1)
+
+    if args.duplicate and (args.batch or args.trace):
+        print('Invalid argument. --duplicate is not supported with --batch nor --trace.')
+        sys.exit(1)
+
+    if args.trace and (args.batch or args.workers > 1):
+        print('Invalid argument. --trace is only supported for serial runs, without --batch nor --workers.')
+        sys.exit(1)
+
+    if args.workers < 1:
+        print('Invalid argument. --workers must be at least 1.')
+        sys.exit(1)
+
+    if (args.search_iterations is not None and args.search_iterations < 1) or (args.search_time is not None and args.search_time <= 0):
+        print('Invalid argument. --search-iterations and --search-time must be positive.')
+        sys.exit(1)
+
+    # A time budget alone lets the search run until the deadline
+    search_iterations = args.search_iterations
+    if search_iterations is None and args.search_time is None:
+        search_iterations = ISMCTS_ITERATIONS
+
     # Flatting the player-argument list
     player_types = [item for sublist in args.player for item in sublist] if args.player else [
         "SimpleGreedyAgent", 
@@ -150,7 +442,7 @@ def main():
         "GreedyCountingAgent"]
 
     # Run the simulations
-    run_simulations(args.iterations, args.delay, player_types, graph=args.graph, interpolate=args.interpolate, output=args.output)
+    run_simulations(args.iterations, args.delay, player_types, graph=args.graph, interpolate=args.interpolate, output=args.output, workers=args.workers, seed=args.seed, batch=args.batch, trace=args.trace, latency=args.latency, duplicate=args.duplicate, decision_cache=args.decision_cache, canonical=args.canonical, decision_tables=args.decision_tables, search_iterations=search_iterations, search_time=args.search_time)
 
 if __name__ == '__main__':
     main()
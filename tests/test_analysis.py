@@ -0,0 +1,62 @@
+import math
+from types import SimpleNamespace
+import pytest
+from analysis import confidence_intervals, stopping_reason
+from utils.results import OUTCOME_LOSS, OUTCOME_WIN
+from utils.stats import StatsRecorder
+
+PLAYERS = [
+    SimpleNamespace(name="Player 1", type="SimpleGreedyAgent"),
+    SimpleNamespace(name="Player 2", type="RandomAgent"),
+]
+
+
+def match(games: int, wins: int, points=(40, 80)) -> StatsRecorder:
+    """
+    Returns the stats of a two-player match in which the first player wins the given number of games and loses the
+    others, scoring the given points in turn.
+    """
+    stats = StatsRecorder()
+    for game in range(games):
+        first = points[game % len(points)]
+        outcomes = [OUTCOME_WIN, OUTCOME_LOSS] if game < wins else [OUTCOME_LOSS, OUTCOME_WIN]
+        stats.add_game_result(PLAYERS, [first, 120 - first], outcomes, [5, 5])
+    return stats
+
+
+# Published 95% Wilson score intervals, as (wins, games, low, high)
+WILSON_INTERVALS = [
+    (8, 10, 0.4902, 0.9433),
+    (5, 10, 0.2366, 0.7634),
+    (0, 10, 0.0, 0.2775),
+    (10, 10, 0.7225, 1.0),
+    (50, 100, 0.4038, 0.5962),
+]
+
+
+@pytest.mark.parametrize("wins, games, low, high", WILSON_INTERVALS)
+def test_win_rates_use_wilson_intervals(wins, games, low, high):
+    intervals = confidence_intervals(match(games, wins), 1.96)
+
+    assert intervals["Player 1"]["win_rate"] == pytest.approx((wins / games, low, high), abs=1e-4)
+    assert intervals["Player 2"]["win_rate"] == pytest.approx(((games - wins) / games, 1 - high, 1 - low), abs=1e-4)
+
+
+def test_points_use_normal_intervals():
+    # Half of the games at 40 points and half at 80, so the sample standard deviation is 20 * sqrt(10 / 9)
+    intervals = confidence_intervals(match(10, 5), 1.96)
+
+    spread = 1.96 * 20 * math.sqrt(10 / 9) / math.sqrt(10)
+    assert intervals["Player 1"]["points_per_game"] == pytest.approx((60, 60 - spread, 60 + spread))
+    assert intervals["Player 2"]["points_per_game"] == pytest.approx((60, 60 - spread, 60 + spread))
+
+
+def test_stopping_reasons():
+    # 90 wins out of 100 give an interval of about (0.826, 0.945), well above the other player's (0.055, 0.174)
+    assert stopping_reason(match(100, 90), 1.96, 0.01, 0.5) == "significance"
+    assert stopping_reason(match(10, 5), 1.96, 0.01, 0.5) is None
+
+    # Over 10 games, intervals reach about 0.263 either side of the win rates, and 13.07 points of the points per game
+    assert stopping_reason(match(10, 5), 1.96, 0.27, 13.1) == "precision"
+    assert stopping_reason(match(10, 5), 1.96, 0.26, 13.1) is None
+    assert stopping_reason(match(10, 5), 1.96, 0.27, 13) is None
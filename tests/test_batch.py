@@ -0,0 +1,8 @@
+import pytest
+from engine.batch import BATCH_AGENTS, validate
+
+
+@pytest.mark.parametrize("player_count", range(2, 7))
+def test_batch_games_match_the_scalar_engine(player_count):
+    player_types = [BATCH_AGENTS[i % len(BATCH_AGENTS)] for i in range(player_count)]
+    assert validate(player_types, 200, seed=player_count) == 200
@@ -0,0 +1,72 @@
+import random
+import pytest
+from engine.canonical import CARD_MAPS, PERMUTATIONS, SUITS, canonicalize, permute_mask
+from engine.structures import CARDS, Card, Rank, Suit
+
+
+def random_position(rng: random.Random, unseen: bool):
+    """
+    Returns the arguments of canonicalize for a random position, with or without unseen cards.
+    """
+    cards = rng.sample(CARDS, 8)
+    hand = cards[: rng.randint(1, 3)]
+    table = cards[3 : 3 + rng.randint(0, 3)]
+    lead_suit = table[0].suit if table else None
+    trump_suit = rng.choice([None, *Suit])
+    mask = sum(1 << card.id for card in cards[6:]) if unseen else 0
+    return hand, table, lead_suit, trump_suit, mask
+
+
+def permute(position, index: int):
+    """
+    Returns the position with its suits permuted by the permutation of the given index.
+    """
+    hand, table, lead_suit, trump_suit, mask = position
+    mapping, permutation = CARD_MAPS[index], PERMUTATIONS[index]
+    return (
+        [mapping[card.id] for card in hand],
+        [mapping[card.id] for card in table],
+        SUITS[permutation[lead_suit.index]] if lead_suit is not None else None,
+        SUITS[permutation[trump_suit.index]] if trump_suit is not None else None,
+        permute_mask(mask, permutation),
+    )
+
+
+@pytest.mark.parametrize("unseen", [False, True])
+def test_inverse_returns_the_original_cards(unseen):
+    rng = random.Random(unseen)
+
+    for _ in range(5000):
+        hand, table, lead_suit, trump_suit, mask = random_position(rng, unseen)
+        canonical = canonicalize(hand, table, lead_suit, trump_suit, mask)
+
+        assert canonical.to_canonical(hand) == canonical.hand
+        assert canonical.to_canonical(table) == canonical.table
+        assert canonical.to_original(canonical.hand) == hand
+        assert canonical.to_original(canonical.to_canonical(CARDS)) == list(CARDS)
+        if trump_suit is not None:
+            assert canonical.trump_suit == SUITS[0]
+
+
+@pytest.mark.parametrize("unseen", [False, True])
+def test_positions_equal_up_to_suits_share_their_canonical_form(unseen):
+    rng = random.Random(unseen)
+
+    for _ in range(5000):
+        position = random_position(rng, unseen)
+        expected = canonicalize(*position)[:-1]
+        assert canonicalize(*permute(position, rng.randrange(len(PERMUTATIONS))))[:-1] == expected
+
+
+def test_lead_suit_is_ordered_after_trump():
+    # Trump leads the trick, so only the lead suit tells these positions apart from ones with another lead suit
+    hand = [Card(Rank.ACE, Suit.DIAMONDS), Card(Rank.TWO, Suit.SPADES)]
+    table = [Card(Rank.KING, Suit.HEARTS)]
+    canonical = canonicalize(hand, table, Suit.DIAMONDS, Suit.HEARTS)
+
+    assert canonical.trump_suit == SUITS[0]
+    assert canonical.lead_suit == SUITS[1]
+    assert canonical.hand == [Card(Rank.ACE, SUITS[1]), Card(Rank.TWO, SUITS[2])]
+
+    swapped = canonicalize([Card(Rank.ACE, Suit.SPADES), Card(Rank.TWO, Suit.DIAMONDS)], table, Suit.SPADES, Suit.HEARTS)
+    assert swapped[:-1] == canonical[:-1]
@@ -0,0 +1,79 @@
+import random
+import pytest
+from engine.endgame import EndgameSolver
+from engine.game import Trick
+from engine.structures import CARDS, CardSet, Suit
+
+
+def points(cards) -> int:
+    return sum(card.points for card in cards)
+
+
+def play_value(hand: frozenset, opponent: frozenset, trump: Suit, lead, card) -> int:
+    """
+    Returns the points the player to move wins from here on by playing a card, trying every line of play after it.
+    The lead is the card the opponent led in the current trick, if any.
+    """
+    left = hand - {card}
+
+    # Leading the trick, the opponent is to move, and wins whatever the player to move doesn't
+    if lead is None:
+        return points(hand | opponent) - minimax(opponent, left, trump, card)
+
+    trick = Trick()
+    trick.set_starting_suit(lead.suit)
+    trick.add_play("opponent", lead)
+    trick.add_play("mover", card)
+    winner, _ = trick.calc_winner(trump)
+
+    if winner == "mover":
+        return lead.points + card.points + minimax(left, opponent, trump)
+    return points(left | opponent) - minimax(opponent, left, trump)
+
+
+def minimax(hand: frozenset, opponent: frozenset, trump: Suit, lead=None) -> int:
+    """
+    Returns the points the player to move wins from here on with perfect play from both sides, by brute force.
+    """
+    if not hand:
+        return 0
+    return max(play_value(hand, opponent, trump, lead, card) for card in hand)
+
+
+def random_endgame(rng: random.Random, size: int, leading: bool):
+    """
+    Deals two random hands of the given size, the opponent having led one more card if the player to move isn't leading.
+    """
+    cards = rng.sample(CARDS, 2 * size + (not leading))
+    lead = None if leading else cards[-1]
+    return frozenset(cards[:size]), frozenset(cards[size : 2 * size]), rng.choice(list(Suit)), lead
+
+
+@pytest.mark.parametrize("size", [1, 2, 3])
+@pytest.mark.parametrize("leading", [True, False])
+def test_best_card_matches_minimax(size, leading):
+    rng = random.Random(size * 2 + leading)
+    solver = EndgameSolver()
+
+    for _ in range(300):
+        hand, opponent, trump, lead = random_endgame(rng, size, leading)
+        card, value = solver.best_card(CardSet(hand), CardSet(opponent), trump, lead)
+
+        expected = minimax(hand, opponent, trump, lead)
+        assert value == expected
+        assert solver.solve(CardSet(hand), CardSet(opponent), trump, lead) == expected
+
+        # The card picked must itself secure those points
+        assert card in hand
+        assert play_value(hand, opponent, trump, lead, card) == expected
+
+
+def test_bounded_table_still_solves_exactly():
+    # A table too small for a single search is cleared mid-search, which must only cost lookups
+    rng = random.Random(0)
+    solver = EndgameSolver(max_entries=4)
+
+    for _ in range(300):
+        hand, opponent, trump, lead = random_endgame(rng, 3, rng.random() < 0.5)
+        assert solver.solve(CardSet(hand), CardSet(opponent), trump, lead) == minimax(hand, opponent, trump, lead)
+        assert len(solver.table) <= 4
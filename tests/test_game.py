@@ -0,0 +1,100 @@
+import logging
+import random
+import pytest
+from engine import players as agents
+from engine.game import Game, Trick
+from engine.players import RandomAgent
+from engine.structures import CARDS, Card, Rank, Suit
+from utils.seeding import game_rng
+
+# Agents seated at the table, in order, when comparing headless games with regular ones
+SEATED_AGENTS = [
+    "SimpleGreedyAgent",
+    "MinimizePointLossGreedyAgent",
+    "MPLGreedyTrumpSaveAgent",
+    "MPLGreedyTrumpBasedAgent",
+    "GreedyCountingAgent",
+    "RandomAgent",
+]
+
+
+def play_trick(cards: list, trump: Suit):
+    """
+    Plays a trick with one card per player, in order, returning the players and the winning play.
+    """
+    players = [RandomAgent(f"Player {i + 1}") for i in range(len(cards))]
+    trick = Trick()
+    trick.set_starting_suit(cards[0].suit)
+    for player, card in zip(players, cards):
+        trick.add_play(player, card)
+    return players, trick.calc_winner(trump)
+
+
+def test_later_higher_card_of_the_starting_suit_takes_the_trick_back_from_a_trump():
+    cards = [Card(Rank.TWO, Suit.SPADES), Card(Rank.TWO, Suit.HEARTS), Card(Rank.ACE, Suit.SPADES)]
+    players, (winner, card) = play_trick(cards, Suit.HEARTS)
+    assert winner is players[2]
+    assert card is Card(Rank.ACE, Suit.SPADES)
+
+
+def test_trump_keeps_the_trick_against_a_later_lower_card_of_the_starting_suit():
+    cards = [Card(Rank.TWO, Suit.SPADES), Card(Rank.TWO, Suit.HEARTS), Card(Rank.THREE, Suit.SPADES)]
+    players, (winner, card) = play_trick(cards, Suit.HEARTS)
+    assert winner is players[2]
+
+
+def test_highest_trump_wins():
+    cards = [Card(Rank.KING, Suit.SPADES), Card(Rank.TWO, Suit.HEARTS), Card(Rank.SEVEN, Suit.HEARTS)]
+    players, (winner, _) = play_trick(cards, Suit.HEARTS)
+    assert winner is players[2]
+
+
+def test_highest_card_of_the_starting_suit_wins_without_trumps():
+    cards = [Card(Rank.KING, Suit.SPADES), Card(Rank.ACE, Suit.CLUBS), Card(Rank.SEVEN, Suit.SPADES)]
+    players, (winner, _) = play_trick(cards, Suit.HEARTS)
+    assert winner is players[2]
+
+
+def baseline_winner(cards: list, trump: Suit) -> int:
+    """
+    Returns the position of the winning card, following the original rule card by card.
+    """
+    winning = 0
+    for position, card in enumerate(cards):
+        if card.suit == cards[0].suit and card.rank > cards[winning].rank:
+            winning = position
+        elif card.suit == trump and (cards[winning].suit != trump or card.rank > cards[winning].rank):
+            winning = position
+    return winning
+
+
+def test_winner_follows_the_original_rule():
+    rng = random.Random(0)
+    for _ in range(20000):
+        cards = rng.sample(CARDS, rng.randint(2, 6))
+        trump = rng.choice(list(Suit))
+        players, (winner, _) = play_trick(cards, trump)
+        assert winner is players[baseline_winner(cards, trump)]
+
+
+def play_seeded(player_count: int, index: int, headless: bool) -> tuple:
+    """
+    Plays a seeded game, returning each trick's cards and winner, and each player's points, players being named.
+    """
+    game = Game(log_level=logging.ERROR, rng=game_rng(5, index), headless=headless, delay=0)
+    for i, player_type in enumerate(SEATED_AGENTS[:player_count]):
+        game.add_player(getattr(agents, player_type)(f"Player {i + 1}", rng=random.Random(index * 10 + i)))
+
+    game.start_match()
+    while not game.is_over():
+        game.next_round()
+
+    tricks = [([card.id for card in trick.cards], trick.get_winner().name) for trick in game.tricks]
+    points = {player.name: player.get_points() for player in game.player_pool.players}
+    return tricks, points
+
+
+@pytest.mark.parametrize("player_count", range(2, 7))
+def test_headless_games_are_the_same_games(player_count):
+    for index in range(20):
+        assert play_seeded(player_count, index, headless=True) == play_seeded(player_count, index, headless=False)
@@ -0,0 +1,169 @@
+import logging
+import random
+import pytest
+from engine.game import Game
+from engine.mcts import InformationSetSearch, SearchState
+from engine.players import ISMCTSAgent, MPLGreedyTrumpSaveAgent, SimpleGreedyAgent
+from engine.structures import CARD_COUNT
+from utils.seeding import game_rng
+
+
+class CheckedAgent(ISMCTSAgent):
+    """
+    An ISMCTSAgent running a check before each of its decisions, recording what each check returned and the cards it
+    played.
+    """
+
+    def __init__(self, name, check, **kwargs):
+        super().__init__(name, rng=random.Random(name), **kwargs)
+        self.check = check
+        self.checks = []
+        self.played = []
+
+    def action(self, world):
+        self.checks.append(self.check(self, world))
+        card = super().action(world)
+        self.played.append((list(self.hand), card))
+        return card
+
+
+def play(agent: CheckedAgent, player_count: int, index: int) -> Game:
+    """
+    Plays a seeded game of the agent against greedy agents, the agent sitting in the seat given by the game index.
+    """
+    game = Game(log_level=logging.ERROR, headless=True, rng=game_rng(11, index))
+    opponents = [SimpleGreedyAgent, MPLGreedyTrumpSaveAgent]
+    players = [opponents[i % 2](f"Player {i + 2}", rng=random.Random(i)) for i in range(player_count - 1)]
+    players.insert(index % player_count, agent)
+    for player in players:
+        game.add_player(player)
+
+    game.start_match()
+    while not game.is_over():
+        game.next_round()
+    return game
+
+
+def check_determinizations(agent, world) -> bool:
+    """
+    Checks that determinizations only deal each opponent cards it may hold, and the stock the cards left to draw,
+    returning whether an opponent was known to hold the face-up trump card.
+    """
+    search = agent.search
+    players = world.player_pool.players
+    base, unseen, opponents = search._base_state(world, agent)
+    state = SearchState(base.players, base.trump)
+    state.unseen = [card for card in range(CARD_COUNT) if unseen >> card & 1]
+
+    # The cards the agent can't see are exactly those in the other hands and the deck
+    hidden = world.deck.card_set.mask
+    for other in players:
+        if other is not agent:
+            hidden |= other.hand_set.mask
+    known = 0
+    for _, _, hand in opponents:
+        known |= hand
+    assert unseen | known == hidden
+    assert not unseen & known
+
+    # Once dealt, the face-up trump card is known to be in its receiver's hand until played
+    deal = search.trump_deal
+    if world.trump_card is None and deal.player is not agent and deal.card in deal.player.hand:
+        assert known == 1 << deal.card.id
+    else:
+        assert known == 0
+
+    face_up = 1 << world.trump_card.id if world.trump_card is not None else 0
+    rng = random.Random(len(world.tricks))
+    for _ in range(20):
+        state.copy_from(base)
+        search._determinize(state, opponents, rng)
+
+        dealt = 0
+        for seat, _, hand in opponents:
+            assert state.hands[seat] & hand == hand
+            assert state.hands[seat].bit_count() == len(players[seat].hand)
+            assert not dealt & state.hands[seat]
+            dealt |= state.hands[seat]
+
+        stock = 0
+        for card in state.stock[: state.stock_size]:
+            assert not (dealt | stock) >> card & 1
+            stock |= 1 << card
+        assert state.stock_size == len(world.deck) + (face_up != 0)
+        assert dealt | stock == hidden | face_up
+        if face_up:
+            assert state.stock[state.stock_size - 1] == world.trump_card.id
+
+    return known != 0
+
+
+@pytest.mark.parametrize("player_count", [2, 3, 4])
+def test_determinizations_only_deal_cards_players_may_hold(player_count):
+    pinned = False
+    for index in range(3):
+        agent = CheckedAgent("Player 1", check_determinizations, iterations=20)
+        game = play(agent, player_count, index)
+        assert len(agent.played) == len(game.tricks)
+        pinned |= any(agent.checks)
+    assert pinned
+
+
+@pytest.mark.parametrize("budget", [{"iterations": 50}, {"iterations": None, "time_budget": 0.002}])
+def test_agent_only_plays_cards_in_hand(budget):
+    for index in range(4):
+        agent = CheckedAgent("Player 1", lambda agent, world: None, **budget)
+        game = play(agent, 2 + index % 3, index)
+        assert game.is_over()
+        assert len(agent.played) == len(game.tricks)
+        for hand, card in agent.played:
+            assert card in hand
+
+
+def test_tree_is_reused_along_the_observed_plays():
+    plays = []
+    decisions = []  # How many cards had been played at each decision
+    reused = []
+
+    def check_reuse(agent, world):
+        search = agent.search
+        if decisions:
+            # Every card played since the last decision was observed, in order
+            assert search.history == plays[decisions[-1] :]
+        decisions.append(len(plays))
+        if search.root is None:
+            return
+
+        node = search.root
+        for card in search.history:
+            node = node.children.get(card) if node is not None else None
+        reused.append(node)
+
+    agent = CheckedAgent("Player 1", check_reuse, iterations=200)
+
+    original = agent.search.decide
+
+    def decide(world, player, rng):
+        card = original(world, player, rng)
+        if reused and reused[-1] is not None:
+            # The subtree of the position reached is kept as the new root, detached from the old tree
+            assert agent.search.root is reused[-1]
+            assert agent.search.root.parent is None
+        return card
+
+    agent.search.decide = decide
+
+    game = Game(log_level=logging.ERROR, headless=True, rng=game_rng(11, 0))
+    game.add_player(agent)
+    game.add_player(SimpleGreedyAgent("Player 2", rng=random.Random(0)))
+    game.on_play(lambda event: plays.append(event.card.id))
+    game.start_match()
+    while not game.is_over():
+        game.next_round()
+
+    assert reused and any(node is not None for node in reused)
+
+
+def test_search_needs_a_budget():
+    with pytest.raises(ValueError):
+        InformationSetSearch(iterations=None, time_budget=None)
@@ -0,0 +1,123 @@
+from types import SimpleNamespace
+import pytest
+from engine.game import Trick
+from engine.memo import DecisionCache
+from engine.players import MinimizePointLossGreedyAgent, Player, SimpleGreedyAgent
+from engine.structures import Card, Rank, Suit
+from simulate import RunOptions, simulate_shard
+
+CACHED_AGENTS = ["SimpleGreedyAgent", "MinimizePointLossGreedyAgent", "MPLGreedyTrumpSaveAgent", "MPLGreedyTrumpBasedAgent"]
+
+
+@pytest.fixture(autouse=True)
+def no_decision_cache():
+    # Shards enable the cache for the whole process, which other tests mustn't inherit
+    yield
+    Player.set_decision_cache(None)
+
+
+def play(**options) -> dict:
+    return simulate_shard(0, 300, CACHED_AGENTS, RunOptions(seed=3, keep_series=True, **options))
+
+
+def position(hand: list, table: list = (), trump: Suit = Suit.HEARTS):
+    """
+    Returns the hand, and a world with a trick of the given cards.
+    """
+    trick = Trick()
+    if table:
+        trick.set_starting_suit(table[0].suit)
+    for card in table:
+        trick.add_play(None, card)
+    return list(hand), SimpleNamespace(current_trick=trick, trump_suit=trump, headless=True)
+
+
+def lookup(cache: DecisionCache, player, hand: list, world, computed: list) -> list:
+    player.hand = list(hand)
+
+    def choices(world):
+        computed.append(1)
+        return player.choices(world)
+
+    return cache.lookup(player, world, choices)
+
+
+def test_cached_games_match_uncached():
+    expected = play()["results"]
+    assert play(decision_cache=1 << 18)["results"] == expected
+
+    # A cache small enough to evict decisions all along must not change them either
+    assert play(decision_cache=64)["results"] == expected
+
+    # Nor must sharing decisions between positions equal up to a permutation of the suits
+    assert play(decision_cache=1 << 18, canonical=True)["results"] == expected
+    assert play(decision_cache=64, canonical=True)["results"] == expected
+
+
+@pytest.mark.parametrize("canonical", [False, True])
+def test_every_decision_is_counted_once(canonical):
+    counts = play(decision_cache=1 << 18, canonical=canonical)["decision_cache"]
+    assert sorted(counts) == sorted(CACHED_AGENTS)
+
+    # Each of the 4 players plays 10 cards a game
+    for player_type, (hits, misses) in counts.items():
+        assert hits + misses == 300 * 10, player_type
+
+
+def test_hits_and_misses():
+    cache = DecisionCache()
+    player = MinimizePointLossGreedyAgent("Player 1")
+    computed = []
+    hand = [Card(Rank.ACE, Suit.SPADES), Card(Rank.TWO, Suit.CLUBS), Card(Rank.KING, Suit.HEARTS)]
+
+    hand, world = position(hand, [Card(Rank.SEVEN, Suit.SPADES)])
+    first = lookup(cache, player, hand, world, computed)
+    assert lookup(cache, player, hand, world, computed) == first
+    assert cache.counts == {"MinimizePointLossGreedyAgent": [1, 1]}
+    assert len(computed) == 1
+
+    # Tables with the same leading card share a decision
+    _, world = position(hand, [Card(Rank.SEVEN, Suit.SPADES), Card(Rank.TWO, Suit.SPADES)])
+    assert lookup(cache, player, hand, world, computed) == first
+    assert cache.counts == {"MinimizePointLossGreedyAgent": [2, 1]}
+
+    # Hand order breaks ties, so it is part of the key, as is the agent type
+    lookup(cache, player, list(reversed(hand)), world, computed)
+    lookup(cache, SimpleGreedyAgent("Player 2"), hand, world, computed)
+    assert cache.counts == {"MinimizePointLossGreedyAgent": [2, 2], "SimpleGreedyAgent": [0, 1]}
+    assert len(computed) == 3
+
+    cache.reset_counts()
+    assert cache.counts == {"MinimizePointLossGreedyAgent": [0, 0], "SimpleGreedyAgent": [0, 0]}
+
+
+def test_positions_equal_up_to_suits_share_decisions():
+    cache = DecisionCache(canonical=True)
+    player = MinimizePointLossGreedyAgent("Player 1")
+    computed = []
+
+    hand, world = position([Card(Rank.ACE, Suit.SPADES), Card(Rank.TWO, Suit.CLUBS)], [Card(Rank.SEVEN, Suit.SPADES)])
+    lookup(cache, player, hand, world, computed)
+
+    # Swapping spades and diamonds, the decision is found, and mapped back to this position's cards
+    hand, world = position([Card(Rank.ACE, Suit.DIAMONDS), Card(Rank.TWO, Suit.CLUBS)], [Card(Rank.SEVEN, Suit.DIAMONDS)])
+    player.hand = list(hand)
+    assert lookup(cache, player, hand, world, computed) == player.choices(world)
+    assert cache.counts == {"MinimizePointLossGreedyAgent": [1, 1]}
+    assert len(computed) == 1
+
+
+def test_entries_are_bounded():
+    cache = DecisionCache(max_entries=8)
+    player = SimpleGreedyAgent("Player 1")
+    computed = []
+
+    for rank in Rank:
+        for suit in Suit:
+            hand, world = position([Card(rank, suit)])
+            lookup(cache, player, hand, world, computed)
+            assert len(cache.entries) <= 8
+
+    # The most recent decisions are kept
+    assert lookup(cache, player, hand, world, computed) == hand
+    assert cache.counts["SimpleGreedyAgent"] == [1, 40]
@@ -0,0 +1,48 @@
+import math
+import pytest
+from utils.results import OUTCOME_DRAW, OUTCOME_LOSS, OUTCOME_WIN, ResultsStore
+
+W, D, L = OUTCOME_WIN, OUTCOME_DRAW, OUTCOME_LOSS
+
+# Three duplicate deals of two games, the players swapping seats, then the first game of an unfinished deal
+GAMES = [
+    (["A", "B"], [70, 50], [W, L]),
+    (["B", "A"], [80, 40], [W, L]),
+    (["A", "B"], [90, 30], [W, L]),
+    (["B", "A"], [60, 60], [D, D]),
+    (["A", "B"], [60, 60], [D, D]),
+    (["B", "A"], [100, 20], [W, L]),
+    (["A", "B"], [120, 0], [W, L]),
+]
+
+
+def test_paired_differences_of_a_hand_built_table():
+    store = ResultsStore()
+    for agents, points, outcomes in GAMES:
+        store.append_game(agents, points, outcomes, [5, 5])
+
+    (pair,) = store.paired_differences(deal_size=2)
+    assert pair["player"] == "A" and pair["opponent"] == "B"
+    assert pair["deals"] == 3
+
+    # A averages 55, 75 and 40 points over the deals, and B 65, 45 and 80, so the differences are -10, 30 and -40,
+    # with a sample variance of 3700 / 3. The unfinished deal is left out.
+    spread = 1.96 * math.sqrt(3700 / 3) / math.sqrt(3)
+    assert pair["points_difference"] == pytest.approx(-20 / 3)
+    assert pair["points_interval"] == pytest.approx((-20 / 3 - spread, -20 / 3 + spread))
+
+    # A wins half of the second deal, and B half of the third, so the differences are 0, 0.5 and -0.5
+    spread = 1.96 * 0.5 / math.sqrt(3)
+    assert pair["win_rate_difference"] == pytest.approx(0)
+    assert pair["win_rate_interval"] == pytest.approx((-spread, spread))
+
+
+def test_paired_difference_intervals_scale_with_z():
+    store = ResultsStore()
+    for agents, points, outcomes in GAMES:
+        store.append_game(agents, points, outcomes, [5, 5])
+
+    (pair,) = store.paired_differences(deal_size=2, z=1.0)
+    (wide,) = store.paired_differences(deal_size=2, z=2.0)
+    mean, (low, high) = pair["points_difference"], pair["points_interval"]
+    assert wide["points_interval"] == pytest.approx((2 * low - mean, 2 * high - mean))
@@ -0,0 +1,19 @@
+import pytest
+from simulate import RunOptions, run_parallel, simulate_shard
+from utils.stats import StatsRecorder
+
+PLAYER_TYPES = ["SimpleGreedyAgent", "RandomAgent", "GreedyCountingAgent"]
+
+
+@pytest.mark.parametrize("duplicate", [None, "rotations"])
+def test_seeded_parallel_run_matches_a_serial_one(duplicate):
+    options = RunOptions(seed=5, keep_series=True, duplicate=duplicate)
+    serial = StatsRecorder.from_snapshot(simulate_shard(0, 60, PLAYER_TYPES, options))
+    parallel = run_parallel(60, PLAYER_TYPES, 3, options, display=False)
+
+    assert parallel.get_iterations() == serial.get_iterations()
+    assert parallel.snapshot()["results"] == serial.snapshot()["results"]
+
+    # Running means and deviations are merged from the shards', so they only agree up to rounding
+    for player_id in serial.player_stats:
+        assert parallel.get_player_stats(player_id) == pytest.approx(serial.get_player_stats(player_id))
@@ -0,0 +1,61 @@
+import logging
+import random
+import pytest
+from engine.game import Game
+from engine.players import RandomAgent
+from engine.state import GameState
+from engine.structures import CARD_COUNT
+from utils.seeding import game_rng
+
+
+@pytest.mark.parametrize("players", range(2, 7))
+def test_undo_reverts_every_apply(players):
+    rng = random.Random(players)
+
+    for _ in range(20):
+        deck = list(range(CARD_COUNT))
+        rng.shuffle(deck)
+        state = GameState.deal(deck, players)
+
+        # Playing a random game out, then taking every card back
+        history = [state]
+        moves = []
+        while not state.is_over():
+            card = rng.choice(state.legal_moves())
+            state = state.apply(card)
+            history.append(state)
+            moves.append(card)
+
+        for card in reversed(moves):
+            state = state.undo(card)
+            history.pop()
+            assert state == history[-1]
+
+
+def test_undo_refuses_a_card_other_than_the_last_played():
+    state = GameState.deal(list(range(CARD_COUNT)), 2)
+    first, second = state.legal_moves()[:2]
+    with pytest.raises(ValueError):
+        state.apply(first).undo(second)
+
+
+@pytest.mark.parametrize("players", range(2, 7))
+def test_export_state_matches_the_moves_applied_since(players):
+    game = Game(log_level=logging.ERROR, headless=True, rng=game_rng(players, 0))
+    for i in range(players):
+        game.add_player(RandomAgent(f"Player {i + 1}", rng=random.Random(i)))
+
+    plays = []
+    game.on_play(lambda event: plays.append(event.card.id))
+    game.start_match()
+    state = game.export_state()
+
+    while not game.is_over():
+        game.next_round()
+        for card in plays:
+            state = state.apply(card)
+        plays.clear()
+
+        # Exported states start from the cards left to draw, and keep no tricks to undo
+        exported = game.export_state()
+        assert state._replace(stock=state.stock[state.drawn :], drawn=0, completed=()) == exported
@@ -0,0 +1,194 @@
+import random
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from simulate import simulate_shard, RunOptions
+from utils.results import OUTCOME_LOSS, OUTCOME_WIN, ResultsStore
+from utils.stats import DECISION_PHASES, LatencyStat, RunningStat, StatsRecorder
+
+PLAYERS = ["SimpleGreedyAgent", "RandomAgent", "GreedyCountingAgent"]
+
+# Options of shards which can't be merged with shards played with the default ones
+OTHER_CONFIGURATIONS = [{"record_latency": True}, {"duplicate": "rotations"}, {"duplicate": "permutations"}]
+
+
+def shard(player_types: list, keep_series: bool = False, start: int = 0, iterations: int = 5, **options):
+    options = RunOptions(seed=1, keep_series=keep_series, **options)
+    return StatsRecorder.from_snapshot(simulate_shard(start, iterations, player_types, options))
+
+
+def assert_same_stat(stat: RunningStat, expected: RunningStat):
+    assert (stat.count, stat.total, stat.max) == (expected.count, expected.total, expected.max)
+    assert stat.histogram == expected.histogram
+    assert stat.mean == pytest.approx(expected.mean)
+    assert stat.m2 == pytest.approx(expected.m2)
+
+
+def assert_same_stats(stats: StatsRecorder, expected: StatsRecorder):
+    """
+    Asserts two recorders hold the same stats, up to rounding of the moments.
+    """
+    assert stats.player_stats.keys() == expected.player_stats.keys()
+    for player_id, player_stats in stats.player_stats.items():
+        other = expected.player_stats[player_id]
+        for key in ("type", "wins", "losses", "draws"):
+            assert player_stats[key] == other[key]
+        assert_same_stat(player_stats["trick_points"], other["trick_points"])
+        assert_same_stat(player_stats["game_points"], other["game_points"])
+        for phase in DECISION_PHASES:
+            assert player_stats["latency"][phase].count == other["latency"][phase].count
+
+    if expected.results is not None:
+        assert stats.results.snapshot() == expected.results.snapshot()
+
+
+def test_merge_matches_players_by_id_and_type():
+    stats = shard(["SimpleGreedyAgent", "RandomAgent"])
+    stats.merge(shard(["SimpleGreedyAgent", "RandomAgent"]))
+    assert stats.get_iterations() == 10
+
+
+def test_merge_refuses_another_type_under_the_same_id():
+    stats = shard(["SimpleGreedyAgent", "RandomAgent"])
+    with pytest.raises(ValueError):
+        stats.merge(shard(["RandomAgent", "SimpleGreedyAgent"]))
+
+
+def test_merge_refuses_to_drop_raw_results():
+    with pytest.raises(ValueError):
+        shard(["SimpleGreedyAgent", "RandomAgent"], keep_series=True).merge(shard(["SimpleGreedyAgent", "RandomAgent"]))
+    with pytest.raises(ValueError):
+        shard(["SimpleGreedyAgent", "RandomAgent"]).merge(shard(["SimpleGreedyAgent", "RandomAgent"], keep_series=True))
+
+
+@pytest.mark.parametrize("sizes", [(0, 5), (5, 0), (1, 1), (7, 30), (100, 3)])
+def test_running_stats_merge_like_the_combined_values(sizes):
+    rng = random.Random(sum(sizes))
+    # Values above the last histogram bucket are counted in it
+    first, second = ([rng.randint(0, 130) for _ in range(size)] for size in sizes)
+
+    expected = RunningStat()
+    for value in first + second:
+        expected.add(value)
+
+    assert_same_stat(RunningStat.from_values(first).merge(RunningStat.from_values(second)), expected)
+    assert_same_stat(RunningStat.from_values(first + second), expected)
+    assert expected.variance() == pytest.approx(np.var(first + second, ddof=1) if len(first + second) > 1 else 0.0)
+
+
+def test_latency_stats_merge_like_the_combined_values():
+    rng = random.Random(0)
+    values = [rng.randint(0, 1 << 30) for _ in range(300)]
+
+    expected, first, second = LatencyStat(), LatencyStat(), LatencyStat()
+    for index, value in enumerate(values):
+        expected.add(value)
+        (first if index < 100 else second).add(value)
+
+    merged = first.merge(second)
+    assert merged.snapshot() == expected.snapshot()
+    assert LatencyStat.from_snapshot(merged.snapshot()).summary() == expected.summary()
+
+
+@pytest.mark.parametrize("options", [{}, {"keep_series": True, "record_latency": True}, {"duplicate": "rotations"}])
+def test_merged_shards_match_a_single_run(options):
+    # In duplicate mode, shards count deals of 3 games, which must be merged on deal boundaries
+    expected = shard(PLAYERS, start=0, iterations=9, **options)
+    first = shard(PLAYERS, start=0, iterations=4, **options)
+    second = shard(PLAYERS, start=4, iterations=5, **options)
+
+    assert_same_stats(StatsRecorder.merge_all([first, second]), expected)
+    assert_same_stats(first.merge(second), expected)
+
+
+def test_merge_all_leaves_its_inputs_unchanged():
+    recorders = [shard(PLAYERS, keep_series=True, start=start, iterations=3) for start in range(0, 15, 3)]
+    snapshots = [recorder.snapshot() for recorder in recorders]
+
+    merged = StatsRecorder.merge_all(recorders)
+    assert merged.get_iterations() == 15
+    assert all(merged is not recorder for recorder in recorders)
+    assert [recorder.snapshot() for recorder in recorders] == snapshots
+    assert_same_stats(merged, shard(PLAYERS, keep_series=True, iterations=15))
+
+
+@pytest.mark.parametrize("options", OTHER_CONFIGURATIONS)
+def test_merge_refuses_another_configuration(options):
+    with pytest.raises(ValueError):
+        shard(PLAYERS).merge(shard(PLAYERS, **options))
+    with pytest.raises(ValueError):
+        shard(PLAYERS, **options).merge(shard(PLAYERS))
+    if "duplicate" in options:
+        with pytest.raises(ValueError):
+            shard(PLAYERS, duplicate="rotations").merge(shard(PLAYERS, duplicate="permutations"))
+
+
+def test_merge_refuses_to_pair_games_after_an_incomplete_deal():
+    stats = StatsRecorder(deal_size=3)
+    players = [SimpleNamespace(name=f"Player {i + 1}", type=player_type) for i, player_type in enumerate(PLAYERS)]
+    stats.add_game_result(players, [60, 40, 20], [OUTCOME_WIN, OUTCOME_LOSS, OUTCOME_LOSS], [5, 4, 3])
+    with pytest.raises(ValueError):
+        stats.merge(shard(PLAYERS, duplicate="rotations"))
+
+
+@pytest.mark.parametrize("options", [{}, {"keep_series": True, "record_latency": True}, {"duplicate": "rotations"}])
+def test_snapshots_round_trip(tmp_path, options):
+    stats = shard(PLAYERS, **options)
+    stats.add_decision_cache_counts({"SimpleGreedyAgent": [3, 4]})
+    filename = str(tmp_path / "stats.json")
+    stats.save_snapshot(filename)
+
+    loaded = StatsRecorder.load_snapshot(filename)
+    assert loaded.snapshot() == stats.snapshot()
+    assert loaded.keep_series == stats.keep_series
+    assert loaded.record_latency == stats.record_latency
+    assert loaded.deal_size == stats.deal_size
+    assert_same_stats(loaded, stats)
+
+
+def test_results_store_round_trips(tmp_path):
+    store = shard(PLAYERS, keep_series=True, iterations=20).results
+
+    assert ResultsStore.from_snapshot(store.snapshot()).snapshot() == store.snapshot()
+
+    filename = str(tmp_path / "results.npz")
+    store.save(filename)
+    loaded = ResultsStore.load(filename)
+    assert loaded.snapshot() == store.snapshot()
+    assert loaded.summary() == store.summary()
+
+
+def test_latency_percentiles_of_a_uniform_distribution():
+    # Values are spread evenly within each power-of-two bucket, so interpolating within buckets is exact
+    stat = LatencyStat()
+    for nanoseconds in range(1 << 16):
+        stat.add(nanoseconds)
+
+    for percentile in (1, 10, 25, 50):
+        assert stat.percentile(percentile) == pytest.approx(percentile / 100 * (1 << 16))
+    # The last bucket, holding the upper half, ends at the largest value rather than at its power of two
+    for percentile in (75, 90, 99):
+        assert stat.percentile(percentile) == pytest.approx(percentile / 100 * (1 << 16), abs=1)
+    assert stat.percentile(100) == (1 << 16) - 1
+    assert stat.mean() == ((1 << 16) - 1) / 2
+
+
+def test_latency_percentiles_interpolate_within_buckets():
+    # 90 decisions of 100ns, in the bucket [64, 128), and 10 of 10µs, in the bucket [8192, 16384) cut off at the maximum
+    stat = LatencyStat()
+    for _ in range(90):
+        stat.add(100)
+    for _ in range(10):
+        stat.add(10_000)
+
+    assert stat.percentile(50) == pytest.approx(64 + 64 * 50 / 90)
+    assert stat.percentile(90) == pytest.approx(128)
+    assert stat.percentile(99) == pytest.approx(8192 + (10_000 - 8192) * 9 / 10)
+
+    summary = stat.summary()
+    assert summary["decisions"] == 100
+    assert summary["mean_us"] == pytest.approx(1.09)
+    assert summary["max_us"] == 10
+    assert summary["p50_us"] == pytest.approx(stat.percentile(50) / 1000)
+
+    assert LatencyStat().percentile(50) == 0.0
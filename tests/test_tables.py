@@ -0,0 +1,62 @@
+import random
+from types import SimpleNamespace
+import pytest
+from engine import players as agents
+from engine.game import Trick
+from engine.structures import CARDS, Suit
+from engine.tables import HAND_SIZE, TABLE_AGENTS, DecisionTables, build_tables
+
+
+@pytest.fixture(scope="module")
+def tables(tmp_path_factory):
+    # Building every table takes about half a minute, so they are built once for the module
+    filename = tmp_path_factory.mktemp("tables") / "decision_tables.bin"
+    build_tables(str(filename), TABLE_AGENTS, display=False)
+    tables = DecisionTables(str(filename))
+    yield tables
+    tables.close()
+
+
+def random_position(rng: random.Random):
+    """
+    Returns a random hand of up to HAND_SIZE cards, and a world with a random trump and trick of up to 5 cards.
+    """
+    cards = rng.sample(CARDS, HAND_SIZE + 5)
+    hand = cards[: rng.randint(1, HAND_SIZE)]
+
+    trick = Trick()
+    played = cards[HAND_SIZE : HAND_SIZE + rng.randint(0, 5)]
+    if played:
+        trick.set_starting_suit(played[0].suit)
+    for card in played:
+        trick.add_play(None, card)
+
+    return hand, SimpleNamespace(current_trick=trick, trump_suit=rng.choice(list(Suit)), headless=True)
+
+
+@pytest.mark.parametrize("player_type", TABLE_AGENTS)
+def test_lookup_matches_the_agent(tables, player_type):
+    rng = random.Random(player_type)
+    player = getattr(agents, player_type)("Player 1")
+
+    for _ in range(20000):
+        hand, world = random_position(rng)
+        player.reset()
+        for card in hand:
+            player.add_to_hand(card)
+
+        assert tables.lookup(player, world) == player.choices(world)
+
+
+def test_lookup_skips_agents_and_hands_without_a_table(tables):
+    hand, world = random_position(random.Random(0))
+
+    player = agents.GreedyCountingAgent("Player 1")
+    for card in hand:
+        player.add_to_hand(card)
+    assert tables.lookup(player, world) is None
+
+    player = agents.SimpleGreedyAgent("Player 2")
+    for card in CARDS[: HAND_SIZE + 1]:
+        player.add_to_hand(card)
+    assert tables.lookup(player, world) is None
@@ -0,0 +1,68 @@
+import logging
+import random
+from engine.game import Game
+from engine.players import GreedyCountingAgent, MPLGreedyTrumpSaveAgent, RandomAgent
+from engine.trace import TraceReader, TraceRecorder
+from utils.seeding import game_rng
+
+
+def summary(game: Game) -> tuple:
+    """
+    Returns what happened in a game: each trick's cards and winner, and each player's points, players being named.
+    """
+    tricks = [([card.id for card in trick.cards], trick.get_winner().name) for trick in game.tricks]
+    points = {player.name: player.get_points() for player in game.player_pool.players}
+    return tricks, points
+
+
+def test_replay_reproduces_the_recorded_games(tmp_path):
+    filename = str(tmp_path / "games.trace")
+    players = [RandomAgent("Player 1"), MPLGreedyTrumpSaveAgent("Player 2"), GreedyCountingAgent("Player 3")]
+
+    recorded = []
+    with TraceRecorder(filename, players) as recorder:
+        for game_index in range(50):
+            rng = game_rng(7, game_index)
+            game = Game(log_level=logging.ERROR, headless=True, rng=rng)
+
+            # Seats rotate from game to game, so replays must follow the recorded seating
+            for i in range(len(players)):
+                player = players[(game_index + i) % len(players)]
+                player.rng = random.Random(game_index)
+                game.add_player(player)
+
+            recorder.attach(game, seed=7, game_index=game_index)
+            game.start_match()
+            while not game.is_over():
+                game.next_round()
+            recorded.append(summary(game))
+
+    reader = TraceReader(filename)
+    assert len(reader) == len(recorded)
+
+    for index, expected in enumerate(recorded):
+        assert reader[index]["seed"] == 7
+        assert reader[index]["game"] == index
+
+        game = reader.replay(index)
+        assert game.is_over()
+        assert summary(game) == expected
+
+
+def test_replay_stops_after_the_given_number_of_tricks(tmp_path):
+    filename = str(tmp_path / "games.trace")
+    players = [RandomAgent("Player 1"), RandomAgent("Player 2")]
+
+    with TraceRecorder(filename, players) as recorder:
+        game = Game(log_level=logging.ERROR, headless=True, rng=game_rng(7, 0))
+        for player in players:
+            game.add_player(player)
+        recorder.attach(game, seed=7)
+        game.start_match()
+        while not game.is_over():
+            game.next_round()
+        tricks, _ = summary(game)
+
+    game = TraceReader(filename).replay(0, tricks=5)
+    assert not game.is_over()
+    assert summary(game)[0] == tricks[:5]
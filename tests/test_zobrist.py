@@ -0,0 +1,36 @@
+import logging
+import random
+import pytest
+from engine.game import Game
+from engine.players import RandomAgent
+from engine.state import GameState
+from engine.structures import CARD_COUNT
+from engine.zobrist import state_hash
+from utils.seeding import game_rng
+
+
+@pytest.mark.parametrize("players", range(2, 7))
+def test_game_hash_matches_a_hash_from_scratch_after_every_trick(players):
+    for game_index in range(10):
+        game = Game(log_level=logging.ERROR, headless=True, rng=game_rng(players, game_index))
+        for i in range(players):
+            game.add_player(RandomAgent(f"Player {i + 1}", rng=random.Random(game_index * players + i)))
+
+        game.start_match()
+        assert game.zobrist == state_hash(game.export_state())
+
+        while not game.is_over():
+            game.next_round()
+            assert game.zobrist == state_hash(game.export_state())
+
+
+@pytest.mark.parametrize("players", range(2, 7))
+def test_state_hash_is_kept_up_to_date_by_apply(players):
+    rng = random.Random(players)
+    deck = list(range(CARD_COUNT))
+    rng.shuffle(deck)
+    state = GameState.deal(deck, players)
+
+    while not state.is_over():
+        state = state.apply(rng.choice(state.legal_moves()))
+        assert state.zobrist == state_hash(state)
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+
+import argparse
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from prettytable import PrettyTable
+from simulate import simulate_shard, RunOptions, PLAYER_TYPES
+from utils.ratings import RatingSystem
+from utils.results import ResultsStore, OUTCOME_WIN
+
+TOURNAMENT_AGENTS = ["RandomAgent", "SimpleGreedyAgent", "MinimizePointLossGreedyAgent",
+                     "MPLGreedyTrumpSaveAgent", "MPLGreedyTrumpBasedAgent", "GreedyCountingAgent"]
+TOURNAMENT_MATCHES = 200
+TOURNAMENT_WORKERS = os.cpu_count() or 1
+
+# Games played by each match, a match being the unit of work handed to a worker process
+GAMES_PER_MATCH = 100
+
+# Completed matches between two prints of the leaderboard
+LEADERBOARD_INTERVAL = 10
+
+SCHEDULES = ("round-robin", "swiss", "adaptive")
+
+
+class RoundRobinSchedule:
+    """
+    Plays every combination of agents, for each group size in turn, over and over.
+    """
+
+    def __init__(self, agents: list, group_sizes: list):
+        self.agents = agents
+        self.tables = itertools.cycle(
+            [table for group_size in group_sizes for table in itertools.combinations(agents, group_size)]
+        )
+
+    def next_table(self, ratings: RatingSystem, pending: list) -> tuple:
+        return next(self.tables)
+
+
+class SwissSchedule:
+    """
+    Plays rounds in which agents are ranked by rating and seated with their neighbours in the ranking, cycling through
+    the group sizes from one round to the next. The tables are cut at a different offset every round, so agents don't
+    keep meeting the same opponents.
+    """
+
+    def __init__(self, agents: list, group_sizes: list):
+        self.agents = agents
+        self.group_sizes = group_sizes
+        self.round = 0
+        self.tables = []
+
+    def next_table(self, ratings: RatingSystem, pending: list) -> tuple:
+        if not self.tables:
+            self.tables = self._pair(ratings)
+            self.round += 1
+        return self.tables.pop(0)
+
+    def _pair(self, ratings: RatingSystem) -> list:
+        group_size = self.group_sizes[self.round % len(self.group_sizes)]
+        offset = self.round // len(self.group_sizes) % group_size
+        ranked = sorted(self.agents, key=lambda agent: ratings.get(agent).mu, reverse=True)
+
+        tables = []
+        for start in range(offset - group_size if offset else 0, len(ranked), group_size):
+            # Tables cut short at either end of the ranking are topped up with the nearest agents
+            start = min(max(start, 0), len(ranked) - group_size)
+            table = tuple(sorted(ranked[start : start + group_size], key=self.agents.index))
+            if table not in tables:
+                tables.append(table)
+
+        return tables
+
+
+class AdaptiveSchedule:
+    """
+    Focuses games on the agents whose ratings are the most uncertain. Each table is seeded with the agent with the
+    widest rating, which is then seated with the agents making for the most uncertain game, weighted by how uncertain
+    their own ratings are. Tables already being played are left out, so parallel matches aren't wasted on duplicates.
+    """
+
+    def __init__(self, agents: list, group_sizes: list):
+        self.agents = agents
+        self.group_sizes = group_sizes
+        self.tables = 0
+
+    def next_table(self, ratings: RatingSystem, pending: list) -> tuple:
+        group_size = self.group_sizes[self.tables % len(self.group_sizes)]
+        self.tables += 1
+
+        for seed in sorted(self.agents, key=lambda agent: ratings.get(agent).sigma, reverse=True):
+            table = [seed]
+            while len(table) < group_size:
+                table.append(
+                    max(
+                        (agent for agent in self.agents if agent not in table),
+                        key=lambda agent: ratings.quality(table + [agent]) * ratings.get(agent).sigma,
+                    )
+                )
+
+            table = tuple(sorted(table, key=self.agents.index))
+            if table not in pending:
+                return table
+
+        return table
+
+
+def rate_match(ratings, records, table, snapshot):
+    """
+    Updates the ratings game by game from the results of a match, along with every agent's record.
+    Players are named after their seat in the table, "Player 1" being the first agent of the table.
+    """
+    results = ResultsStore.from_snapshot(snapshot["results"])
+    agent_types = {f"Player {i + 1}": agent for i, agent in enumerate(table)}
+    codes = [agent_types[player_id] for player_id in results.agents]
+
+    # Rows are recorded a game at a time, one per player
+    agents = results.column("agent").reshape(-1, len(table))
+    points = results.column("points").reshape(-1, len(table))
+    outcomes = results.column("outcome").reshape(-1, len(table))
+
+    for game_agents, game_points, game_outcomes in zip(agents.tolist(), points.tolist(), outcomes.tolist()):
+        game_types = [codes[code] for code in game_agents]
+        ratings.rate(game_types, game_points)
+
+        for agent, agent_points, outcome in zip(game_types, game_points, game_outcomes):
+            records[agent]["points"] += agent_points
+            records[agent]["wins"] += outcome == OUTCOME_WIN
+
+
+def run_tournament(schedule, matches, games_per_match, workers, seed=None, target_sigma=None, leaderboard_interval=LEADERBOARD_INTERVAL, display=True):
+    """
+    Plays up to the given number of matches, as scheduled from the ratings so far, keeping every worker busy.
+    Ratings are updated as soon as a match completes, and the tournament stops early once every rating is narrower
+    than the target sigma, if any.
+    Match i plays games i * games_per_match onwards, so a seeded match is reproducible on its own. With more than one
+    worker, which matches get scheduled depends on the order in which the previous ones complete.
+    """
+    ratings = RatingSystem()
+    records = {agent: {"points": 0, "wins": 0} for agent in schedule.agents}
+    played = []
+    for agent in schedule.agents:
+        ratings.get(agent)
+
+    def converged():
+        return target_sigma is not None and all(ratings.get(agent).sigma < target_sigma for agent in schedule.agents)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        scheduled = 0
+
+        while futures or (scheduled < matches and not converged()):
+            while scheduled < matches and len(futures) < workers and not converged():
+                table = schedule.next_table(ratings, list(futures.values()))
+                future = executor.submit(simulate_shard, scheduled * games_per_match, games_per_match, list(table), RunOptions(seed=seed, keep_series=True))
+                futures[future] = table
+                scheduled += 1
+
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                table = futures.pop(future)
+                rate_match(ratings, records, table, future.result())
+                played.append(table)
+
+                if display and len(played) % leaderboard_interval == 0:
+                    print_leaderboard(ratings, records, f"Leaderboard after {len(played)}/{matches} matches:")
+
+    return ratings, records, played
+
+
+def print_leaderboard(ratings, records, title="Leaderboard:"):
+    table = PrettyTable()
+    table.field_names = ["Rank", "Agent", "Rating", "Mu", "Sigma", "Games", "Win Rate", "Average Points / Game"]
+
+    for rank, agent in enumerate(ratings.leaderboard(), start=1):
+        rating = ratings.get(agent)
+        games = max(rating.games, 1)
+        table.add_row(
+            [
+                rank,
+                agent,
+                f"{rating.conservative:.2f}",
+                f"{rating.mu:.2f}",
+                f"{rating.sigma:.3f}",
+                rating.games,
+                f"{records[agent]['wins'] / games:.2%}",
+                f"{records[agent]['points'] / games:.2f}",
+            ]
+        )
+    table.align = "l"
+
+    print(title)
+    print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='BASIS tournament, rating agents across group sizes')
+
+    parser.add_argument('--schedule', default="adaptive", choices=SCHEDULES, help='How tables are drawn up')
+    parser.add_argument('--agents', nargs='+', default=TOURNAMENT_AGENTS, choices=list(PLAYER_TYPES.keys()), help='Agent types taking part')
+    parser.add_argument('--players', type=int, nargs='+', default=None, help='Group sizes played, in turn (default: every size from 2 to 6 the agents can fill)')
+    parser.add_argument('--matches', type=int, default=TOURNAMENT_MATCHES, help='Maximum number of matches to play')
+    parser.add_argument('--games-per-match', type=int, default=GAMES_PER_MATCH, help='Games played by each match')
+    parser.add_argument('--target-sigma', type=float, default=None, help='Stop early once every rating sigma is below this')
+    parser.add_argument('--workers', type=int, default=TOURNAMENT_WORKERS, help='Number of worker processes playing matches')
+    parser.add_argument('--seed', type=int, default=None, help='Base seed, making every match reproducible from the seed and its index')
+    parser.add_argument('--leaderboard-interval', type=int, default=LEADERBOARD_INTERVAL, help='Completed matches between two prints of the leaderboard')
+    parser.add_argument('--output', default=None, help='Save the final ratings and the matches played to a JSON file')
+
+    args = parser.parse_args()
+
+    agents = list(dict.fromkeys(args.agents))
+    group_sizes = args.players or list(range(2, min(len(agents), 6) + 1))
+
+    if len(agents) < 2:
+        print('Invalid argument. --agents takes at least 2 distinct agent types.')
+        sys.exit(1)
+
+    if any(group_size < 2 or group_size > min(len(agents), 6) for group_size in group_sizes):
+        print(f'Invalid argument. --players takes group sizes between 2 and {min(len(agents), 6)}, the number of agents taking part.')
+        sys.exit(1)
+
+    if args.matches < 1 or args.games_per_match < 1 or args.workers < 1 or args.leaderboard_interval < 1:
+        print('Invalid argument. --matches, --games-per-match, --workers and --leaderboard-interval must be at least 1.')
+        sys.exit(1)
+
+    schedule = {"round-robin": RoundRobinSchedule, "swiss": SwissSchedule, "adaptive": AdaptiveSchedule}[args.schedule](agents, group_sizes)
+    ratings, records, played = run_tournament(
+        schedule,
+        args.matches,
+        args.games_per_match,
+        args.workers,
+        seed=args.seed,
+        target_sigma=args.target_sigma,
+        leaderboard_interval=args.leaderboard_interval,
+    )
+
+    print_leaderboard(ratings, records, f"Final leaderboard after {len(played)} matches of {args.games_per_match} games:")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "schedule": args.schedule,
+                    "group_sizes": group_sizes,
+                    "games_per_match": args.games_per_match,
+                    "seed": args.seed,
+                    "ratings": ratings.snapshot(),
+                    "records": records,
+                    "matches": [list(table) for table in played],
+                },
+                f,
+                indent=4,
+            )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+import math
+
+# Defaults of the rating model, on the same scale as TrueSkill's
+INITIAL_MU = 25.0
+INITIAL_SIGMA = INITIAL_MU / 3
+BETA = INITIAL_SIGMA / 2  # Spread of a single game's performance around an agent's skill
+KAPPA = 0.0001  # Floor of the factor by which a variance shrinks in an update, keeping it positive
+
+
+class Rating:
+    """
+    An agent's skill estimate, as the mean and standard deviation of a normal belief over its skill.
+    """
+
+    __slots__ = ("mu", "sigma", "games")
+
+    def __init__(self, mu: float = INITIAL_MU, sigma: float = INITIAL_SIGMA, games: int = 0):
+        self.mu = mu
+        self.sigma = sigma
+        self.games = games
+
+    @property
+    def conservative(self) -> float:
+        """
+        Skill the agent has with high confidence, used to rank agents without favouring the ones played the least.
+        """
+        return self.mu - 3 * self.sigma
+
+    def snapshot(self) -> dict:
+        return {"mu": self.mu, "sigma": self.sigma, "games": self.games}
+
+
+class RatingSystem:
+    """
+    Incremental TrueSkill-style ratings, updated after every game with the Bradley-Terry full-pairing rule of Weng and
+    Lin's Bayesian approximation. Games may have any number of players, each ranked by the points it won, and every
+    player is compared with every other one, so ratings are shared across group sizes.
+    """
+
+    def __init__(self, beta: float = BETA):
+        self.beta = beta
+        self.ratings = {}
+
+    def get(self, agent_id: str) -> Rating:
+        rating = self.ratings.get(agent_id)
+        if rating is None:
+            rating = self.ratings[agent_id] = Rating()
+        return rating
+
+    def rate(self, agent_ids: list, points: list):
+        """
+        Updates the ratings of the players of a game from the points each of them won, equal points being a tie.
+        """
+        ratings = [self.get(agent_id) for agent_id in agent_ids]
+        two_beta_squared = 2 * self.beta * self.beta
+        updates = []
+
+        for i, rating in enumerate(ratings):
+            variance = rating.sigma * rating.sigma
+            omega = delta = 0.0
+
+            for q, other in enumerate(ratings):
+                if q == i:
+                    continue
+
+                c = math.sqrt(variance + other.sigma * other.sigma + two_beta_squared)
+                expected = 1 / (1 + math.exp((other.mu - rating.mu) / c))
+                score = 1.0 if points[i] > points[q] else 0.5 if points[i] == points[q] else 0.0
+
+                omega += variance / c * (score - expected)
+                delta += rating.sigma / c * variance / (c * c) * expected * (1 - expected)
+
+            updates.append((omega, delta))
+
+        for rating, (omega, delta) in zip(ratings, updates):
+            rating.mu += omega
+            rating.sigma *= math.sqrt(max(1 - delta, KAPPA))
+            rating.games += 1
+
+    def quality(self, agent_ids: list) -> float:
+        """
+        Returns how uncertain the outcome of a game between the given agents is, from 0 to 1, as the mean over every
+        pair of them of TrueSkill's match quality. Games between agents of similar skill are the most informative.
+        """
+        ratings = [self.get(agent_id) for agent_id in agent_ids]
+        two_beta_squared = 2 * self.beta * self.beta
+        total = pairs = 0
+
+        for i, rating in enumerate(ratings):
+            for other in ratings[i + 1 :]:
+                spread = two_beta_squared + rating.sigma * rating.sigma + other.sigma * other.sigma
+                total += math.sqrt(two_beta_squared / spread) * math.exp(-((rating.mu - other.mu) ** 2) / (2 * spread))
+                pairs += 1
+
+        return total / pairs if pairs else 0.0
+
+    def leaderboard(self) -> list:
+        """
+        Returns the agent ids, ranked by their conservative rating.
+        """
+        return sorted(self.ratings, key=lambda agent_id: self.ratings[agent_id].conservative, reverse=True)
+
+    def snapshot(self) -> dict:
+        return {agent_id: rating.snapshot() for agent_id, rating in self.ratings.items()}
@@ -0,0 +1,266 @@
+from itertools import combinations
+import numpy as np
+
+# Codes of the outcome column
+OUTCOME_LOSS = 0
+OUTCOME_DRAW = 1
+OUTCOME_WIN = 2
+
+# Name and type of each column, one row per player per game
+COLUMNS = (
+    ("game", np.int64),  # Index of the game, in the order games were recorded
+    ("seat", np.int8),  # Position of the player at the table
+    ("agent", np.int16),  # Code of the player's id, see ResultsStore.agents
+    ("points", np.int16),
+    ("outcome", np.int8),
+    ("tricks", np.int16),  # Number of tricks won
+)
+
+
+class ResultsStore:
+    """
+    A columnar store of per-game results, with one row per player per game.
+    Columns are preallocated NumPy arrays which double in capacity when full, so whole games are appended in amortized
+    constant time, and aggregates are computed with vectorized operations over the columns.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.size = 0  # Number of rows filled
+        self.games = 0
+        self.agents = []  # Player ids, indexed by their code in the agent column
+        self.agent_codes = {}
+        self.columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in COLUMNS}
+
+    def agent_code(self, agent_id: str) -> int:
+        """
+        Returns the code of a player id in the agent column, registering it if needed.
+        """
+        code = self.agent_codes.get(agent_id)
+        if code is None:
+            code = self.agent_codes[agent_id] = len(self.agents)
+            self.agents.append(agent_id)
+        return code
+
+    def _reserve(self, rows: int):
+        """
+        Grows the columns, doubling their capacity, until the given number of rows fits.
+        """
+        capacity = len(self.columns["game"])
+        if self.size + rows <= capacity:
+            return
+
+        while self.size + rows > capacity:
+            capacity *= 2
+
+        for name, column in self.columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[: self.size] = column[: self.size]
+            self.columns[name] = grown
+
+    def append_game(self, agent_ids: list, points: list, outcomes: list, tricks: list):
+        """
+        Appends the results of a game, with one entry per player in seating order.
+        """
+        rows = len(agent_ids)
+        self._reserve(rows)
+
+        start, end = self.size, self.size + rows
+        columns = self.columns
+        columns["game"][start:end] = self.games
+        columns["seat"][start:end] = np.arange(rows)
+        columns["agent"][start:end] = [self.agent_code(agent_id) for agent_id in agent_ids]
+        columns["points"][start:end] = points
+        columns["outcome"][start:end] = outcomes
+        columns["tricks"][start:end] = tricks
+
+        self.size = end
+        self.games += 1
+
+    def append_games(self, agent_ids: list, seating, points, outcomes, tricks):
+        """
+        Appends the results of a batch of games at once. seating[game, seat] is the index in agent_ids of the player at
+        that seat, and the other arrays hold one entry per game and seat.
+        """
+        games, seats = seating.shape
+        rows = games * seats
+        self._reserve(rows)
+
+        start, end = self.size, self.size + rows
+        codes = np.array([self.agent_code(agent_id) for agent_id in agent_ids], dtype=np.int16)
+        columns = self.columns
+        columns["game"][start:end] = np.repeat(np.arange(self.games, self.games + games), seats)
+        columns["seat"][start:end] = np.tile(np.arange(seats), games)
+        columns["agent"][start:end] = codes[seating].ravel()
+        columns["points"][start:end] = np.ravel(points)
+        columns["outcome"][start:end] = np.ravel(outcomes)
+        columns["tricks"][start:end] = np.ravel(tricks)
+
+        self.size = end
+        self.games += games
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Returns a view of the filled rows of a column.
+        """
+        return self.columns[name][: self.size]
+
+    def extend(self, other: "ResultsStore"):
+        """
+        Appends the rows of another store, numbering its games after the ones already recorded.
+        """
+        self._reserve(other.size)
+
+        start, end = self.size, self.size + other.size
+        for name, _ in COLUMNS:
+            self.columns[name][start:end] = other.column(name)
+
+        self.columns["game"][start:end] += self.games
+        codes = np.array([self.agent_code(agent_id) for agent_id in other.agents], dtype=np.int16)
+        if other.size:
+            self.columns["agent"][start:end] = codes[other.column("agent")]
+
+        self.size = end
+        self.games += other.games
+
+        return self
+
+    def game_points(self, agent_id: str) -> np.ndarray:
+        """
+        Returns the points a player scored in each of its games, in order.
+        """
+        return self.column("points")[self.column("agent") == self.agent_codes[agent_id]]
+
+    def summary(self) -> dict:
+        """
+        Aggregates the results of each player, keyed by player id.
+        """
+        agents = self.column("agent").astype(np.intp)
+        points = self.column("points").astype(np.float64)
+        outcomes = self.column("outcome")
+        tricks = self.column("tricks")
+        count = len(self.agents)
+
+        games = np.bincount(agents, minlength=count)
+        played = np.maximum(games, 1)
+        mean = np.bincount(agents, weights=points, minlength=count) / played
+        squares = np.bincount(agents, weights=points * points, minlength=count)
+        variance = np.where(
+            games > 1, (squares - games * mean * mean) / np.maximum(games - 1, 1), 0.0
+        )
+        highest = np.zeros(count, dtype=np.int64)
+        np.maximum.at(highest, agents, self.column("points"))
+        wins = np.bincount(agents, weights=outcomes == OUTCOME_WIN, minlength=count)
+        draws = np.bincount(agents, weights=outcomes == OUTCOME_DRAW, minlength=count)
+        losses = np.bincount(agents, weights=outcomes == OUTCOME_LOSS, minlength=count)
+        average_tricks = np.bincount(agents, weights=tricks, minlength=count) / played
+
+        summary = {}
+
+        for code, agent_id in enumerate(self.agents):
+            summary[agent_id] = {
+                "games": int(games[code]),
+                "wins": int(wins[code]),
+                "draws": int(draws[code]),
+                "losses": int(losses[code]),
+                "average_points_per_game": float(mean[code]),
+                "stdev_points_per_game": float(np.sqrt(max(variance[code], 0.0))),
+                "highest_game_turnover": int(highest[code]),
+                "average_tricks_per_game": float(average_tricks[code]),
+            }
+
+        return summary
+
+    def paired_differences(self, deal_size: int, z: float = 1.96) -> list:
+        """
+        Compares every pair of players over duplicate deals, where each run of deal_size consecutive games replays the
+        same deal with every player seated in every game. Points and wins are averaged per player over each deal, and
+        the per-deal differences between two players are summarized by their mean and a normal confidence interval of
+        half-width z standard errors. Card luck is shared by both players of a pair, so it cancels out of the differences.
+        """
+        deals = self.games // deal_size
+        rows = self.column("game") < deals * deal_size  # Leaving out the games of an incomplete deal
+        deal = self.column("game")[rows] // deal_size
+        agents = self.column("agent")[rows].astype(np.intp)
+        count = len(self.agents)
+
+        points = np.zeros((deals, count))
+        wins = np.zeros((deals, count))
+        np.add.at(points, (deal, agents), self.column("points")[rows])
+        np.add.at(wins, (deal, agents), self.column("outcome")[rows] == OUTCOME_WIN)
+        points /= deal_size
+        wins /= deal_size
+
+        def summarize(differences):
+            mean = float(differences.mean()) if deals else 0.0
+            error = float(differences.std(ddof=1) / np.sqrt(deals)) if deals > 1 else 0.0
+            return mean, (mean - z * error, mean + z * error)
+
+        pairs = []
+
+        for first, second in combinations(range(count), 2):
+            points_difference, points_interval = summarize(points[:, first] - points[:, second])
+            win_rate_difference, win_rate_interval = summarize(wins[:, first] - wins[:, second])
+            pairs.append(
+                {
+                    "player": self.agents[first],
+                    "opponent": self.agents[second],
+                    "deals": deals,
+                    "points_difference": points_difference,
+                    "points_interval": points_interval,
+                    "win_rate_difference": win_rate_difference,
+                    "win_rate_interval": win_rate_interval,
+                }
+            )
+
+        return pairs
+
+    def snapshot(self) -> dict:
+        """
+        Returns a JSON-serializable snapshot of the store.
+        """
+        return {
+            "games": self.games,
+            "agents": list(self.agents),
+            "columns": {name: self.column(name).tolist() for name, _ in COLUMNS},
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: dict) -> "ResultsStore":
+        size = len(snapshot["columns"]["game"])
+        store = cls(capacity=max(size, 1))
+
+        for name, dtype in COLUMNS:
+            store.columns[name][:size] = np.asarray(snapshot["columns"][name], dtype=dtype)
+
+        store.size = size
+        store.games = snapshot["games"]
+        for agent_id in snapshot["agents"]:
+            store.agent_code(agent_id)
+
+        return store
+
+    def save(self, filename: str):
+        """
+        Saves the columns to a compressed NumPy archive.
+        """
+        np.savez_compressed(
+            filename,
+            agents=np.array(self.agents),
+            **{name: self.column(name) for name, _ in COLUMNS},
+        )
+
+    @classmethod
+    def load(cls, filename: str) -> "ResultsStore":
+        with np.load(filename) as archive:
+            size = len(archive["game"])
+            store = cls(capacity=max(size, 1))
+
+            for name, _ in COLUMNS:
+                store.columns[name][:size] = archive[name]
+
+            store.size = size
+            store.games = int(archive["game"].max()) + 1 if size else 0
+            for agent_id in archive["agents"].tolist():
+                store.agent_code(agent_id)
+
+        return store
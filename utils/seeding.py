@@ -0,0 +1,27 @@
+import hashlib
+import random
+import numpy as np
+
+
+def game_rng(base_seed, game_index: int) -> random.Random:
+    """
+    Returns the random number generator of a single game, derived from the base seed of a run and the game's index.
+    Any game of a seeded run can be replayed on its own from these two values.
+    Returns None if no base seed is given, so that unseeded generators are used instead.
+    """
+    if base_seed is None:
+        return None
+
+    # String seeds are hashed with SHA-512, so they are stable across processes and Python versions
+    return random.Random(f"{base_seed}:{game_index}")
+
+
+def batch_rng(base_seed, first_game: int) -> np.random.Generator:
+    """
+    Returns the NumPy random number generator of a batch of games played in lockstep, derived from the base seed of a
+    run and the index of the batch's first game. Returns an unseeded generator if no base seed is given.
+    """
+    if base_seed is None:
+        return np.random.default_rng()
+
+    return np.random.default_rng(int.from_bytes(hashlib.sha256(f"{base_seed}:{first_game}".encode()).digest(), "little"))
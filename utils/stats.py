@@ -1,106 +1,552 @@
 from engine.players import Player
+from utils.results import ResultsStore, OUTCOME_WIN, OUTCOME_DRAW, OUTCOME_LOSS
 from prettytable import PrettyTable
 from datetime import datetime
 import os
 import json
+import math
+import numpy as np
+
+# Counter incremented for each outcome code
+OUTCOME_COUNTERS = {OUTCOME_WIN: "wins", OUTCOME_DRAW: "draws", OUTCOME_LOSS: "losses"}
+
+# Histogram buckets cover every possible score, from 0 up to all 120 points of a deck
+HISTOGRAM_BUCKETS = 121
+
+# Phases of a decision, depending on the player's position in the trick
+DECISION_PHASES = ("first", "mid", "last")
+
+# Latency histograms have one bucket per power of two of nanoseconds, the last one catching anything above 9 minutes
+LATENCY_BUCKETS = 40
+LATENCY_PERCENTILES = (50, 90, 99)
+
+
+class RunningStat:
+    """
+    A streaming summary of a series of values, taking constant memory regardless of how many values are added.
+    Keeps the count, sum and maximum, the mean and variance (using Welford's algorithm), and a histogram with one bucket per point.
+    """
+
+    __slots__ = ("count", "total", "max", "mean", "m2", "histogram")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = None
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared deviations from the mean
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+
+    def add(self, value: int):
+        self.count += 1
+        self.total += value
+        if self.max is None or value > self.max:
+            self.max = value
+
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+        self.histogram[min(value, HISTOGRAM_BUCKETS - 1)] += 1
+
+    @classmethod
+    def from_values(cls, values) -> "RunningStat":
+        """
+        Summarizes an array of values at once, as if each had been added in turn.
+        """
+        values = np.asarray(values, dtype=np.int64)
+        stat = cls()
+        if len(values) == 0:
+            return stat
+
+        stat.count = len(values)
+        stat.total = int(values.sum())
+        stat.max = int(values.max())
+        stat.mean = float(values.mean())
+        stat.m2 = float(((values - stat.mean) ** 2).sum())
+        stat.histogram = np.bincount(
+            np.minimum(values, HISTOGRAM_BUCKETS - 1), minlength=HISTOGRAM_BUCKETS
+        ).tolist()
+
+        return stat
+
+    def merge(self, other: "RunningStat"):
+        """
+        Combines the summary of another series into this one, as if its values had been added here.
+        """
+        if other.count == 0:
+            return self
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        if self.max is None or (other.max is not None and other.max > self.max):
+            self.max = other.max
+
+        self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+
+        return self
+
+    def snapshot(self) -> list:
+        """
+        Returns a compact, JSON-serializable snapshot of the summary, with trailing empty histogram buckets dropped.
+        """
+        histogram = list(self.histogram)
+        while histogram and histogram[-1] == 0:
+            histogram.pop()
+
+        return [self.count, self.total, self.max, self.mean, self.m2, histogram]
+
+    @classmethod
+    def from_snapshot(cls, snapshot: list) -> "RunningStat":
+        stat = cls()
+        stat.count, stat.total, stat.max, stat.mean, stat.m2, histogram = snapshot
+        stat.histogram[: len(histogram)] = histogram
+        return stat
+
+    def variance(self) -> float:
+        """
+        Returns the sample variance of the values.
+        """
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def stdev(self) -> float:
+        return math.sqrt(self.variance())
+
+
+class LatencyStat:
+    """
+    A streaming summary of latencies in nanoseconds, with a histogram of one bucket per power of two, from which
+    percentiles are estimated. Takes constant memory, and merges like RunningStat.
+    """
+
+    __slots__ = ("count", "total", "max", "histogram")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.histogram = [0] * LATENCY_BUCKETS
+
+    def add(self, nanoseconds: int):
+        self.count += 1
+        self.total += nanoseconds
+        if nanoseconds > self.max:
+            self.max = nanoseconds
+        self.histogram[min(nanoseconds.bit_length(), LATENCY_BUCKETS - 1)] += 1
+
+    def merge(self, other: "LatencyStat"):
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+        return self
+
+    def snapshot(self) -> list:
+        histogram = list(self.histogram)
+        while histogram and histogram[-1] == 0:
+            histogram.pop()
+
+        return [self.count, self.total, self.max, histogram]
+
+    @classmethod
+    def from_snapshot(cls, snapshot: list) -> "LatencyStat":
+        stat = cls()
+        stat.count, stat.total, stat.max, histogram = snapshot
+        stat.histogram[: len(histogram)] = histogram
+        return stat
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percentile: float) -> float:
+        """
+        Estimates a percentile, in nanoseconds, interpolating linearly within its histogram bucket.
+        """
+        if not self.count:
+            return 0.0
+
+        rank = percentile / 100 * self.count
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            if count and seen + count >= rank:
+                low = 1 << (bucket - 1) if bucket else 0
+                high = min(1 << bucket, self.max)
+                return low + (high - low) * (rank - seen) / count
+            seen += count
+
+        return float(self.max)
+
+    def summary(self) -> dict:
+        """
+        Returns the count, mean, percentiles and maximum, in microseconds, along with the raw histogram.
+        """
+        summary = {"decisions": self.count, "mean_us": self.mean() / 1000}
+        for percentile in LATENCY_PERCENTILES:
+            summary[f"p{percentile}_us"] = self.percentile(percentile) / 1000
+        summary["max_us"] = self.max / 1000
+        summary["histogram"] = self.histogram
+
+        return summary
 
 
 class StatsRecorder:
     """
     A class for recording statistics across various games.
+    Statistics are streamed into running summaries, so memory doesn't grow with the number of games.
+    The raw per-game results are only kept if keep_series is set, e.g. for plotting, in a columnar ResultsStore.
+
+    Players are keyed by a stable id, their name, rather than by instance. Recorders filled in other processes or hosts
+    can thus be serialized to snapshots and merged, in any order.
+
+    If record_latency is set, games timing every decision of their players, per decision phase (playing first, in
+    the middle or last in a trick). Otherwise games don't time anything.
+
+    If deal_size is set, games are duplicate deals, each run of deal_size consecutive games replaying the same deal
+    with the players seated differently, and players are also compared by their paired differences over deals. These
+    are computed from the raw results, which are then always kept.
     """
-    def __init__(self):
+    def __init__(self, keep_series: bool = False, record_latency: bool = False, deal_size: int = None):
         self.player_stats = {}
+        self.keep_series = keep_series or deal_size is not None
+        self.record_latency = record_latency
+        self.deal_size = deal_size
+        self.results = ResultsStore() if self.keep_series else None
+        self.decision_cache = {}  # Hits and misses of the decision cache, per agent type, if enabled
+
+    @staticmethod
+    def _player_id(player) -> str:
+        """
+        Returns the id under which a player is recorded. Accepts either a player or an id.
+        """
+        return player if isinstance(player, str) else player.name
 
     def _register_player(self, player: Player):
         """
-        Registers a player in the stats recorder.
+        Registers a player in the stats recorder, returning its stats.
         """
-        if player not in self.player_stats:
-            self.player_stats[player] = {
-                "wins": 0,
-                "losses": 0,
-                "draws": 0,
-                "trick_turnovers": [],  # Per trick
-                "game_turnovers": [],  # Per game
-            }
+        player_id = player.name
+        if player_id not in self.player_stats:
+            self.player_stats[player_id] = self._new_player_stats(player.type)
+        return self.player_stats[player_id]
+
+    def _new_player_stats(self, player_type: str):
+        player_stats = {
+            "type": player_type,
+            "wins": 0,
+            "losses": 0,
+            "draws": 0,
+            "trick_points": RunningStat(),  # Per trick
+            "game_points": RunningStat(),  # Per game
+            "latency": {phase: LatencyStat() for phase in DECISION_PHASES},  # Per decision, in nanoseconds
+        }
+
+        return player_stats
 
     def increment_wins(self, player: Player):
         """
         Increments the number of wins a player has.
         """
-        self._register_player(player)
-        self.player_stats[player]["wins"] += 1
+        self._register_player(player)["wins"] += 1
 
     def increment_draws(self, player: Player):
         """
         Increments the number of draws a player has.
         """
-        self._register_player(player)
-        self.player_stats[player]["draws"] += 1
+        self._register_player(player)["draws"] += 1
 
     def increment_losses(self, player: Player):
         """
         Increments the number of losses a player has.
         """
-        self._register_player(player)
-        self.player_stats[player]["losses"] += 1
+        self._register_player(player)["losses"] += 1
 
     def add_game_points(self, player: Player, points: int):
         """
         Adds the number of points a player scored per game.
         """
-        self._register_player(player)
-        self.player_stats[player]["game_turnovers"].append(points)
+        self._register_player(player)["game_points"].add(points)
 
     def add_trick_points(self, player: Player, points: int):
         """
         Adds the number of points a player scored per trick.
         """
-        self._register_player(player)
-        self._register_player(player)
-        self.player_stats[player]["trick_turnovers"].append(points)
+        self._register_player(player)["trick_points"].add(points)
+
+    def add_decision_latency(self, player: Player, phase: str, nanoseconds: int):
+        """
+        Adds the time a player took to decide on a card, in a given decision phase.
+        """
+        self._register_player(player)["latency"][phase].add(nanoseconds)
+
+    def add_decision_cache_counts(self, counts: dict):
+        """
+        Records the hits and misses of the decision cache (see engine.memo), given as [hits, misses] per agent type.
+        """
+        for player_type, (hits, misses) in counts.items():
+            total = self.decision_cache.setdefault(player_type, [0, 0])
+            total[0] += hits
+            total[1] += misses
+
+    def add_game_result(self, players: list, points: list, outcomes: list, tricks_won: list):
+        """
+        Records the results of a finished game for all of its players at once, in seating order.
+        Outcomes are given as the codes defined in utils.results.
+        """
+        for player, player_points, outcome in zip(players, points, outcomes):
+            player_stats = self._register_player(player)
+            player_stats["game_points"].add(player_points)
+            player_stats[OUTCOME_COUNTERS[outcome]] += 1
+
+        if self.results is not None:
+            self.results.append_game([player.name for player in players], points, outcomes, tricks_won)
+
+    def add_batch_results(self, players: list, seating, points, outcomes, tricks_won, trick_points, trick_winners):
+        """
+        Records the results of a batch of games at once, as played by engine.batch.BatchGame.
+        seating[game, seat] is the index in players of the player at that seat; points, outcomes and tricks won are
+        given per game and seat, and the points and winning seat of each trick per game and trick.
+        """
+        seats = np.argsort(seating, axis=1)  # Seat of each player, per game
+        games = np.arange(len(seating))
+
+        for index, player in enumerate(players):
+            seat = seats[:, index]
+            outcome_counts = np.bincount(outcomes[games, seat], minlength=len(OUTCOME_COUNTERS))
+
+            player_stats = self._register_player(player)
+            player_stats["game_points"].merge(RunningStat.from_values(points[games, seat]))
+            player_stats["trick_points"].merge(RunningStat.from_values(trick_points[trick_winners == seat[:, None]]))
+            for outcome, counter in OUTCOME_COUNTERS.items():
+                player_stats[counter] += int(outcome_counts[outcome])
+
+        if self.results is not None:
+            self.results.append_games([player.name for player in players], seating, points, outcomes, tricks_won)
+
+    def merge(self, other: "StatsRecorder"):
+        """
+        Merges the stats of another recorder into this one, matching players by id.
+        Merging is associative and commutative over counts, sums, maxima and moments, so shards can be combined in any order.
+        The raw results, if kept, are appended after the ones already recorded.
+        Raises a ValueError if a player id stands for another type of player in each recorder, or if the recorders were
+        configured differently (keeping the raw results, timing decisions, or playing deals of another size), or if
+        this one ends with an incomplete deal, rather than mixing up the stats of different agents, dropping results,
+        or pairing games of different deals.
+        """
+        if (self.results is None) != (other.results is None):
+            raise ValueError("Can't merge a recorder which kept the raw results with one which didn't.")
+        if self.record_latency != other.record_latency:
+            raise ValueError("Can't merge a recorder which timed decisions with one which didn't.")
+        if self.deal_size != other.deal_size:
+            raise ValueError(f"Can't merge deals of {other.deal_size} games into deals of {self.deal_size}.")
+        if self.deal_size and self.results.games % self.deal_size:
+            raise ValueError("Can't merge after an incomplete deal, as the following games would be paired with it.")
+
+        for player_id, stats in other.player_stats.items():
+            target = self.player_stats.get(player_id)
+            if target is None:
+                target = self.player_stats[player_id] = self._new_player_stats(stats["type"])
+            elif target["type"] != stats["type"]:
+                raise ValueError(f"{player_id} is a {target['type']} in one recorder and a {stats['type']} in the other.")
+
+            target["wins"] += stats["wins"]
+            target["losses"] += stats["losses"]
+            target["draws"] += stats["draws"]
+            target["trick_points"].merge(stats["trick_points"])
+            target["game_points"].merge(stats["game_points"])
+            for phase in DECISION_PHASES:
+                target["latency"][phase].merge(stats["latency"][phase])
+
+        if self.results is not None:
+            self.results.extend(other.results)
+
+        self.add_decision_cache_counts(other.decision_cache)
+
+        return self
+
+    @classmethod
+    def merge_all(cls, recorders: list) -> "StatsRecorder":
+        """
+        Reduces a list of recorders into a new one, merging them pairwise as a balanced tree, leaving them unchanged.
+        """
+        recorders = list(recorders)
+        if not recorders:
+            return cls()
+
+        # The first round merges into fresh recorders, which the following rounds can then merge into
+        first = recorders[0]
+        pairs = []
+        for i in range(0, len(recorders), 2):
+            merged = cls(keep_series=first.keep_series, record_latency=first.record_latency, deal_size=first.deal_size)
+            for recorder in recorders[i : i + 2]:
+                merged.merge(recorder)
+            pairs.append(merged)
+        recorders = pairs
+
+        while len(recorders) > 1:
+            recorders = [
+                recorders[i].merge(recorders[i + 1]) if i + 1 < len(recorders) else recorders[i]
+                for i in range(0, len(recorders), 2)
+            ]
+
+        return recorders[0]
+
+    def snapshot(self) -> dict:
+        """
+        Returns a compact, JSON-serializable snapshot of the recorder, which can be sent across processes or hosts.
+        """
+        players = {}
+
+        for player_id, stats in self.player_stats.items():
+            players[player_id] = {
+                "type": stats["type"],
+                "wins": stats["wins"],
+                "losses": stats["losses"],
+                "draws": stats["draws"],
+                "trick_points": stats["trick_points"].snapshot(),
+                "game_points": stats["game_points"].snapshot(),
+            }
+            if self.record_latency:
+                players[player_id]["latency"] = {
+                    phase: stats["latency"][phase].snapshot() for phase in DECISION_PHASES
+                }
+
+        snapshot = {
+            "keep_series": self.keep_series,
+            "record_latency": self.record_latency,
+            "deal_size": self.deal_size,
+            "players": players,
+        }
+
+        if self.results is not None:
+            snapshot["results"] = self.results.snapshot()
+
+        if self.decision_cache:
+            snapshot["decision_cache"] = self.decision_cache
+
+        return snapshot
 
-    def compare_players(self, player1: Player, player2: Player):
+    @classmethod
+    def from_snapshot(cls, snapshot: dict) -> "StatsRecorder":
+        """
+        Rebuilds a recorder from a snapshot.
+        """
+        recorder = cls(
+            keep_series=snapshot["keep_series"],
+            record_latency=snapshot.get("record_latency", False),
+            deal_size=snapshot.get("deal_size"),
+        )
+
+        for player_id, stats in snapshot["players"].items():
+            player_stats = recorder._new_player_stats(stats["type"])
+            player_stats["wins"] = stats["wins"]
+            player_stats["losses"] = stats["losses"]
+            player_stats["draws"] = stats["draws"]
+            player_stats["trick_points"] = RunningStat.from_snapshot(stats["trick_points"])
+            player_stats["game_points"] = RunningStat.from_snapshot(stats["game_points"])
+            for phase, latency in stats.get("latency", {}).items():
+                player_stats["latency"][phase] = LatencyStat.from_snapshot(latency)
+            recorder.player_stats[player_id] = player_stats
+
+        if recorder.keep_series:
+            recorder.results = ResultsStore.from_snapshot(snapshot["results"])
+
+        recorder.add_decision_cache_counts(snapshot.get("decision_cache", {}))
+
+        return recorder
+
+    def save_snapshot(self, filename: str):
+        """
+        Saves a snapshot of the recorder to a JSON file, to be merged later on with load_snapshot.
+        """
+        with open(filename, "w") as f:
+            json.dump(self.snapshot(), f, separators=(",", ":"))
+
+    @classmethod
+    def load_snapshot(cls, filename: str) -> "StatsRecorder":
+        """
+        Loads a recorder from a snapshot file.
+        """
+        with open(filename) as f:
+            return cls.from_snapshot(json.load(f))
+
+    def get_iterations(self) -> int:
+        """
+        Returns the number of games recorded.
+        """
+        if not self.player_stats:
+            return 0
+        return self.player_stats[list(self.player_stats.keys())[0]]["game_points"].count
+
+    def compare_players(self, player1, player2):
         """
         Compares two players based on their wins, losses, and point turnovers.
         """
         comparison = {
-            player1: self.get_player_stats(player1),
-            player2: self.get_player_stats(player2),
+            self._player_id(player1): self.get_player_stats(player1),
+            self._player_id(player2): self.get_player_stats(player2),
         }
 
         return comparison
 
-    def get_player_stats(self, player: Player):
+    def get_player_stats(self, player):
         """
         Returns a dictionary of a player's stats, including a calculation of the average points per game.
+        The player may be given either as a player or as its id.
         """
+        stats = self.player_stats[self._player_id(player)]
+        game_points = stats["game_points"]
+        trick_points = stats["trick_points"]
+
         return {
-            "type": player.type,
-            "wins": self.player_stats[player].get("wins", 0),
-            "losses": self.player_stats[player].get("losses", 0),
-            "draws": self.player_stats[player].get("draws", 0),
-            "average_points_per_game": sum(self.player_stats[player].get("game_turnovers", 0)) / len(self.player_stats[player].get("game_turnovers", 0))
-            if self.player_stats[player].get("game_turnovers", False)
-            else 0,
-            "highest_game_turnover": max(
-                self.player_stats[player].get("game_turnovers", 0)
-            ),
-            "average_points_per_trick": sum(
-                self.player_stats[player].get("trick_turnovers", 0)
-            )
-            / len(self.player_stats[player].get("trick_turnovers", 0))
-            if self.player_stats[player].get("trick_turnovers", False)
-            else 0,
-            "highest_trick_turnover": max(
-                self.player_stats[player].get("trick_turnovers", 0)
-            )
+            "type": stats["type"],
+            "wins": stats["wins"],
+            "losses": stats["losses"],
+            "draws": stats["draws"],
+            "average_points_per_game": game_points.mean,
+            "stdev_points_per_game": game_points.stdev(),
+            "highest_game_turnover": game_points.max or 0,
+            "average_points_per_trick": trick_points.mean,
+            "stdev_points_per_trick": trick_points.stdev(),
+            "highest_trick_turnover": trick_points.max or 0,
+        }
+
+    def get_latency_stats(self, player):
+        """
+        Returns a summary of a player's decision latencies, per decision phase and overall.
+        """
+        latency = self.player_stats[self._player_id(player)]["latency"]
+        overall = LatencyStat()
+        for phase in DECISION_PHASES:
+            overall.merge(latency[phase])
+
+        latency_stats = {phase: latency[phase].summary() for phase in DECISION_PHASES}
+        latency_stats["overall"] = overall.summary()
+
+        return latency_stats
+
+    def get_decision_cache_stats(self) -> dict:
+        """
+        Returns the hits, misses and hit rate of the decision cache, per agent type.
+        """
+        return {
+            player_type: {"hits": hits, "misses": misses, "hit_rate": hits / max(hits + misses, 1)}
+            for player_type, (hits, misses) in self.decision_cache.items()
         }
 
+    def get_paired_differences(self) -> list:
+        """
+        Returns the paired differences between every two players over the duplicate deals recorded.
+        """
+        return self.results.paired_differences(self.deal_size)
+
     def rank_players(self, criterion="wins"):
         """
-        Ranks players based on a given criterion, out of wins, total points scored and average points scored per game.
+        Ranks the ids of players based on a given criterion, out of wins, total points scored and average points scored per game.
         """
         if criterion == "wins":
             sorted_players = sorted(
@@ -111,13 +557,13 @@ class StatsRecorder:
         elif criterion == "points":
             sorted_players = sorted(
                 self.player_stats.keys(),
-                key=lambda p: sum(self.player_stats[p]["game_turnovers"]),
+                key=lambda p: self.player_stats[p]["game_points"].total,
                 reverse=True,
             )
         elif criterion == "average_game_turnover":
             sorted_players = sorted(
                 self.player_stats.keys(),
-                key=lambda p: self.player_stats[p]["average_game_turnover"],
+                key=lambda p: self.player_stats[p]["game_points"].mean,
                 reverse=True,
             )
         else:
@@ -136,18 +582,32 @@ class StatsRecorder:
 
         parsed_stats = {
             "players": {},
-            "iterations": len(
-                self.player_stats[list(self.player_stats.keys())[0]]["game_turnovers"]
-            ),
+            "iterations": self.get_iterations(),
         }
 
         # Create directory if it doesn't exist
-        if not os.path.exists(os.path.dirname(filename)):
-            os.makedirs(os.path.dirname(filename))
+        directory = os.path.dirname(filename)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # Per-game figures are aggregated from the columns of raw results when these are kept
+        summary = self.results.summary() if self.results is not None else {}
 
         with open(filename, "w") as f:
-            for player in self.player_stats:
-                parsed_stats["players"][player.name] = self.get_player_stats(player)
+            for player_id in self.player_stats:
+                parsed_stats["players"][player_id] = self.get_player_stats(player_id)
+                parsed_stats["players"][player_id]["game_points_histogram"] = self.player_stats[player_id]["game_points"].histogram
+                parsed_stats["players"][player_id]["trick_points_histogram"] = self.player_stats[player_id]["trick_points"].histogram
+                parsed_stats["players"][player_id].update(summary.get(player_id, {}))
+                if self.record_latency:
+                    parsed_stats["players"][player_id]["decision_latency"] = self.get_latency_stats(player_id)
+
+            if self.decision_cache:
+                parsed_stats["decision_cache"] = self.get_decision_cache_stats()
+
+            if self.deal_size is not None:
+                parsed_stats["deal_size"] = self.deal_size
+                parsed_stats["paired_differences"] = self.get_paired_differences()
 
             json.dump(parsed_stats, f, indent=4)
 
@@ -171,8 +631,8 @@ class StatsRecorder:
             "Highest Point Turnover (Trick)",
         ]
 
-        for player in sorted_players:
-            stats = self.get_player_stats(player)
+        for player_id in sorted_players:
+            stats = self.get_player_stats(player_id)
 
             win_loss_ratio = (
                 stats["wins"] / stats["losses"]
@@ -182,8 +642,8 @@ class StatsRecorder:
 
             table.add_row(
                 [
-                    player,
-                    player.type,
+                    player_id,
+                    stats["type"],
                     stats["wins"],
                     stats["draws"],
                     stats["losses"],
@@ -198,3 +658,72 @@ class StatsRecorder:
 
         print(f"Ranking based on {criterion}:")
         print(table)
+
+        if self.record_latency:
+            self.print_latency_table(sorted_players)
+
+        if self.decision_cache:
+            self.print_decision_cache_table()
+
+        if self.deal_size is not None:
+            self.print_paired_table()
+
+    def print_latency_table(self, player_ids: list):
+        """
+        Prints a table of the players' decision latencies, per decision phase.
+        """
+        table = PrettyTable()
+        table.field_names = ["Player", "Type", "Phase", "Decisions", "Mean (us)", "p50 (us)", "p90 (us)", "p99 (us)", "Max (us)"]
+
+        for player_id in player_ids:
+            for phase, summary in self.get_latency_stats(player_id).items():
+                if not summary["decisions"]:
+                    continue
+                table.add_row(
+                    [player_id, self.player_stats[player_id]["type"], phase, summary["decisions"]]
+                    + [f"{summary[key]:.1f}" for key in ("mean_us", "p50_us", "p90_us", "p99_us", "max_us")]
+                )
+        table.align = "l"
+
+        print("Decision latency:")
+        print(table)
+
+    def print_decision_cache_table(self):
+        """
+        Prints a table of the decision cache's hit rate, per agent type.
+        """
+        table = PrettyTable()
+        table.field_names = ["Type", "Hits", "Misses", "Hit Rate"]
+
+        for player_type, summary in sorted(self.get_decision_cache_stats().items()):
+            table.add_row([player_type, summary["hits"], summary["misses"], f"{summary['hit_rate']:.2%}"])
+        table.align = "l"
+
+        print("Decision cache:")
+        print(table)
+
+    def print_paired_table(self):
+        """
+        Prints a table of the paired differences between every two players over the duplicate deals recorded.
+        """
+        table = PrettyTable()
+        table.field_names = ["Player", "Opponent", "Deals", "Points / Game Diff.", "Points 95% CI", "Win Rate Diff.", "Win Rate 95% CI"]
+
+        for pair in self.get_paired_differences():
+            points_low, points_high = pair["points_interval"]
+            win_rate_low, win_rate_high = pair["win_rate_interval"]
+            table.add_row(
+                [
+                    pair["player"],
+                    pair["opponent"],
+                    pair["deals"],
+                    f"{pair['points_difference']:+.2f}",
+                    f"[{points_low:+.2f}, {points_high:+.2f}]",
+                    f"{pair['win_rate_difference']:+.2%}",
+                    f"[{win_rate_low:+.2%}, {win_rate_high:+.2%}]",
+                ]
+            )
+        table.align = "l"
+
+        print(f"Paired differences over duplicate deals of {self.deal_size} games:")
+        print(table)